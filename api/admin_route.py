@@ -0,0 +1,117 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ValidationError
+
+from core.admin import require_admin
+from core.compile import save_compile_artifacts
+from core.config import Settings, settings
+from core.model_manager import model_manager
+from core.profiling import profile_path
+from core.warmup import warm_handle
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+class ReloadRequest(BaseModel):
+    # Campos de Settings a modificar antes de recargar (p. ej. {"whisper_backend": "ctranslate2"})
+    settings: Dict[str, Any] = {}
+
+
+def _validate_settings(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida los cambios con el esquema de Settings sin tocar la configuración en uso"""
+    unknown = [key for key in overrides if key not in Settings.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Configuraciones desconocidas: {unknown}")
+    try:
+        validated = Settings(**{**settings.model_dump(), **overrides})
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {key: getattr(validated, key) for key in overrides}
+
+
+def _assign_settings(values: Dict[str, Any]):
+    for key, value in values.items():
+        setattr(settings, key, value)
+
+
+def _reload_in_background(name: str, overrides: Dict[str, Any]):
+    """
+    Aplica los cambios de configuración y recarga con el candado de recarga ya tomado por
+    el endpoint. Si la recarga falla se restauran los valores anteriores
+    """
+    previous = {key: getattr(settings, key) for key in overrides}
+    try:
+        _assign_settings(overrides)
+    except Exception:
+        model_manager.cancel_reload(name)
+        _assign_settings(previous)
+        logger.exception("No se pudieron aplicar las configuraciones de la recarga", extra={"model": name})
+        return
+
+    try:
+        model_manager.reload(name, warmup=lambda handle: warm_handle(name, handle), lock_acquired=True)
+    except Exception:
+        # El error también queda en reload_state/reload_error (GET /models/)
+        _assign_settings(previous)
+        logger.exception("Recarga fallida; se restauran las configuraciones anteriores",
+                         extra={"model": name, "settings": list(overrides)})
+        return
+
+    try:
+        save_compile_artifacts()
+    except Exception:
+        logger.exception("No se pudieron guardar los artefactos de compilación", extra={"model": name})
+
+
+@router.post("/models/{name}/reload", status_code=202)
+async def reload_model_endpoint(name: str, request: Optional[ReloadRequest] = None):
+    """
+    Recarga un modelo sin cortar el servicio: la nueva versión se carga y calienta en
+    segundo plano, se pone en servicio de forma atómica y la anterior se libera cuando
+    terminan sus peticiones en curso. El progreso se consulta en GET /models/
+    """
+    if name not in model_manager.registered_models():
+        raise HTTPException(status_code=404, detail=f"Modelo no registrado: {name}")
+
+    overrides = _validate_settings(request.settings) if request and request.settings else {}
+
+    # El candado se toma acá (no en el hilo) para que dos POST seguidos no pisen la configuración
+    if not model_manager.try_begin_reload(name):
+        raise HTTPException(status_code=409, detail=f"Ya hay una recarga en curso para el modelo {name}")
+    try:
+        threading.Thread(target=_reload_in_background, args=(name, overrides), name=f"reload-{name}",
+                         daemon=True).start()
+    except Exception:
+        model_manager.cancel_reload(name)
+        raise
+    return {
+        "model": name,
+        "status": "reloading",
+        "generation": model_manager.generation(name),
+        "settings": request.settings if request else {}
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def profile_summary_endpoint(profile_id: str):
+    """Resumen de un perfil capturado con X-Profile: 1 (archivos, segmentos de torch, duración)"""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Perfil no encontrado: {profile_id}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@router.get("/profiles/{profile_id}/{file_name}")
+async def profile_file_endpoint(profile_id: str, file_name: str):
+    """Descarga un archivo del perfil (python.speedscope.json, torch-<n>-<pool>.json, ...)"""
+    path = profile_path(profile_id, file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Archivo no encontrado en el perfil {profile_id}: {file_name}")
+    return FileResponse(path, filename=file_name)
@@ -4,16 +4,20 @@ from typing import Optional
 from pathlib import Path
 from schemas.audio_translation import TranslateAudioResponse
 from services.audio_translation_service import process_audio_translation_with_files
+from services.translation_service import GENERATION_TIERS, UnsupportedLanguageError
+from services.tts_service import TTS_TIERS
 
 router = APIRouter(prefix="/translate-audio", tags=["audio-translation"])
 
 @router.post("/")
 async def translate_audio_endpoint(
     audio_file: UploadFile = File(..., description="Archivo de audio a transcribir y traducir"),
-    source_lang: str = Form(..., description="Código del idioma de origen (ej: 'es', 'en', 'zh')"),
+    source_lang: Optional[str] = Form(None, description="Código del idioma de origen (ej: 'es', 'en', 'zh'). Si se omite lo detecta Whisper"),
     target_lang: str = Form(..., description="Código del idioma de destino (ej: 'es', 'en', 'zh')"),
     voice_reference_file: UploadFile = File(..., description="Archivo de audio de referencia para la síntesis de voz"),
-    model: str = Form("F5TTS_v1_Base", description="Modelo TTS a utilizar")
+    model: str = Form("F5TTS_v1_Base", description="Modelo TTS a utilizar"),
+    translation_tier: Optional[str] = Form(None, description="Nivel de generación de la traducción: 'fast' (greedy) o 'quality' (beam search)"),
+    tts_tier: Optional[str] = Form(None, description="Nivel de la síntesis de voz: 'draft' (~8 pasos, rápido), 'standard' o 'high'")
 ):
     """
     Endpoint que realiza el proceso completo:
@@ -37,12 +41,26 @@ async def translate_audio_endpoint(
                 detail="El archivo de referencia de voz debe ser de tipo audio"
             )
         
+        if translation_tier and translation_tier not in GENERATION_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nivel de traducción inválido: {translation_tier}. Opciones: {list(GENERATION_TIERS)}"
+            )
+        
+        if tts_tier and tts_tier not in TTS_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nivel de TTS inválido: {tts_tier}. Opciones: {list(TTS_TIERS)}"
+            )
+        
         result = await process_audio_translation_with_files(
             audio_file=audio_file,
             voice_reference_file=voice_reference_file,
             source_lang=source_lang,
             target_lang=target_lang,
-            model=model
+            model=model,
+            translation_tier=translation_tier,
+            tts_tier=tts_tier
         )
         
         # Verificar si hubo un error en el procesamiento
@@ -57,6 +75,9 @@ async def translate_audio_endpoint(
                 detail="Error: No se pudo generar el archivo de audio"
             )
         
+        # Idioma de origen efectivo (el indicado o el detectado por Whisper)
+        source_lang = result.get("source_lang", source_lang)
+        
         # Crear nombre de archivo descriptivo
         original_filename = audio_file.filename or "audio"
         base_name = Path(original_filename).stem
@@ -75,6 +96,9 @@ async def translate_audio_endpoint(
             clean_text = clean_text.replace('"', "'").replace('\n', ' ').replace('\r', ' ')
             return clean_text[:max_length]
         
+        # Ventana del audio de referencia usada en la síntesis (vacía si no se recortó)
+        reference_window = result.get("reference_window") or {}
+
         # Retornar el archivo directamente
         return FileResponse(
             path=output_audio_path,
@@ -85,10 +109,21 @@ async def translate_audio_endpoint(
                 "X-Translated-Text": clean_text_for_header(result.get("translated_text", "")),
                 "X-Source-Lang": source_lang,
                 "X-Target-Lang": target_lang,
+                "X-Source-Lang-Detected": str(result.get("source_lang_detected", False)).lower(),
+                "X-Translation-Skipped": str(result.get("translation_skipped", False)).lower(),
+                "X-Translation-Tier": result.get("translation_tier", ""),
+                "X-TTS-Tier": result.get("tts_tier", ""),
+                "X-TTS-Time": str(result.get("tts_time", 0)),
+                "X-Reference-Window": f"{reference_window.get('window_start', '')}-{reference_window.get('window_end', '')}",
+                "X-Reference-Saved-Seconds": str(reference_window.get("saved_seconds", 0)),
                 "X-Total-Time": str(result.get("total_time", 0))
             }
         )
             
+    except HTTPException:
+        raise
+    except UnsupportedLanguageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Capturar cualquier excepción no controlada
         raise HTTPException(
@@ -100,10 +135,12 @@ async def translate_audio_endpoint(
 @router.post("/info", response_model=TranslateAudioResponse)
 async def translate_audio_info_endpoint(
     audio_file: UploadFile = File(..., description="Archivo de audio a transcribir y traducir"),
-    source_lang: str = Form(..., description="Código del idioma de origen (ej: 'es', 'en', 'zh')"),
+    source_lang: Optional[str] = Form(None, description="Código del idioma de origen (ej: 'es', 'en', 'zh'). Si se omite lo detecta Whisper"),
     target_lang: str = Form(..., description="Código del idioma de destino (ej: 'es', 'en', 'zh')"),
     voice_reference_file: UploadFile = File(..., description="Archivo de audio de referencia para la síntesis de voz"),
-    model: str = Form("F5TTS_v1_Base", description="Modelo TTS a utilizar")
+    model: str = Form("F5TTS_v1_Base", description="Modelo TTS a utilizar"),
+    translation_tier: Optional[str] = Form(None, description="Nivel de generación de la traducción: 'fast' (greedy) o 'quality' (beam search)"),
+    tts_tier: Optional[str] = Form(None, description="Nivel de la síntesis de voz: 'draft' (~8 pasos, rápido), 'standard' o 'high'")
 ):
     """
     Endpoint que realiza el proceso completo y retorna información JSON (para ver en Swagger UI):
@@ -128,12 +165,26 @@ async def translate_audio_info_endpoint(
                 detail="El archivo de referencia de voz debe ser de tipo audio"
             )
         
+        if translation_tier and translation_tier not in GENERATION_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nivel de traducción inválido: {translation_tier}. Opciones: {list(GENERATION_TIERS)}"
+            )
+        
+        if tts_tier and tts_tier not in TTS_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nivel de TTS inválido: {tts_tier}. Opciones: {list(TTS_TIERS)}"
+            )
+        
         result = await process_audio_translation_with_files(
             audio_file=audio_file,
             voice_reference_file=voice_reference_file,
             source_lang=source_lang,
             target_lang=target_lang,
-            model=model
+            model=model,
+            translation_tier=translation_tier,
+            tts_tier=tts_tier
         )
         
         # Verificar si hubo un error en el procesamiento
@@ -141,6 +192,10 @@ async def translate_audio_info_endpoint(
             raise HTTPException(status_code=400, detail=result["error"])
             
         return result
+    except HTTPException:
+        raise
+    except UnsupportedLanguageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Capturar cualquier excepción no controlada
         raise HTTPException(
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from core.warmup import readiness_report
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/live")
+async def liveness_endpoint():
+    """El proceso está vivo y atendiendo peticiones (aunque los modelos sigan cargando)"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness_endpoint():
+    """200 solo cuando todos los modelos están cargados y calentados; 503 mientras tanto"""
+    report = readiness_report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
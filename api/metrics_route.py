@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.config import settings
+from core.metrics import MULTIPROCESS, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Métricas en formato Prometheus: latencia por etapa y modelo, colas de los pools, residencia y cachés"""
+    if settings.workers > 1 and not MULTIPROCESS:
+        # Sin el directorio compartido cada scrape vería solo las métricas de un worker al azar
+        raise HTTPException(status_code=503, detail="Con varios workers /metrics requiere PROMETHEUS_MULTIPROC_DIR "
+                                                    "(se fija al arrancar con gunicorn_conf.py)")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from core.model_manager import model_manager
+from core.executors import executors_report
+from core.workers import worker_memory_report
+from services.tts_batching import batching_report
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+@router.get("/")
+async def models_status_endpoint():
+    """Estado de cada modelo registrado (cargado, cargando, fallido o sin cargar)"""
+    return {"models": model_manager.status()}
+
+@router.get("/metrics")
+async def models_metrics_endpoint():
+    """Métricas de residencia: memoria vs presupuesto, cargas, desalojos y tiempo residente"""
+    metrics = model_manager.metrics()
+    # En modo multi-worker cada worker reporta su propia memoria y su crecimiento desde el fork
+    metrics["worker"] = worker_memory_report()
+    metrics["pools"] = executors_report()
+    metrics["tts_batching"] = batching_report()
+    return metrics
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException
 from schemas.translation import TranslationRequest, TranslationResponse
-from services.translation_service import translate_text
+from services.translation_service import UnsupportedLanguageError, translate_text
 
 router = APIRouter(prefix="/translate", tags=["translation"])
 
+# Síncrono: FastAPI lo corre en su threadpool y las peticiones a distintos modelos
+# ocupan sus pools a la vez en lugar de turnarse en el event loop
 @router.post("/", response_model=TranslationResponse)
-async def translate_text_endpoint(payload: TranslationRequest):
+def translate_text_endpoint(payload: TranslationRequest):
     try:
         result = translate_text(payload)
         return result
+    except UnsupportedLanguageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error durante la traducción: {str(e)}")
\ No newline at end of file
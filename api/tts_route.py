@@ -4,9 +4,11 @@ from services.tts_service import generate_tts
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
+# Endpoint síncrono: FastAPI lo corre en su threadpool, así varias peticiones pueden
+# esperar a la vez en el planificador de lotes TTS sin bloquear el event loop
 @router.post("/", response_model=TTSResponse)
-async def generate_tts_endpoint(payload: TTSRequest):
-    result = generate_tts(payload)
+def generate_tts_endpoint(payload: TTSRequest):
+    result = generate_tts(payload, payload.language)
     if result["returncode"]!= 0:
         # Sólo hay error real si el CLI devuelve código distinto de cero
         raise HTTPException(status_code=500, detail=result["stderr"])
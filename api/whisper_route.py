@@ -4,8 +4,10 @@ from services.whisper_service import transcribe_audio
 
 router = APIRouter(prefix="/transcribe", tags=["whisper"])
 
+# Síncrono: FastAPI lo corre en su threadpool y las peticiones a distintos modelos
+# ocupan sus pools a la vez en lugar de turnarse en el event loop
 @router.post("/", response_model=WhisperResponse)
-async def transcribe_audio_endpoint(payload: WhisperRequest):
+def transcribe_audio_endpoint(payload: WhisperRequest):
     result = transcribe_audio(payload)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
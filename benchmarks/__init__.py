@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento y calidad de los modelos del servicio.
+Se ejecutan como módulos desde la raíz del proyecto, por ejemplo:
+
+    python -m benchmarks.asr_backends
+"""
@@ -0,0 +1,86 @@
+"""
+Compara los motores ASR (openai-whisper vs CTranslate2/faster-whisper) sobre los clips de audios/.
+
+Mide tiempo de carga, latencia por clip, factor de tiempo real (RTF) y WER.
+Como los fixtures no incluyen transcripciones de referencia, el WER se calcula contra
+la salida del primer backend de la lista (por defecto openai-whisper en float32).
+
+Uso:
+    python -m benchmarks.asr_backends --backends openai ctranslate2 --model-size turbo
+"""
+import argparse
+import json
+
+from benchmarks.common import list_audio_fixtures, percentile, timed, word_error_rate
+from services.whisper_service import SAMPLE_RATE, create_whisper_backend, load_audio_clip
+
+
+def audio_duration(path) -> float:
+    """Duración en segundos del clip decodificado a 16 kHz mono"""
+    return len(load_audio_clip(path)) / SAMPLE_RATE
+
+
+def run(backends, model_size: str, device: str, compute_type: str, limit: int = None) -> dict:
+    fixtures = list_audio_fixtures(limit)
+    durations = {path.name: audio_duration(path) for path in fixtures}
+    report = {"model_size": model_size, "device": device, "backends": {}}
+    reference_texts = None
+
+    for backend_name in backends:
+        backend, load_time = timed(create_whisper_backend, backend_name, model_size, device, compute_type)
+        print(f"[{backend_name}] modelo cargado en {load_time:.2f}s")
+
+        clips = {}
+        for path in fixtures:
+            result, elapsed = timed(backend.transcribe, str(path))
+            clips[path.name] = {
+                "text": result["text"],
+                "language": result.get("language"),
+                "seconds": round(elapsed, 3),
+                "rtf": round(elapsed / durations[path.name], 3) if durations[path.name] else None
+            }
+            print(f"[{backend_name}] {path.name}: {elapsed:.2f}s")
+
+        if reference_texts is None:
+            reference_texts = {name: clip["text"] for name, clip in clips.items()}
+        for name, clip in clips.items():
+            clip["wer"] = round(word_error_rate(reference_texts[name], clip["text"]), 4)
+
+        latencies = [clip["seconds"] for clip in clips.values()]
+        report["backends"][backend_name] = {
+            "load_time": round(load_time, 2),
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "total_seconds": round(sum(latencies), 2),
+            "rtf": round(sum(latencies) / sum(durations.values()), 3),
+            "mean_wer": round(sum(clip["wer"] for clip in clips.values()) / len(clips), 4),
+            "clips": clips
+        }
+        del backend
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["openai", "ctranslate2"])
+    parser.add_argument("--model-size", default="turbo")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--limit", type=int, default=None, help="Cantidad máxima de clips a usar")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.backends, args.model_size, args.device, args.compute_type, args.limit)
+
+    print("\nBackend        carga(s)  p50(s)  p90(s)  RTF    WER")
+    for name, stats in report["backends"].items():
+        print(f"{name:<14} {stats['load_time']:>8} {stats['p50']:>7} {stats['p90']:>7} {stats['rtf']:>6} {stats['mean_wer']:>6}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Utilidades compartidas por los benchmarks: fixtures de audio, métricas de calidad y tiempos.
+"""
+import json
+import math
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+AUDIO_FIXTURES_DIR = PROJECT_ROOT / "audios"
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".ogg", ".flac"}
+
+
+def list_audio_fixtures(limit: int = None) -> List[Path]:
+    """Devuelve los clips de audio incluidos en el repositorio ordenados por nombre"""
+    fixtures = sorted(
+        path for path in AUDIO_FIXTURES_DIR.iterdir()
+        if path.suffix.lower() in AUDIO_EXTENSIONS
+    )
+    return fixtures[:limit] if limit else fixtures
+
+
+def _normalize_words(text: str) -> List[str]:
+    cleaned = "".join(char.lower() if char.isalnum() or char.isspace() else " " for char in text)
+    return cleaned.split()
+
+
+def _edit_distance(reference: List[str], hypothesis: List[str]) -> int:
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER a nivel de palabra, ignorando mayúsculas y puntuación"""
+    reference_words = _normalize_words(reference)
+    hypothesis_words = _normalize_words(hypothesis)
+    if not reference_words:
+        return 0.0 if not hypothesis_words else 1.0
+    return _edit_distance(reference_words, hypothesis_words) / len(reference_words)
+
+
+def timed(fn: Callable, *args, **kwargs) -> Tuple[object, float]:
+    """Ejecuta fn y devuelve (resultado, segundos)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal (pct entre 0 y 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+TRANSLATION_TEST_SET = Path(__file__).resolve().parent / "data" / "translation_test_set.json"
+
+
+def load_translation_test_set(pair: str = None) -> List[dict]:
+    """
+    Carga el conjunto de prueba de traducción incluido en el repositorio
+
+    Args:
+        pair: Filtra por par de idiomas con formato 'es-en' (opcional)
+    """
+    with open(TRANSLATION_TEST_SET, encoding="utf-8") as f:
+        samples = json.load(f)
+    if pair:
+        samples = [s for s in samples if f"{s['src_lang']}-{s['tgt_lang']}" == pair]
+    return samples
+
+
+def corpus_bleu(references: List[str], hypotheses: List[str], max_order: int = 4) -> float:
+    """BLEU de corpus (0-100) con tokenización por palabras y suavizado add-one"""
+    matches = [0] * max_order
+    totals = [0] * max_order
+    reference_length = hypothesis_length = 0
+
+    for reference, hypothesis in zip(references, hypotheses):
+        reference_words = _normalize_words(reference)
+        hypothesis_words = _normalize_words(hypothesis)
+        reference_length += len(reference_words)
+        hypothesis_length += len(hypothesis_words)
+        for order in range(1, max_order + 1):
+            reference_ngrams = Counter(tuple(reference_words[i:i + order]) for i in range(len(reference_words) - order + 1))
+            hypothesis_ngrams = Counter(tuple(hypothesis_words[i:i + order]) for i in range(len(hypothesis_words) - order + 1))
+            matches[order - 1] += sum((hypothesis_ngrams & reference_ngrams).values())
+            totals[order - 1] += max(len(hypothesis_words) - order + 1, 0)
+
+    if hypothesis_length == 0:
+        return 0.0
+
+    log_precision = sum(math.log((m + 1) / (t + 1)) for m, t in zip(matches, totals)) / max_order
+    brevity_penalty = 1.0 if hypothesis_length > reference_length else math.exp(1 - reference_length / hypothesis_length)
+    return 100 * brevity_penalty * math.exp(log_precision)
@@ -0,0 +1,81 @@
+"""
+Mide la aceleración del modo compilado (torch.compile) por modelo.
+
+Para cada modelo se carga primero en modo eager y después con Settings.compile_models
+habilitado, y se repite la inferencia de calentamiento --iterations veces. Se reporta la
+primera llamada (en modo compilado incluye la compilación o la lectura de la caché:
+ejecutar el benchmark dos veces muestra el efecto de los artefactos guardados), la
+latencia p50/p90 de las siguientes y la aceleración p50 eager / p50 compilado.
+
+Uso:
+    python -m benchmarks.compile_speedup --models whisper translation tts_spanish --mode default
+"""
+import argparse
+import json
+
+from benchmarks.common import percentile, timed
+from core.compile import COMPILE_MODES, save_compile_artifacts
+from core.config import settings
+from core.model_manager import model_manager
+from core.warmup import warm_handle
+import services.translation_service  # noqa: F401  (registra los modelos en el gestor)
+import services.tts_service  # noqa: F401
+import services.whisper_service  # noqa: F401
+
+
+def measure(model_name: str, device: str, iterations: int) -> dict:
+    handle, load_time = timed(model_manager.get, model_name, device)
+    _, first_call = timed(warm_handle, model_name, handle)
+    latencies = [timed(warm_handle, model_name, handle)[1] for _ in range(iterations)]
+    model_manager.unload(model_name, device)
+    return {
+        "load_time": round(load_time, 2),
+        "first_call": round(first_call, 3),
+        "p50": round(percentile(latencies, 50), 3),
+        "p90": round(percentile(latencies, 90), 3)
+    }
+
+
+def run(models, device: str, mode: str, iterations: int) -> dict:
+    settings.compile_mode = mode
+    report = {"device": device, "mode": mode, "iterations": iterations, "models": {}}
+
+    for model_name in models:
+        settings.compile_models = []
+        eager = measure(model_name, device, iterations)
+        settings.compile_models = [model_name]
+        compiled = measure(model_name, device, iterations)
+        save_compile_artifacts()
+
+        speedup = round(eager["p50"] / compiled["p50"], 2) if compiled["p50"] else None
+        report["models"][model_name] = {"eager": eager, "compiled": compiled, "speedup": speedup}
+        print(f"[{model_name}] eager p50 {eager['p50']}s, compilado p50 {compiled['p50']}s "
+              f"(x{speedup}, primera llamada {compiled['first_call']}s)")
+
+    settings.compile_models = []
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["whisper", "translation", "tts_spanish"])
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--mode", default="default", choices=COMPILE_MODES)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.models, args.device, args.mode, args.iterations)
+
+    print("\nModelo         eager p50  comp. p50  aceleración  1ª llamada eager  1ª llamada comp.")
+    for model_name, stats in report["models"].items():
+        print(f"{model_name:<14} {stats['eager']['p50']:>9} {stats['compiled']['p50']:>10} "
+              f"{stats['speedup']:>12} {stats['eager']['first_call']:>17} {stats['compiled']['first_call']:>17}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
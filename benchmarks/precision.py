@@ -0,0 +1,154 @@
+"""
+Compara fp32 contra bf16 (autocast en CPU) para Whisper, M2M100 y F5TTS.
+
+- Whisper: latencia y RTF sobre los clips de audios/ y WER contra la salida fp32.
+- M2M100: latencia por oración, BLEU contra las referencias del conjunto de prueba y
+  porcentaje de salidas idénticas a fp32.
+- F5TTS: latencia de síntesis y WER de la transcripción (Whisper fp32) del audio
+  generado contra el texto pedido, como medida de inteligibilidad.
+
+Si la CPU no soporta bf16 de forma nativa los cargadores vuelven a fp32 y el reporte
+lo indica (bf16_supported = false).
+
+Uso:
+    python -m benchmarks.precision --models whisper translation tts_spanish --limit 5
+"""
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import (
+    corpus_bleu, list_audio_fixtures, load_translation_test_set, percentile, timed, word_error_rate
+)
+from core.config import settings
+from core.executors import get_pool_settings, pool_name_for
+from core.model_manager import model_manager
+from core.precision import cpu_supports_bf16
+from services.translation_service import generate_translation
+from services.whisper_service import SAMPLE_RATE, load_audio_clip
+import services.tts_service  # noqa: F401  (registra los modelos TTS en el gestor)
+
+PRECISIONS_TO_COMPARE = ("fp32", "bf16")
+TTS_TEXTS = {
+    "es": ["Hola, esto es una prueba de síntesis de voz.", "El servicio traduce audio entre idiomas."],
+    "en": ["Hello, this is a speech synthesis test.", "The service translates audio between languages."]
+}
+
+
+def load_with_precision(model_name: str, precision: str):
+    pool_name = pool_name_for(model_name)
+    settings.model_pools[pool_name] = get_pool_settings(model_name).model_copy(update={"precision": precision})
+    model_manager.unload(model_name, "cpu")
+    return timed(model_manager.get, model_name, "cpu")
+
+
+def bench_whisper(precision: str, limit: int) -> dict:
+    model, load_time = load_with_precision("whisper", precision)
+    clips = {}
+    for path in list_audio_fixtures(limit):
+        audio = load_audio_clip(path)
+        result, elapsed = timed(model.transcribe, audio)
+        clips[path.name] = {"text": result["text"], "seconds": round(elapsed, 3),
+                            "rtf": round(elapsed / (len(audio) / SAMPLE_RATE), 3)}
+    latencies = [clip["seconds"] for clip in clips.values()]
+    return {"load_time": round(load_time, 2), "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "rtf": round(sum(c["rtf"] for c in clips.values()) / len(clips), 3), "clips": clips}
+
+
+def bench_translation(precision: str, limit: int) -> dict:
+    handle, load_time = load_with_precision("translation", precision)
+    samples = load_translation_test_set()[:limit] if limit else load_translation_test_set()
+    outputs, latencies = [], []
+    for sample in samples:
+        result, elapsed = timed(generate_translation, handle, sample["source"], sample["src_lang"], sample["tgt_lang"])
+        outputs.append(result["translated_text"])
+        latencies.append(elapsed)
+    return {"load_time": round(load_time, 2), "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "bleu": round(corpus_bleu([s["reference"] for s in samples], outputs), 2), "outputs": outputs}
+
+
+def bench_tts(model_name: str, precision: str, whisper_fp32) -> dict:
+    from services.tts_service import get_model_config
+
+    tts, load_time = load_with_precision(model_name, precision)
+    languages = get_model_config(model_name[len("tts_"):]).languages
+    language = languages[0] if languages else "en"
+    latencies, wers = [], []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index, text in enumerate(TTS_TEXTS.get(language, TTS_TEXTS["en"])):
+            output_file = str(Path(tmp_dir) / f"{index}.wav")
+            _, elapsed = timed(
+                tts.infer, ref_file=settings.warmup_reference_audio_path,
+                ref_text=settings.warmup_reference_text, gen_text=text, file_wave=output_file
+            )
+            latencies.append(elapsed)
+            transcription = whisper_fp32.transcribe(output_file, language=language)["text"]
+            wers.append(word_error_rate(text, transcription))
+    return {"load_time": round(load_time, 2), "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3), "intelligibility_wer": round(sum(wers) / len(wers), 4)}
+
+
+def run(models, limit: int = None) -> dict:
+    report = {"bf16_supported": cpu_supports_bf16(), "models": {}}
+    whisper_fp32 = None
+
+    for model_name in models:
+        results = {}
+        for precision in PRECISIONS_TO_COMPARE:
+            if model_name == "whisper":
+                results[precision] = bench_whisper(precision, limit)
+            elif model_name == "translation":
+                results[precision] = bench_translation(precision, limit)
+            else:
+                if whisper_fp32 is None:
+                    # Whisper fp32 independiente del gestor para evaluar el audio generado
+                    from services.whisper_service import create_whisper_backend
+                    whisper_fp32 = create_whisper_backend(settings.whisper_backend, settings.whisper_model_size, "cpu")
+                results[precision] = bench_tts(model_name, precision, whisper_fp32)
+            print(f"[{model_name}/{precision}] p50 {results[precision]['p50']}s")
+        model_manager.unload(model_name, "cpu")
+
+        fp32, bf16 = results["fp32"], results["bf16"]
+        deltas = {"speedup": round(fp32["p50"] / bf16["p50"], 2) if bf16["p50"] else None}
+        if model_name == "whisper":
+            wers = [word_error_rate(fp32["clips"][name]["text"], clip["text"]) for name, clip in bf16["clips"].items()]
+            deltas["wer_vs_fp32"] = round(sum(wers) / len(wers), 4)
+        elif model_name == "translation":
+            deltas["bleu_delta"] = round(bf16["bleu"] - fp32["bleu"], 2)
+            deltas["identical_to_fp32"] = round(
+                sum(a == b for a, b in zip(fp32["outputs"], bf16["outputs"])) / len(fp32["outputs"]), 3
+            )
+        else:
+            deltas["intelligibility_wer_delta"] = round(bf16["intelligibility_wer"] - fp32["intelligibility_wer"], 4)
+        report["models"][model_name] = {**results, "deltas": deltas}
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["whisper", "translation", "tts_spanish"])
+    parser.add_argument("--limit", type=int, default=None, help="Cantidad máxima de clips / oraciones")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.models, args.limit)
+
+    if not report["bf16_supported"]:
+        print("\n⚠️ La CPU no soporta bf16 nativo: la columna bf16 corresponde al fallback a fp32")
+    print("\nModelo         fp32 p50  bf16 p50  aceleración  delta de calidad")
+    for model_name, stats in report["models"].items():
+        quality = {k: v for k, v in stats["deltas"].items() if k != "speedup"}
+        print(f"{model_name:<14} {stats['fp32']['p50']:>8} {stats['bf16']['p50']:>9} "
+              f"{stats['deltas']['speedup']:>12}  {quality}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Suite reproducible de rendimiento por etapa, con comparación contra una línea base.
+
+`run` mide, sobre los clips de audios/ y el conjunto de prueba de traducción:
+
+- whisper: latencia por clip y factor de tiempo real (cómputo / duración del audio)
+- translation: latencia por oración y tokens generados por segundo
+- tts: latencia de síntesis de textos fijos y RTF sobre el audio generado
+- pipeline: transcripción → traducción → síntesis completa, con el desglose por etapa
+
+Para cada etapa reporta percentiles p50/p90/p99, tiempo de carga en frío del modelo y
+pico de RSS del proceso durante la etapa, y guarda todo en JSON junto con los datos del
+entorno (commit, versiones, CPU, dispositivo de cada modelo). Cada modelo corre en el
+dispositivo de su pool (Settings.model_pools), igual que en el servicio; --device cpu
+fuerza CPU en todos. Corre sin red: los modelos tienen que estar en la caché local de
+HuggingFace / F5TTS (por ejemplo después de setup_models.py).
+
+`compare` contrasta un resultado con una línea base guardada y marca como regresión
+cada métrica que empeora más que el umbral (termina con código 1 si hay alguna).
+
+Uso:
+    python -m benchmarks.suite run --limit 5 --repeat 3 --output results.json
+    python -m benchmarks.suite run --device cpu --output results-cpu.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.1
+"""
+import os
+
+# Antes de importar torch/transformers: sin descargas
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import soundfile as sf
+
+from benchmarks.common import PROJECT_ROOT, list_audio_fixtures, load_translation_test_set, percentile, timed
+from core.config import settings
+from core.executors import resolve_device
+from core.metrics import start_request_timing
+from core.model_manager import model_manager
+from core.resources import current_rss_bytes
+from services.audio_translation_service import _run_translation_pipeline
+from services.translation_service import generate_translation
+from services.tts_service import get_model_name_for_language, get_tts_model_key
+from services.whisper_service import SAMPLE_RATE, load_audio_clip
+
+STAGES = ("whisper", "translation", "tts", "pipeline")
+TTS_TEXTS = {
+    "es": ["Hola, esto es una prueba de síntesis de voz.",
+           "El servicio traduce audio entre idiomas y conserva la voz de quien habla."],
+    "en": ["Hello, this is a speech synthesis test.",
+           "The service translates audio between languages and keeps the speaker's voice."]
+}
+
+# Métricas comparadas y si un valor mayor es mejor
+COMPARED_METRICS = {
+    "p50": False, "p90": False, "p99": False, "rtf": False,
+    "load_time": False, "peak_rss_mb": False, "tokens_per_second": True
+}
+
+
+class _PeakRss:
+    """Pico de RSS mientras dura el bloque (ru_maxrss es del proceso entero y no se reinicia)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, current_rss_bytes())
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "_PeakRss":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+    @property
+    def mb(self) -> float:
+        return round(self.peak / 1024 ** 2, 1)
+
+
+def latency_summary(latencies) -> dict:
+    return {
+        "runs": len(latencies),
+        "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50": round(percentile(latencies, 50), 3),
+        "p90": round(percentile(latencies, 90), 3),
+        "p99": round(percentile(latencies, 99), 3)
+    }
+
+
+def effective_device(model_name: str) -> str:
+    """Dispositivo en el que corre el modelo: el de su pool, con 'auto' resuelto como en los cargadores"""
+    import torch
+
+    device = resolve_device(model_name)
+    if device == "auto":
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+def force_device(device: str):
+    """Fija el dispositivo de todos los pools (para medir, por ejemplo, solo en CPU)"""
+    settings.model_pools = {
+        name: pool.model_copy(update={"device": device}) for name, pool in settings.model_pools.items()
+    }
+
+
+def cold_load(model_name: str) -> float:
+    """Descarga el modelo si estaba residente y mide una carga en frío (en el dispositivo de su pool)"""
+    model_manager.unload(model_name)
+    _, load_time = timed(model_manager.get, model_name)
+    return round(load_time, 2)
+
+
+def repeated(fn, repeat: int, warmup: int):
+    """Ejecuta fn warmup veces sin medir y luego repeat veces; devuelve (último resultado, latencias)"""
+    for _ in range(warmup):
+        fn()
+    latencies, result = [], None
+    for _ in range(repeat):
+        result, elapsed = timed(fn)
+        latencies.append(elapsed)
+    return result, latencies
+
+
+def bench_whisper(clips, repeat: int, warmup: int) -> dict:
+    load_time = cold_load("whisper")
+    model = model_manager.get("whisper")
+    latencies, audio_seconds = [], 0.0
+    for path in clips:
+        audio = load_audio_clip(str(path))
+        _, clip_latencies = repeated(lambda: model.transcribe(audio), repeat, warmup)
+        latencies.extend(clip_latencies)
+        audio_seconds += len(audio) / SAMPLE_RATE * repeat
+    return {
+        **latency_summary(latencies), "device": effective_device("whisper"), "load_time": load_time,
+        "audio_seconds": round(audio_seconds, 2), "rtf": round(sum(latencies) / audio_seconds, 3) if audio_seconds else 0.0
+    }
+
+
+def bench_translation(samples, repeat: int, warmup: int) -> dict:
+    load_time = cold_load("translation")
+    handle = model_manager.get("translation")
+    latencies, input_tokens, output_tokens = [], 0, 0
+    for sample in samples:
+        result, sample_latencies = repeated(
+            lambda: generate_translation(handle, sample["source"], sample["src_lang"], sample["tgt_lang"]),
+            repeat, warmup
+        )
+        latencies.extend(sample_latencies)
+        input_tokens += int(result["input_tokens"]) * repeat
+        output_tokens += int(result["output_tokens"]) * repeat
+    return {
+        **latency_summary(latencies), "device": effective_device("translation"), "load_time": load_time,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "tokens_per_second": round(output_tokens / sum(latencies), 1) if sum(latencies) else 0.0
+    }
+
+
+def bench_tts(language: str, repeat: int, warmup: int) -> dict:
+    model_name = get_tts_model_key(get_model_name_for_language(language))
+    load_time = cold_load(model_name)
+    tts = model_manager.get(model_name)
+    latencies, generated_seconds = [], 0.0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index, text in enumerate(TTS_TEXTS.get(language, TTS_TEXTS["en"])):
+            output_file = str(Path(tmp_dir) / f"{index}.wav")
+            _, text_latencies = repeated(
+                lambda: tts.infer(ref_file=settings.warmup_reference_audio_path, ref_text=settings.warmup_reference_text,
+                                  gen_text=text, file_wave=output_file, seed=0),
+                repeat, warmup
+            )
+            latencies.extend(text_latencies)
+            generated_seconds += sf.info(output_file).duration * repeat
+    return {
+        **latency_summary(latencies), "model": model_name, "device": effective_device(model_name), "load_time": load_time,
+        "generated_seconds": round(generated_seconds, 2),
+        "rtf": round(sum(latencies) / generated_seconds, 3) if generated_seconds else 0.0
+    }
+
+
+def bench_pipeline(clips, target_lang: str, repeat: int, warmup: int) -> dict:
+    latencies, audio_seconds, stages = [], 0.0, {}
+
+    def run_once(path: Path):
+        timings = start_request_timing()
+        result = _run_translation_pipeline(path, Path(settings.warmup_reference_audio_path), None, target_lang,
+                                           reference_text=settings.warmup_reference_text)
+        if "error" in result:
+            raise RuntimeError(f"{path.name}: {result['error']}")
+        shutil.rmtree(Path(result["output_audio_path"]).parent, ignore_errors=True)
+        return timings
+
+    for path in clips:
+        for _ in range(warmup):
+            run_once(path)
+        for _ in range(repeat):
+            timings, elapsed = timed(run_once, path)
+            latencies.append(elapsed)
+            for stage, _, seconds in timings:
+                stages.setdefault(stage, []).append(seconds)
+        audio_seconds += len(load_audio_clip(str(path))) / SAMPLE_RATE * repeat
+    return {
+        **latency_summary(latencies), "target_lang": target_lang, "audio_seconds": round(audio_seconds, 2),
+        "rtf": round(sum(latencies) / audio_seconds, 3) if audio_seconds else 0.0,
+        "stages": {stage: latency_summary(values) for stage, values in stages.items()}
+    }
+
+
+def environment() -> dict:
+    import torch
+    import transformers
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "transformers": transformers.__version__,
+        "whisper_backend": settings.whisper_backend,
+        "whisper_model_size": settings.whisper_model_size,
+        "translation_model": settings.translation_model_name,
+        "cuda_available": torch.cuda.is_available(),
+        "devices": {name: effective_device(name) for name in settings.model_pools}
+    }
+
+
+def run(stages, limit: int = None, repeat: int = 3, warmup: int = 1, target_lang: str = "en",
+        tts_languages=("es", "en"), device: str = None) -> dict:
+    import torch
+
+    if device:
+        force_device(device)
+    torch.manual_seed(0)
+    clips = list_audio_fixtures(limit)
+    samples = load_translation_test_set()
+    samples = samples[:limit] if limit else samples
+    report = {"environment": environment(), "config": {"limit": limit, "repeat": repeat, "warmup": warmup,
+                                                       "device": device or "pools",
+                                                       "clips": [path.name for path in clips]}, "stages": {}}
+
+    runs = {
+        "whisper": lambda: {"whisper": bench_whisper(clips, repeat, warmup)},
+        "translation": lambda: {"translation": bench_translation(samples, repeat, warmup)},
+        "tts": lambda: {f"tts_{language}": bench_tts(language, repeat, warmup) for language in tts_languages},
+        "pipeline": lambda: {"pipeline": bench_pipeline(clips, target_lang, repeat, warmup)}
+    }
+    for stage in stages:
+        with _PeakRss() as rss:
+            results = runs[stage]()
+        for name, result in results.items():
+            result["peak_rss_mb"] = rss.mb
+            report["stages"][name] = result
+            print(f"[{name}] p50 {result['p50']}s p90 {result['p90']}s carga {result.get('load_time', '-')}s "
+                  f"pico RSS {rss.mb} MB")
+        if stage != "pipeline":
+            # Cada etapa arranca sin los modelos de la anterior para que el pico de RSS sea el suyo
+            for name in list(model_manager.registered_models()):
+                model_manager.unload(name)
+
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Compara las métricas de cada etapa presente en ambos reportes
+
+    Returns:
+        Lista de filas (etapa, métrica, base, actual, cambio relativo, regresión)
+    """
+    rows = []
+    for stage, base_metrics in baseline.get("stages", {}).items():
+        current_metrics = current.get("stages", {}).get(stage)
+        if current_metrics is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            base, value = base_metrics.get(metric), current_metrics.get(metric)
+            if not base or value is None:
+                continue
+            change = (value - base) / base
+            regression = -change > threshold if higher_is_better else change > threshold
+            rows.append({"stage": stage, "metric": metric, "baseline": base, "current": value,
+                         "change": round(change, 3), "regression": regression})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Ejecuta la suite y guarda los resultados")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--limit", type=int, default=None, help="Máximo de clips / oraciones por etapa")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Repeticiones medidas por entrada")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Repeticiones sin medir por entrada")
+    run_parser.add_argument("--target-lang", default="en", help="Idioma de destino del pipeline completo")
+    run_parser.add_argument("--tts-languages", nargs="+", default=["es", "en"])
+    run_parser.add_argument("--device", choices=["cpu"], default=None,
+                            help="Forzar el dispositivo de todos los modelos (por defecto el de Settings.model_pools)")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Archivo JSON de resultados")
+
+    compare_parser = commands.add_parser("compare", help="Compara resultados con una línea base")
+    compare_parser.add_argument("baseline", help="JSON de la línea base")
+    compare_parser.add_argument("current", help="JSON a comparar")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Empeoramiento relativo a partir del cual se marca una regresión")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args.stages, args.limit, args.repeat, args.warmup, args.target_lang, args.tts_languages,
+                     args.device)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.output}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+
+    base_devices = baseline.get("environment", {}).get("devices")
+    current_devices = current.get("environment", {}).get("devices")
+    if base_devices != current_devices:
+        print(f"Aviso: los dispositivos no coinciden (base {base_devices}, actual {current_devices})\n")
+
+    print(f"{'Etapa':<14} {'Métrica':<18} {'Base':>10} {'Actual':>10} {'Cambio':>8}")
+    for row in rows:
+        flag = "  REGRESIÓN" if row["regression"] else ""
+        print(f"{row['stage']:<14} {row['metric']:<18} {row['baseline']:>10} {row['current']:>10} "
+              f"{row['change']:>+8.1%}{flag}")
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\n{len(regressions)} regresiones (umbral {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
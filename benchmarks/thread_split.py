@@ -0,0 +1,136 @@
+"""
+Busca el reparto de núcleos entre los ejecutores de Whisper, M2M100 y F5TTS que
+maximiza el throughput cuando los tres modelos corren a la vez en CPU.
+
+Para cada reparto (por ejemplo 4/2/2 en 8 núcleos) se asignan núcleos contiguos a
+cada pool (intra_op_threads = núcleos, cpu_affinity = esos núcleos), se ejecuta en
+paralelo la inferencia de calentamiento de cada modelo en bucle durante --duration
+segundos y se mide cuántas completa cada uno por segundo. El throughput del pipeline
+completo (una inferencia de cada modelo por petición) es el del modelo más lento.
+Como referencia se mide también sin pools (todos comparten el pool de torch).
+
+Uso:
+    python -m benchmarks.thread_split --cores 8 --duration 30 --output split.json
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+
+from core.config import ModelPoolSettings, settings
+from core.executors import shutdown_executors
+from core.model_manager import model_manager
+from core.warmup import warm_handle
+import services.translation_service  # noqa: F401  (registra los modelos en el gestor)
+import services.tts_service  # noqa: F401
+import services.whisper_service  # noqa: F401
+
+POOL_MODELS = {"whisper": "whisper", "translation": "translation", "tts": "tts_spanish"}
+
+
+def candidate_splits(cores: int, step: int):
+    """Todas las formas de repartir los núcleos entre los pools (al menos step por pool)"""
+    sizes = range(step, cores - 2 * step + 1, step)
+    for whisper_cores, translation_cores in itertools.product(sizes, sizes):
+        tts_cores = cores - whisper_cores - translation_cores
+        if tts_cores >= step:
+            yield {"whisper": whisper_cores, "translation": translation_cores, "tts": tts_cores}
+
+
+def apply_split(split: dict, first_core: int = 0):
+    """Configura los pools con núcleos contiguos; split=None deja un solo pool de torch compartido"""
+    shutdown_executors()
+    offset = first_core
+    for pool_name in POOL_MODELS:
+        if split is None:
+            settings.model_pools[pool_name] = ModelPoolSettings(device="cpu")
+            continue
+        cores = list(range(offset, offset + split[pool_name]))
+        offset += split[pool_name]
+        settings.model_pools[pool_name] = ModelPoolSettings(
+            device="cpu", intra_op_threads=len(cores), cpu_affinity=cores
+        )
+
+
+def measure(duration: float) -> dict:
+    """Corre los tres modelos a la vez durante duration segundos y devuelve inferencias/s de cada uno"""
+    deadline = time.time() + duration
+    completed = {pool_name: 0 for pool_name in POOL_MODELS}
+
+    def loop(pool_name, model_name):
+        with model_manager.lease(model_name, "cpu") as handle:
+            while time.time() < deadline:
+                warm_handle(model_name, handle)
+                completed[pool_name] += 1
+
+    threads = [threading.Thread(target=loop, args=item) for item in POOL_MODELS.items()]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    rates = {pool_name: round(count / elapsed, 3) for pool_name, count in completed.items()}
+    rates["pipeline"] = min(rates.values())
+    return rates
+
+
+def run(cores: int, duration: float, step: int, first_core: int = 0) -> dict:
+    for model_name in POOL_MODELS.values():
+        model_manager.get(model_name, "cpu")
+
+    report = {"cores": cores, "duration": duration, "results": []}
+    splits = [None] + list(candidate_splits(cores, step))
+    for split in splits:
+        apply_split(split, first_core)
+        # Una vuelta corta para que cada pool cree y caliente sus hilos
+        measure(min(duration, 5.0))
+        rates = measure(duration)
+        label = "compartido" if split is None else "/".join(str(split[name]) for name in POOL_MODELS)
+        report["results"].append({"split": split, "label": label, "rates": rates})
+        print(f"[{label}] " + ", ".join(f"{name} {rate}/s" for name, rate in rates.items()))
+
+    best = max(report["results"], key=lambda result: result["rates"]["pipeline"])
+    report["best"] = best
+    shutdown_executors()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cores", type=int, default=os.cpu_count(), help="Núcleos a repartir entre los pools")
+    parser.add_argument("--first-core", type=int, default=0, help="Primer núcleo a usar")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de medición por reparto")
+    parser.add_argument("--step", type=int, default=None, help="Granularidad del reparto (por defecto cores/8)")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    step = args.step or max(args.cores // 8, 1)
+    report = run(args.cores, args.duration, step, args.first_core)
+
+    print("\nReparto (whisper/traducción/tts)  whisper/s  traducción/s  tts/s  pipeline/s")
+    for result in sorted(report["results"], key=lambda r: r["rates"]["pipeline"], reverse=True):
+        rates = result["rates"]
+        print(f"{result['label']:<33} {rates['whisper']:>9} {rates['translation']:>13} "
+              f"{rates['tts']:>6} {rates['pipeline']:>11}")
+    best = report["best"]
+    print(f"\nMejor reparto para {args.cores} núcleos: {best['label']} ({best['rates']['pipeline']} pipelines/s)")
+    if best["split"]:
+        offset = args.first_core
+        pools = {}
+        for pool_name in POOL_MODELS:
+            cores = list(range(offset, offset + best["split"][pool_name]))
+            offset += len(cores)
+            pools[pool_name] = {"device": "cpu", "intra_op_threads": len(cores), "cpu_affinity": cores}
+        print(f"MODEL_POOLS='{json.dumps(pools)}'")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compara el backend PyTorch eager contra ONNX Runtime para M2M100 con decodificación greedy.
+
+Verifica que ambos backends produzcan exactamente la misma traducción y reporta
+latencia por oración (p50/p90) y tiempo de carga (exportación y caché).
+
+Uso:
+    python -m benchmarks.translation_onnx --model facebook/m2m100_418M
+"""
+import argparse
+import json
+
+import torch
+
+from benchmarks.common import load_translation_test_set, percentile, timed
+from services.translation_service import load_translation_model
+
+
+def greedy_translate(model, tokenizer, sample) -> str:
+    tokenizer.src_lang = sample["src_lang"]
+    encoded = tokenizer(sample["source"], return_tensors="pt")
+    with torch.inference_mode():
+        tokens = model.generate(
+            **encoded,
+            forced_bos_token_id=tokenizer.get_lang_id(sample["tgt_lang"]),
+            num_beams=1,
+            do_sample=False
+        )
+    return tokenizer.batch_decode(tokens, skip_special_tokens=True)[0]
+
+
+def run(model_name: str, pair: str = None) -> dict:
+    samples = load_translation_test_set(pair)
+    report = {"model": model_name, "samples": len(samples), "backends": {}}
+    outputs_by_backend = {}
+
+    for backend in ("torch", "onnx"):
+        (model, tokenizer), load_time = timed(load_translation_model, model_name, "cpu", "none", backend)
+        greedy_translate(model, tokenizer, samples[0])  # Calentamiento
+
+        outputs, latencies = [], []
+        for sample in samples:
+            text, elapsed = timed(greedy_translate, model, tokenizer, sample)
+            outputs.append(text)
+            latencies.append(elapsed)
+
+        outputs_by_backend[backend] = outputs
+        report["backends"][backend] = {
+            "load_time": round(load_time, 2),
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "total_seconds": round(sum(latencies), 2)
+        }
+        print(f"[{backend}] carga {load_time:.2f}s, total {sum(latencies):.2f}s")
+        del model
+
+    mismatches = [
+        {"source": sample["source"], "torch": a, "onnx": b}
+        for sample, a, b in zip(samples, outputs_by_backend["torch"], outputs_by_backend["onnx"])
+        if a != b
+    ]
+    report["identical_outputs"] = not mismatches
+    report["mismatches"] = mismatches
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/m2m100_418M")
+    parser.add_argument("--pair", default=None, help="Par de idiomas a evaluar, por ejemplo 'es-en'")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.model, args.pair)
+
+    print("\nBackend  carga(s)  p50(s)  p90(s)  total(s)")
+    for backend, stats in report["backends"].items():
+        print(f"{backend:<8} {stats['load_time']:>8} {stats['p50']:>7} {stats['p90']:>7} {stats['total_seconds']:>9}")
+    print(f"\nSalidas idénticas: {'sí' if report['identical_outputs'] else 'no'} "
+          f"({len(report['mismatches'])} diferencias)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
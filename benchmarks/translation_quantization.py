@@ -0,0 +1,104 @@
+"""
+Compara M2M100 en fp32 contra la cuantización dinámica int8 en CPU.
+
+Reporta tiempo de carga, latencia por oración (p50/p90), BLEU contra las referencias
+de benchmarks/data/translation_test_set.json y el porcentaje de salidas idénticas a fp32.
+
+Uso:
+    python -m benchmarks.translation_quantization --model facebook/m2m100_418M
+"""
+import argparse
+import json
+
+import torch
+
+from benchmarks.common import corpus_bleu, load_translation_test_set, percentile, timed
+from services.translation_service import load_translation_model
+
+
+def model_size_mb(model) -> float:
+    """Tamaño en memoria de los pesos (incluye los pesos empaquetados int8)"""
+    state = model.state_dict()
+    total = 0
+    for value in state.values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            # Linear cuantizadas: (peso int8 empaquetado, bias)
+            total += sum(t.numel() * t.element_size() for t in value if isinstance(t, torch.Tensor))
+    return total / 1024 ** 2
+
+
+def translate_samples(model, tokenizer, samples):
+    outputs, latencies = [], []
+    for sample in samples:
+        def translate():
+            tokenizer.src_lang = sample["src_lang"]
+            encoded = tokenizer(sample["source"], return_tensors="pt")
+            with torch.inference_mode():
+                tokens = model.generate(**encoded, forced_bos_token_id=tokenizer.get_lang_id(sample["tgt_lang"]))
+            return tokenizer.batch_decode(tokens, skip_special_tokens=True)[0]
+
+        text, elapsed = timed(translate)
+        outputs.append(text)
+        latencies.append(elapsed)
+    return outputs, latencies
+
+
+def run(model_name: str, pair: str = None) -> dict:
+    samples = load_translation_test_set(pair)
+    references = [s["reference"] for s in samples]
+    report = {"model": model_name, "samples": len(samples), "modes": {}}
+    baseline_outputs = None
+
+    for mode in ("none", "dynamic_int8"):
+        (model, tokenizer), load_time = timed(load_translation_model, model_name, "cpu", mode)
+        stats = {"load_time": round(load_time, 2), "weights_mb": round(model_size_mb(model), 1)}
+
+        if mode == "dynamic_int8":
+            # Segunda carga: ya usa los pesos cuantizados cacheados en disco
+            del model
+            (model, tokenizer), cached_load_time = timed(load_translation_model, model_name, "cpu", mode)
+            stats["cached_load_time"] = round(cached_load_time, 2)
+
+        # Una traducción de calentamiento para no medir inicializaciones perezosas
+        translate_samples(model, tokenizer, samples[:1])
+        outputs, latencies = translate_samples(model, tokenizer, samples)
+
+        if baseline_outputs is None:
+            baseline_outputs = outputs
+        stats.update({
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "bleu": round(corpus_bleu(references, outputs), 2),
+            "identical_to_fp32": round(sum(a == b for a, b in zip(outputs, baseline_outputs)) / len(outputs), 3),
+            "outputs": outputs
+        })
+        report["modes"][mode] = stats
+        print(f"[{mode}] carga {stats['load_time']}s, p50 {stats['p50']}s, BLEU {stats['bleu']}")
+        del model
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/m2m100_418M")
+    parser.add_argument("--pair", default=None, help="Par de idiomas a evaluar, por ejemplo 'es-en'")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.model, args.pair)
+
+    print("\nModo           carga(s)  pesos(MB)  p50(s)  p90(s)  BLEU   =fp32")
+    for mode, stats in report["modes"].items():
+        print(f"{mode:<14} {stats['load_time']:>8} {stats['weights_mb']:>10} {stats['p50']:>7} "
+              f"{stats['p90']:>7} {stats['bleu']:>6} {stats['identical_to_fp32']:>6}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
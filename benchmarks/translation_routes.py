@@ -0,0 +1,114 @@
+"""
+Latencia y BLEU por ruta de traducción (Settings.translation_routes).
+
+Para cada par de idiomas del conjunto de prueba incluido en el repositorio
+(benchmarks/data/translation_test_set.json) traduce con el checkpoint de su ruta y,
+como referencia, con el modelo predeterminado (Settings.translation_model_name).
+Los modelos se cargan a través del gestor, igual que en el servicio.
+
+Los pares sin ruta configurada se miden con las rutas candidatas (opus-mt para es↔en):
+así se decide si conviene activarlas con TRANSLATION_ROUTES. Al final se imprime el
+valor a usar para las candidatas que no pierden más de --max-bleu-drop puntos de BLEU.
+
+Uso:
+    python -m benchmarks.translation_routes --tier fast --output routes.json
+"""
+import argparse
+import json
+
+from benchmarks.common import corpus_bleu, load_translation_test_set, percentile, timed
+from core.config import TranslationRouteSettings, settings
+from core.model_manager import model_manager
+from services.translation_service import generate_translation, resolve_translation_route
+
+
+# Rutas que el servicio no trae activadas y que este benchmark evalúa
+CANDIDATE_ROUTES = {
+    "es-en": TranslationRouteSettings(model="Helsinki-NLP/opus-mt-es-en", tier="fast"),
+    "en-es": TranslationRouteSettings(model="Helsinki-NLP/opus-mt-en-es", tier="fast")
+}
+
+
+def bench_model(model_key: str, samples, tier: str) -> dict:
+    handle, load_time = timed(model_manager.get, model_key, "cpu")
+    outputs, latencies, output_tokens = [], [], 0
+    for sample in samples:
+        result, elapsed = timed(generate_translation, handle, sample["source"], sample["src_lang"],
+                                sample["tgt_lang"], tier)
+        outputs.append(result["translated_text"])
+        latencies.append(elapsed)
+        output_tokens += int(result["output_tokens"])
+    return {
+        "load_time": round(load_time, 2),
+        "p50": round(percentile(latencies, 50), 3),
+        "p90": round(percentile(latencies, 90), 3),
+        "tokens_per_second": round(output_tokens / sum(latencies), 1) if sum(latencies) else 0.0,
+        "bleu": round(corpus_bleu([s["reference"] for s in samples], outputs), 2)
+    }
+
+
+def run(tier: str = None, candidates: bool = True) -> dict:
+    samples = load_translation_test_set()
+    pairs = sorted({f"{s['src_lang']}-{s['tgt_lang']}" for s in samples})
+    report = {"default_model": settings.translation_model_name, "routes": {}}
+    configured = settings.translation_routes
+    if candidates:
+        # Las rutas configuradas tienen prioridad sobre las candidatas
+        settings.translation_routes = {**CANDIDATE_ROUTES, **configured}
+
+    for pair in pairs:
+        pair_samples = load_translation_test_set(pair)
+        source_lang, target_lang = pair.split("-")
+        model_key, model_name, route_tier = resolve_translation_route(source_lang, target_lang)
+        entry = {"model": model_name, "tier": tier or route_tier or settings.translation_default_tier,
+                 "samples": len(pair_samples), "configured": pair in configured}
+        entry["route"] = bench_model(model_key, pair_samples, entry["tier"])
+        if model_key != "translation":
+            entry["default"] = bench_model("translation", pair_samples, entry["tier"])
+            entry["speedup"] = round(entry["default"]["p50"] / entry["route"]["p50"], 2) if entry["route"]["p50"] else None
+            entry["bleu_delta"] = round(entry["route"]["bleu"] - entry["default"]["bleu"], 2)
+        report["routes"][pair] = entry
+        print(f"[{pair}] {model_name}: p50 {entry['route']['p50']}s, BLEU {entry['route']['bleu']}")
+
+    settings.translation_routes = configured
+    return report
+
+
+def recommended_routes(report: dict, max_bleu_drop: float) -> dict:
+    """Rutas no configuradas que no pierden más de max_bleu_drop de BLEU frente al modelo predeterminado"""
+    return {
+        pair: {"model": entry["model"], "tier": CANDIDATE_ROUTES[pair].tier}
+        for pair, entry in report["routes"].items()
+        if not entry["configured"] and pair in CANDIDATE_ROUTES and entry.get("bleu_delta", -1e9) >= -max_bleu_drop
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tier", choices=["fast", "quality"], default=None,
+                        help="Nivel de generación (por defecto el de cada ruta)")
+    parser.add_argument("--no-candidates", action="store_true", help="Medir solo las rutas configuradas")
+    parser.add_argument("--max-bleu-drop", type=float, default=0.5,
+                        help="Pérdida de BLEU tolerada para recomendar una ruta candidata")
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = run(args.tier, candidates=not args.no_candidates)
+    report["recommended_routes"] = recommended_routes(report, args.max_bleu_drop)
+
+    print("\nPar     Modelo                          p50 ruta  BLEU ruta  p50 base  BLEU base  aceleración")
+    for pair, entry in report["routes"].items():
+        default = entry.get("default", entry["route"])
+        print(f"{pair:<7} {entry['model']:<31} {entry['route']['p50']:>8} {entry['route']['bleu']:>10} "
+              f"{default['p50']:>9} {default['bleu']:>10} {entry.get('speedup', 1.0):>12}")
+
+    if report["recommended_routes"]:
+        print(f"\nRutas candidatas que igualan la calidad: TRANSLATION_ROUTES='{json.dumps(report['recommended_routes'])}'")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
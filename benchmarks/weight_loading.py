@@ -0,0 +1,107 @@
+"""
+Mide tiempo de arranque y memoria al cargar M2M100 con from_pretrained (memoria privada)
+contra la carga con pesos safetensors mapeados en memoria (Settings.weights_mmap).
+
+Cada modo corre en un proceso nuevo. Se reportan RSS y USS: con mmap gran parte de RSS
+son páginas de archivo compartidas (caché de páginas) y USS, la memoria exclusiva, baja.
+Se ejecuta dos veces por modo: la primera puede incluir la conversión a safetensors.
+
+peak_rss_mb es el pico de memoria del proceso (ru_maxrss). Para M2M100 la carga con
+mmap evita la copia privada; en F5TTS, en cambio, el propio F5TTS lee el checkpoint
+entero antes de que se reemplacen los tensores, así que ahí el pico y el tiempo de
+arranque no mejoran: solo baja la memoria privada una vez cargado.
+
+Uso:
+    python -m benchmarks.weight_loading --model facebook/m2m100_418M
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import PROJECT_ROOT
+
+MODES = ("from_pretrained", "mmap")
+
+
+def _child(mode: str, model_name: str):
+    """Carga el modelo en este proceso e imprime las mediciones en JSON"""
+    from core.resources import current_rss_bytes
+
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+
+    import torch
+    from transformers import M2M100ForConditionalGeneration
+
+    if mode == "mmap":
+        from core.weights import load_pretrained_mmap
+        model = load_pretrained_mmap(M2M100ForConditionalGeneration, model_name)
+    else:
+        model = M2M100ForConditionalGeneration.from_pretrained(model_name).eval()
+    load_time = time.perf_counter() - start
+
+    # Una inferencia corta para medir también las páginas tocadas al usar el modelo
+    with torch.inference_mode():
+        model.generate(input_ids=torch.tensor([[128022, 1000, 2]]), max_new_tokens=5)
+
+    result = {
+        "mode": mode,
+        "load_time": round(load_time, 2),
+        "rss_mb": round(current_rss_bytes() / 1024 ** 2, 1),
+        "rss_delta_mb": round((current_rss_bytes() - rss_before) / 1024 ** 2, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    try:
+        import psutil
+        info = psutil.Process().memory_full_info()
+        result["uss_mb"] = round(info.uss / 1024 ** 2, 1)
+    except (ImportError, AttributeError):
+        pass
+    print(json.dumps(result))
+
+
+def run(model_name: str, repeats: int = 2) -> dict:
+    report = {
+        "model": model_name,
+        "runs": [],
+        "note": "Con F5TTS el pico de RSS y el arranque no mejoran con mmap: F5TTS lee el checkpoint "
+                "completo a memoria privada antes de que se reemplacen sus tensores"
+    }
+    for mode in MODES:
+        for attempt in range(repeats):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.weight_loading", "--child", mode, "--model", model_name],
+                cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["attempt"] = attempt + 1
+            report["runs"].append(result)
+            print(f"[{mode} #{attempt + 1}] carga {result['load_time']}s, RSS {result['rss_mb']} MB, "
+                  f"USS {result.get('uss_mb', '-')} MB, pico {result['peak_rss_mb']} MB")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/m2m100_418M")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--child", choices=MODES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None, help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.model)
+        return
+
+    report = run(args.model, args.repeats)
+    print(report["note"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,28 @@
 import asyncio
+import os
 import uvicorn
-from core.preload import preload_all_models
+from core.config import settings
 
 async def main():
-    # Precarga todos los modelos
-    preload_all_models()
-    
-    # Inicia la aplicación FastAPI
+    # La precarga y el calentamiento de modelos se lanzan en segundo plano al
+    # iniciar la aplicación (ver main.py); el balanceador espera a /health/ready
     print("\n===================================================================")
     print("🌐 Iniciando servidor FastAPI...")
     print("===================================================================\n")
     
     # Inicia el servidor con uvicorn
-    config = uvicorn.Config("main:app", host="0.0.0.0", port=8000, reload=False)
+    config = uvicorn.Config("main:app", host=settings.host, port=settings.port, reload=False)
     server = uvicorn.Server(config)
     await server.serve()
 
+def run_multi_worker():
+    # Varios workers: gunicorn precarga los modelos en el maestro y hace fork de
+    # los workers uvicorn, que comparten los pesos en páginas copy-on-write
+    print(f"🌐 Iniciando {settings.workers} workers con gunicorn (modelos compartidos entre workers)...")
+    os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn_conf.py", "main:app"])
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if settings.workers > 1:
+        run_multi_worker()
+    else:
+        asyncio.run(main())
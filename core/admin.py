@@ -0,0 +1,25 @@
+"""
+Autorización de los endpoints de administración (/admin).
+Se habilitan solo si Settings.admin_token tiene valor y se envía en el header X-Admin-Token.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from core.config import settings
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_valid_admin_token(token: Optional[str]) -> bool:
+    """Compara en tiempo constante contra Settings.admin_token (siempre False si no está configurado)"""
+    if not settings.admin_token or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.admin_token.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependencia de FastAPI para los endpoints de administración"""
+    if not is_valid_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail=f"Se requiere un {ADMIN_TOKEN_HEADER} válido")
@@ -0,0 +1,137 @@
+"""
+Modo compilado opcional (torch.compile) para los módulos más calientes de cada modelo.
+
+El bucle del decoder de Whisper y el transformer de difusión de F5TTS ejecutan miles
+de operaciones pequeñas por petición y en modo eager gran parte del tiempo de CPU se
+va en el despacho desde Python. Con Settings.compile_models se compilan esos módulos:
+
+- la compilación es perezosa: ocurre en la primera inferencia (el calentamiento),
+- los grafos compilados se guardan en Settings.compile_cache_dir y se reutilizan en
+  los siguientes arranques (caché de inductor y, en torch >= 2.6, los artefactos
+  empaquetados de torch.compiler.save_cache_artifacts),
+- si torch.compile no está disponible o falla un grafo, se sigue en modo eager.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COMPILE_MODES = ("default", "reduce-overhead", "max-autotune")
+ARTIFACTS_FILENAME = "compile_artifacts.bin"
+
+_cache_lock = threading.Lock()
+_cache_configured = False
+
+
+def is_compile_enabled(model_name: str) -> bool:
+    """True si el modelo (o su prefijo, 'tts' para 'tts_spanish') está en Settings.compile_models"""
+    return model_name in settings.compile_models or model_name.split("_", 1)[0] in settings.compile_models
+
+
+def _configure_cache():
+    """Apunta las cachés de inductor al directorio del proyecto y carga los artefactos guardados"""
+    global _cache_configured
+    with _cache_lock:
+        if _cache_configured:
+            return
+        _cache_configured = True
+
+        cache_dir = Path(settings.compile_cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str((cache_dir / "inductor").resolve()))
+        os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+        os.environ.setdefault("TORCHINDUCTOR_AUTOGRAD_CACHE", "1")
+
+        import torch
+        import torch._inductor.config as inductor_config
+        inductor_config.fx_graph_cache = True
+        # Un grafo que no se puede compilar se ejecuta en eager en lugar de fallar la petición
+        torch._dynamo.config.suppress_errors = True
+
+        artifacts_path = cache_dir / ARTIFACTS_FILENAME
+        load_artifacts = getattr(torch.compiler, "load_cache_artifacts", None)
+        if load_artifacts and artifacts_path.exists():
+            try:
+                load_artifacts(artifacts_path.read_bytes())
+                logger.info("Artefactos de compilación cargados", extra={"path": str(artifacts_path)})
+            except Exception as e:
+                logger.warning("No se pudieron cargar los artefactos de compilación: %s", e)
+
+
+def resolve_module_path(obj, path: str):
+    parent = obj
+    parts = path.split(".")
+    for part in parts[:-1]:
+        parent = getattr(parent, part)
+    return parent, parts[-1]
+
+
+def compile_hot_modules(model_name: str, root, module_paths: Iterable[str]):
+    """
+    Reemplaza los submódulos indicados de root por su versión compilada si el modelo
+    está habilitado en Settings.compile_models. No hace nada en caso contrario.
+
+    Args:
+        model_name: Nombre del modelo en el gestor (para la configuración)
+        root: Objeto que contiene los módulos (modelo torch, backend, instancia F5TTS)
+        module_paths: Rutas con puntos a los submódulos ('model.decoder', 'ema_model.transformer')
+
+    Returns:
+        Lista de rutas compiladas
+    """
+    if not is_compile_enabled(model_name):
+        return []
+    if settings.compile_mode not in COMPILE_MODES:
+        raise ValueError(f"Modo de compilación desconocido: {settings.compile_mode}. Opciones: {list(COMPILE_MODES)}")
+
+    try:
+        import torch
+        if not hasattr(torch, "compile"):
+            raise RuntimeError("torch.compile requiere torch >= 2.0")
+        _configure_cache()
+    except Exception as e:
+        logger.warning("Compilación no disponible, se usa modo eager: %s", e, extra={"model": model_name})
+        return []
+
+    compiled = []
+    for path in module_paths:
+        try:
+            parent, attr = resolve_module_path(root, path)
+            module = getattr(parent, attr)
+            if not isinstance(module, torch.nn.Module):
+                continue
+            # dynamic=True: la longitud de audio/texto cambia en cada petición
+            setattr(parent, attr, torch.compile(module, mode=settings.compile_mode, dynamic=True))
+            compiled.append(path)
+        except Exception as e:
+            logger.warning("No se pudo compilar %s, queda en modo eager: %s", path, e, extra={"model": model_name})
+
+    if compiled:
+        logger.info("Módulos compilados", extra={"model": model_name, "mode": settings.compile_mode, "modules": compiled})
+    return compiled
+
+
+def save_compile_artifacts():
+    """
+    Guarda los grafos compilados en este proceso para reutilizarlos en el próximo
+    arranque. Se llama después del calentamiento, que es cuando ocurre la compilación.
+    """
+    if not settings.compile_models or not _cache_configured:
+        return
+    try:
+        import torch
+        save_artifacts = getattr(torch.compiler, "save_cache_artifacts", None)
+        if save_artifacts is None:
+            return  # torch < 2.6: solo queda la caché de inductor en disco
+        artifacts = save_artifacts()
+        if artifacts:
+            artifacts_path = Path(settings.compile_cache_dir) / ARTIFACTS_FILENAME
+            artifacts_path.write_bytes(artifacts[0])
+            logger.info("Artefactos de compilación guardados", extra={"path": str(artifacts_path)})
+    except Exception as e:
+        logger.warning("No se pudieron guardar los artefactos de compilación: %s", e)
@@ -1,12 +1,221 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+from pydantic import BaseModel, model_validator
 from pydantic_settings import BaseSettings
 
+
+class ModelPoolSettings(BaseModel):
+    """
+    Dispositivo y reparto de CPU del ejecutor de un modelo (ver core/executors.py).
+    intra_op_threads es por hilo solo con OpenMP: MKL y el pthreadpool de XNNPACK/QNNPACK
+    lo comparten en todo el proceso, así que el aislamiento real lo da cpu_affinity
+    """
+    device: str = "auto"  # "auto" (GPU si está disponible), "cpu", "cuda", "cuda:1", ...
+    intra_op_threads: int = 0  # Hilos de torch por inferencia (0 = valor por defecto de torch; ver limitación arriba)
+    inter_op_threads: int = 0  # Global del proceso: se aplica el mayor de todos los pools (0 = por defecto)
+    cpu_affinity: List[int] = []  # Núcleos permitidos para los hilos del pool (vacío = todos)
+    max_concurrency: int = 1  # Inferencias simultáneas del mismo modelo
+    precision: str = "fp32"  # "fp32" o "bf16" (autocast en CPU; vuelve a fp32 si la CPU no lo soporta)
+
+
+class TTSTierSettings(BaseModel):
+    """Parámetros de inferencia de F5TTS para un nivel de calidad (ver services/tts_service.py)"""
+    nfe_step: int = 32  # Pasos del solver de flow matching: el costo crece linealmente
+    cfg_strength: float = 2.0  # Classifier-free guidance
+    sway_sampling_coef: float = -1.0  # < 0 concentra los pasos al inicio (ayuda con pocos pasos)
+
+
+class TranslationRouteSettings(BaseModel):
+    """Checkpoint y nivel de generación de un par de idiomas (ver services/translation_service.py)"""
+    model: str  # Checkpoint seq2seq de HuggingFace (M2M100, MarianMT / opus-mt, NLLB)
+    tier: Optional[str] = None  # "fast" o "quality" por defecto para el par (None = translation_default_tier)
+
+
+class TTSModelSettings(BaseModel):
+    """Un modelo F5TTS del registro de idiomas (ver services/tts_service.py y tts_models.json)"""
+    name: str  # Nombre descriptivo ("F5TTS_Spanish")
+    languages: List[str] = []  # Códigos de idioma que atiende; el primero es el principal
+    model: str = ""  # Configuración de arquitectura de F5TTS ("F5TTS_v1_Base"; vacío = la predeterminada)
+    ckpt_file: str = ""  # Checkpoint explícito (vacío = el predeterminado de F5TTS)
+    vocab_file: str = ""  # Vocabulario del checkpoint (vacío = el predeterminado)
+    vocoder_local_path: str = ""  # Vocoder local (vacío = se descarga el de la configuración del modelo)
+
+
 class Settings(BaseSettings):
     f5_tts_cmd: str = "f5-tts_infer-cli"
     f5_tts_model_name: str = "F5TTS_Spanish"  # Modelo predeterminado en ingles y chino
     f5_tts_model_name_es: str = "F5TTS_Spanish" # Modelo en español
-    use_gpu: bool = False
+
+    # Registro de modelos F5TTS por idioma. Se lee de tts_registry_file (si existe);
+    # cada modelo se registra en el gestor como "tts_<clave>" y se carga en el primer uso.
+    # Los idiomas sin modelo propio usan tts_default_model
+    tts_registry_file: str = "tts_models.json"
+    # Obsoletas: si tienen valor se copian al ckpt_file del modelo predeterminado / del español
+    f5_tts_ckpt_file: str = ""
+    f5_tts_ckpt_file_es: str = ""
+    tts_default_model: str = "base"
+    tts_models: Dict[str, TTSModelSettings] = {
+        "spanish": TTSModelSettings(name="F5TTS_Spanish", languages=["es"]),
+        "base": TTSModelSettings(name="F5TTS_Base", languages=["en", "zh"])
+    }
+
+    # Ejecutores por modelo: dispositivo, hilos y afinidad de CPU. Las claves son los
+    # nombres del gestor de modelos ("whisper", "translation") o su prefijo ("tts").
+    # Por variable de entorno: MODEL_POOLS='{"whisper": {"intra_op_threads": 4, "cpu_affinity": [0, 1, 2, 3]}}'
+    model_pools: Dict[str, ModelPoolSettings] = {
+        "whisper": ModelPoolSettings(),
+        "translation": ModelPoolSettings(),
+        "tts": ModelPoolSettings()
+    }
+
+    # Servidor
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1  # > 1 usa gunicorn con modelos precargados en el maestro (copy-on-write)
+    worker_torch_threads: int = 2  # Hilos intra-op de torch por worker en modo multi-worker
+
+    # Reconocimiento de voz (ASR)
+    whisper_backend: str = "openai"  # "openai" (openai-whisper) o "ctranslate2" (faster-whisper)
+    whisper_model_size: str = "turbo"
+    whisper_compute_type: str = "int8"  # Solo aplica al backend ctranslate2
+
+    # Traducción
+    translation_model_name: str = "facebook/m2m100_418M"
+    translation_backend: str = "torch"  # "torch" (PyTorch eager) o "onnx" (ONNX Runtime)
+    translation_onnx_dir: str = ""  # Vacío = junto a la caché de HuggingFace (~/.cache/huggingface/onnx)
+    translation_quantization: str = "none"  # "none" (fp32) o "dynamic_int8" (Linear cuantizadas, solo CPU)
+    translation_cache_dir: str = "model_cache/translation"  # Pesos convertidos reutilizados entre arranques
+    translation_default_tier: str = "fast"  # "fast" (greedy) o "quality" (beam search)
+    translation_fast_num_beams: int = 1
+    translation_quality_num_beams: int = 4
+    # Límite de salida: max_new_tokens = tokens de entrada * ratio + offset
+    translation_max_length_ratio: float = 2.0
+    translation_max_length_offset: int = 10
+    # Ruteo por par de idiomas "origen-destino": los pares sin ruta usan translation_model_name.
+    # Vacío por defecto (todo va a M2M100). Para pasar es↔en a opus-mt, una vez que
+    # python -m benchmarks.translation_routes muestre que su BLEU iguala al de M2M100:
+    # TRANSLATION_ROUTES='{"es-en": {"model": "Helsinki-NLP/opus-mt-es-en", "tier": "fast"},
+    #                      "en-es": {"model": "Helsinki-NLP/opus-mt-en-es", "tier": "fast"}}'
+    translation_routes: Dict[str, TranslationRouteSettings] = {}
+    # Candidatos de la detección automática del idioma de origen (vacío = todos los de langid)
+    translation_detect_languages: List[str] = ["es", "en", "zh", "fr", "de", "it", "pt", "ca", "ja", "ko", "ru", "ar"]
+
+    # Síntesis de voz (F5TTS): niveles de velocidad/calidad
+    tts_default_tier: str = "standard"  # "draft", "standard" o "high"
+    tts_tiers: Dict[str, TTSTierSettings] = {
+        "draft": TTSTierSettings(nfe_step=8),
+        "standard": TTSTierSettings(nfe_step=32),
+        "high": TTSTierSettings(nfe_step=64)
+    }
+    # Síntesis en lote de peticiones concurrentes para el mismo modelo (services/tts_batching.py)
+    tts_batching_enabled: bool = False
+    tts_batch_max_size: int = 4
+    tts_batch_max_wait_ms: int = 50  # Espera máxima para juntar un lote desde el primer trabajo
+    tts_batch_duration_ratio: float = 1.3  # Duración máxima / mínima dentro de un lote
+    # Textos largos: fragmentos sintetizados en paralelo y unidos con crossfade (services/tts_chunking.py)
+    tts_chunking_enabled: bool = False
+    tts_chunk_target_seconds: float = 8.0
+    tts_chunk_max_parallel: int = 2  # Fragmentos en memoria a la vez
+    tts_chunk_crossfade_seconds: float = 0.05
+
+    # Recorte del audio de referencia a la mejor ventana de voz (services/reference_audio.py)
+    reference_trim_enabled: bool = True
+    reference_min_seconds: float = 5.0
+    reference_max_seconds: float = 10.0
+    reference_cache_dir: str = "model_cache/references"
+    reference_cache_max_entries: int = 256  # Referencias preparadas en memoria y recortes en disco
+    # Con texto de referencia conocido el recorte es solo por VAD; True transcribe con Whisper para alinearlo
+    reference_align_with_text: bool = False
+
+    # Carga de pesos mapeados en memoria desde .safetensors (los pickled se convierten una vez).
+    # En F5TTS sin ckpt_file se usa el checkpoint predeterminado del hub; el pico de RSS al
+    # cargar no baja porque F5TTS lee antes el checkpoint entero (ver benchmarks/weight_loading.py)
+    weights_mmap: bool = False
+    safetensors_cache_dir: str = "model_cache/safetensors"
+
+    # Compilación opcional (torch.compile) de los módulos calientes: nombres de modelos
+    # o prefijos, por ejemplo ["whisper", "tts"]. Vacío = todo en modo eager
+    compile_models: List[str] = []
+    compile_mode: str = "default"  # "default", "reduce-overhead" o "max-autotune"
+    compile_cache_dir: str = "model_cache/compile"  # Grafos compilados reutilizados entre arranques
+
+    # Residencia de modelos en memoria
+    model_memory_budget_mb: int = 0  # 0 = sin límite; si no, se desalojan modelos inactivos (LRU)
+
+    # Precarga al iniciar
+    # "tts" precarga todos los modelos del registro TTS; "tts_<clave>" solo uno. Lo que se
+    # precarga también se calienta antes de que /health/ready responda 200
+    preload_models: List[str] = ["whisper", "translation", "tts"]
+    # Con "translation" en preload_models también se precargan (y calientan) los checkpoints
+    # de translation_routes (sin efecto con la tabla vacía)
+    preload_translation_routes: bool = True
+    preload_mode: str = "parallel"  # "parallel" (hilos), "sequential" o "none" (carga bajo demanda)
+    preload_max_workers: int = 4
+
+    # Calentamiento (una inferencia sintética por modelo antes de declararse listo)
+    warmup_enabled: bool = True
+    warmup_audio_path: str = "audios/audioMio.ogg"
+    warmup_audio_seconds: float = 3.0
+    warmup_reference_audio_path: str = "audios/audioStefano.wav"
+    warmup_reference_text: str = "Mientras más corto es el audio, el modelo es mejor."
+
+    # Métricas Prometheus (core/metrics.py). Con workers > 1 se comparten por archivos en este directorio
+    metrics_multiproc_dir: str = "/tmp/myvoice-metrics"
+    metrics_refresh_seconds: float = 5.0  # Cada cuánto publica cada worker el estado de su gestor de modelos
+
+    # Logging estructurado, asíncrono y por niveles (core/log.py)
+    log_level: str = "INFO"  # Los textos de los usuarios solo se registran en DEBUG
+    log_format: str = "json"  # "json" (una línea por evento) o "text"
+
+    # Trazas por petición (core/tracing.py)
+    tracing_exporter: str = "none"  # "none", "otlp" (collector por HTTP) o "file" (OTLP JSON, una línea por lote)
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file: str = "logs/traces.jsonl"
+    tracing_service_name: str = "myvoice-ai-service"
+
+    # Perfilado por petición con X-Profile: 1 + X-Admin-Token (core/profiling.py)
+    profile_dir: str = "profiles"
+    profile_sample_interval_ms: float = 5.0  # Intervalo del muestreo de pilas de Python
+    profile_torch: bool = True  # Además, torch.profiler en cada llamada a los pools de modelos
+
+    # Administración (recarga de modelos, etc.). Vacío = endpoints /admin deshabilitados
+    admin_token: str = ""
 
     class Config:
         env_file = ".env"
-        
-settings = Settings()
\ No newline at end of file
+
+    @model_validator(mode="after")
+    def _load_tts_registry(self):
+        # El archivo solo aplica si tts_models no vino explícito (variable de entorno,
+        # .env o una recarga desde /admin que ya trae el registro en uso)
+        registry_path = Path(self.tts_registry_file)
+        if "tts_models" not in self.model_fields_set and registry_path.exists():
+            registry = json.loads(registry_path.read_text(encoding="utf-8"))
+            self.tts_models = {
+                key: TTSModelSettings(**config) for key, config in registry.get("models", {}).items()
+            }
+            if "tts_default_model" not in self.model_fields_set:
+                self.tts_default_model = registry.get("default_model", self.tts_default_model)
+
+        if self.tts_default_model not in self.tts_models:
+            raise ValueError(f"tts_default_model '{self.tts_default_model}' no está en el registro de modelos TTS "
+                             f"({registry_path}): {list(self.tts_models)}")
+
+        # Variables anteriores al registro: se aplican al modelo del español y al predeterminado
+        spanish_model = next((key for key, config in self.tts_models.items() if "es" in config.languages), None)
+        for legacy_name, model_type in (("f5_tts_ckpt_file", self.tts_default_model),
+                                        ("f5_tts_ckpt_file_es", spanish_model)):
+            ckpt_file = getattr(self, legacy_name)
+            if not ckpt_file:
+                continue
+            if model_type is None:
+                raise ValueError(f"{legacy_name} está definido pero ningún modelo TTS del registro atiende 'es'")
+            config = self.tts_models[model_type]
+            if config.ckpt_file and config.ckpt_file != ckpt_file:
+                raise ValueError(f"{legacy_name}={ckpt_file} contradice ckpt_file={config.ckpt_file} del modelo "
+                                 f"'{model_type}' del registro: definir el checkpoint solo en el registro")
+            self.tts_models = {**self.tts_models, model_type: config.model_copy(update={"ckpt_file": ckpt_file})}
+        return self
+
+settings = Settings()
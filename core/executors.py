@@ -0,0 +1,156 @@
+"""
+Ejecutores por modelo con hilos de torch y afinidad de CPU propios.
+
+Whisper, M2M100 y F5TTS comparten por defecto el mismo pool intra-op de torch: si
+corren a la vez en CPU cada uno lanza tantos hilos como núcleos y se pisan entre sí.
+Cada modelo tiene acá su propio ThreadPoolExecutor configurado desde
+Settings.model_pools; al iniciar cada hilo se fija:
+
+- intra_op_threads con torch.set_num_threads,
+- cpu_affinity con os.sched_setaffinity (en Linux es por hilo y la heredan los
+  hilos de OpenMP que torch crea desde él).
+
+Limitación: torch.set_num_threads solo queda aislado por hilo con el backend OpenMP
+de GNU (omp_set_num_threads rige para el hilo que lo llama). También llama a
+mkl_set_num_threads y fija el pthreadpool de XNNPACK/QNNPACK, que son globales del
+proceso: con esos backends (o con el backend TBB) gana el último pool que se
+configuró, así que intra_op_threads conviene dejarlo igual en todos los pools y
+repartir la CPU con cpu_affinity, que sí es por hilo.
+
+inter_op_threads es global del proceso y solo se puede fijar una vez, antes de la
+primera operación en paralelo: se aplica el mayor valor configurado.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from core.config import ModelPoolSettings, settings
+from core.metrics import executor_queued, executor_started
+from core.profiling import current_profile
+
+logger = logging.getLogger(__name__)
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+_interop_configured = False
+
+
+def pool_name_for(model_name: str) -> str:
+    """Pool de un modelo del gestor: el nombre exacto o su prefijo ('tts_spanish' → 'tts')"""
+    if model_name in settings.model_pools:
+        return model_name
+    return model_name.split("_", 1)[0]
+
+
+def get_pool_settings(model_name: str) -> ModelPoolSettings:
+    return settings.model_pools.get(pool_name_for(model_name)) or ModelPoolSettings()
+
+
+def resolve_device(model_name: str, default: str = "auto") -> str:
+    """Dispositivo configurado para el modelo ('auto' si no hay pool)"""
+    device = get_pool_settings(model_name).device
+    return device if device != "auto" else default
+
+
+def _configure_interop_threads():
+    global _interop_configured
+    if _interop_configured:
+        return
+    _interop_configured = True
+
+    interop_threads = max((pool.inter_op_threads for pool in settings.model_pools.values()), default=0)
+    if not interop_threads:
+        return
+    try:
+        import torch
+        torch.set_num_interop_threads(interop_threads)
+    except (ImportError, RuntimeError) as e:
+        # RuntimeError si torch ya ejecutó trabajo inter-op en este proceso
+        logger.warning("No se pudieron fijar %d hilos inter-op: %s", interop_threads, e)
+
+
+def configure_current_thread(pool: ModelPoolSettings, pool_name: str = ""):
+    """
+    Aplica la afinidad de CPU del pool al hilo actual y fija los hilos intra-op (por hilo
+    solo con OpenMP; en MKL y pthreadpool el valor es global, ver el docstring del módulo)
+    """
+    if pool.cpu_affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, pool.cpu_affinity)
+        except OSError as e:
+            logger.warning("Afinidad de CPU inválida: %s", e, extra={"pool": pool_name, "cpu_affinity": pool.cpu_affinity})
+
+    intra_op_threads = pool.intra_op_threads
+    if not intra_op_threads and pool.cpu_affinity:
+        # Sin valor explícito, un hilo de torch por núcleo asignado
+        intra_op_threads = len(pool.cpu_affinity)
+    if intra_op_threads:
+        try:
+            import torch
+            torch.set_num_threads(intra_op_threads)
+        except ImportError:
+            pass
+
+
+def get_executor(model_name: str) -> ThreadPoolExecutor:
+    """Ejecutor del pool del modelo (se crea la primera vez que se pide)"""
+    pool_name = pool_name_for(model_name)
+    with _executors_lock:
+        if pool_name not in _executors:
+            _configure_interop_threads()
+            pool = get_pool_settings(model_name)
+            _executors[pool_name] = ThreadPoolExecutor(
+                max_workers=max(pool.max_concurrency, 1),
+                thread_name_prefix=f"pool-{pool_name}",
+                initializer=configure_current_thread,
+                initargs=(pool, pool_name)
+            )
+        return _executors[pool_name]
+
+
+def run_on_pool(model_name: str, fn: Callable, *args, **kwargs):
+    """
+    Ejecuta fn en el pool del modelo y espera el resultado. El contexto (contextvars)
+    del hilo que llama se propaga al hilo del pool. Se mide la profundidad de la cola
+    y la espera hasta tomar un hilo (core/metrics.py). Si la petición se está perfilando
+    la llamada corre bajo torch.profiler (core/profiling.py).
+
+    Bloquea hasta el resultado: no se debe llamar desde el event loop (los endpoints que
+    la usan son def o pasan por run_in_threadpool), si no los pools se turnan en un solo
+    hilo y el reparto de núcleos entre modelos no llega a usarse.
+    """
+    pool_name = pool_name_for(model_name)
+    context = contextvars.copy_context()
+    queued_at = time.perf_counter()
+
+    def run():
+        executor_started(pool_name, time.perf_counter() - queued_at)
+        session = current_profile()
+        if session is not None:
+            return session.run(pool_name, fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    executor_queued(pool_name)
+    future = get_executor(model_name).submit(context.run, run)
+    return future.result()
+
+
+def shutdown_executors(pool_names: Optional[list] = None):
+    """Cierra los ejecutores (todos o los indicados); se recrean con la configuración actual al volver a usarse"""
+    with _executors_lock:
+        for pool_name in list(pool_names or _executors):
+            executor = _executors.pop(pool_name, None)
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+
+def executors_report() -> dict:
+    """Configuración efectiva de cada pool (para /models/metrics)"""
+    return {
+        pool_name: {**pool.model_dump(), "active": pool_name in _executors}
+        for pool_name, pool in settings.model_pools.items()
+    }
@@ -0,0 +1,95 @@
+"""
+Logging estructurado, asíncrono y por niveles.
+
+Los servicios usan loggers estándar (logging.getLogger(__name__)) con datos en
+extra={...}. El handler del proceso es un QueueHandler: quien registra solo encola
+el evento y un hilo aparte (QueueListener) lo formatea y escribe, así la
+escritura a stdout no bloquea las peticiones.
+
+Cada evento lleva el id de la petición y el trace_id/span_id activos (core/tracing.py)
+para correlacionarlo con su traza. Los textos de los usuarios solo se registran en DEBUG.
+"""
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from core.config import settings
+
+LOG_FORMATS = ("json", "text")
+
+# Atributos propios de LogRecord: el resto son los campos pasados en extra
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_listener_pid = None
+
+
+class _ContextFilter(logging.Filter):
+    """Agrega request_id, trace_id y span_id en el hilo que registra (antes de encolar)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        from core.tracing import current_trace_ids, get_request_id
+
+        record.request_id = get_request_id()
+        record.trace_id, record.span_id = current_trace_ids()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea con nivel, logger, mensaje, contexto de la petición y extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                event[key] = value
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+def setup_logging():
+    """
+    Configura el logger raíz una sola vez por proceso. Tras el fork de gunicorn el hilo
+    de escritura no existe en el worker: llamarla de nuevo (post_fork) lo vuelve a crear
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+    if settings.log_format not in LOG_FORMATS:
+        raise ValueError(f"Formato de log desconocido: {settings.log_format}. Opciones: {list(LOG_FORMATS)}")
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    handler = QueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
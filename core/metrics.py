@@ -0,0 +1,204 @@
+"""
+Métricas Prometheus del servicio (GET /metrics) y encabezado Server-Timing.
+
+- myvoice_stage_seconds: histograma por etapa (decode, transcribe, translate,
+  reference, synthesize) y modelo, para alertar por p99 de cada etapa.
+- myvoice_audio_seconds_total y myvoice_real_time_factor: segundos de audio
+  procesados y tiempo de cómputo / duración del audio por etapa.
+- myvoice_executor_queue_depth / myvoice_executor_wait_seconds: trabajos esperando
+  un hilo de cada pool (core/executors.py) y cuánto esperan.
+- myvoice_cache_requests_total y myvoice_cache_hit_ratio: aciertos por caché
+  (modelos residentes, referencias recortadas, pesos convertidos en disco).
+- Residencia de modelos, memoria por modelo y RSS del proceso se toman del gestor
+  de modelos al momento del scrape.
+
+Cada etapa registrada durante una petición se agrega también a su encabezado
+Server-Timing (ver el middleware de main.py).
+
+Con varios workers de gunicorn (Settings.workers > 1) gunicorn_conf.py fija
+PROMETHEUS_MULTIPROC_DIR antes de importar prometheus_client: cada worker escribe sus
+valores en archivos de ese directorio y /metrics los agrega con MultiProcessCollector,
+así cualquier worker que atienda el scrape devuelve los totales de todos. Los valores
+del gestor de modelos (residencia, memoria, RSS) son gauges que cada worker actualiza
+periódicamente (start_metrics_refresher) y se suman entre los workers vivos.
+"""
+import contextvars
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Fijado por gunicorn_conf.py en modo multi-worker, antes de importar prometheus_client
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "myvoice_stage_seconds", "Duración de cada etapa del pipeline", ["stage", "model"], buckets=STAGE_BUCKETS
+)
+AUDIO_SECONDS = Counter("myvoice_audio_seconds_total", "Segundos de audio procesados por etapa", ["stage"])
+REAL_TIME_FACTOR = Histogram(
+    "myvoice_real_time_factor", "Tiempo de cómputo / duración del audio", ["stage", "model"], buckets=RTF_BUCKETS
+)
+EXECUTOR_QUEUE_DEPTH = Gauge("myvoice_executor_queue_depth", "Trabajos esperando un hilo del pool", ["pool"],
+                             multiprocess_mode="livesum")
+EXECUTOR_WAIT_SECONDS = Histogram(
+    "myvoice_executor_wait_seconds", "Espera de un trabajo hasta tomar un hilo del pool", ["pool"], buckets=WAIT_BUCKETS
+)
+CACHE_REQUESTS = Counter("myvoice_cache_requests_total", "Consultas a cachés por resultado", ["cache", "result"])
+
+# Estado del gestor de modelos de cada worker; con varios workers se suman los de los vivos
+MODEL_RESIDENT = Gauge("myvoice_model_resident", "Workers con el modelo cargado", ["model", "device"],
+                       multiprocess_mode="livesum")
+MODEL_FOOTPRINT = Gauge("myvoice_model_footprint_bytes", "Memoria del modelo (suma de los workers)", ["model", "device"],
+                        multiprocess_mode="livesum")
+MODEL_IN_USE = Gauge("myvoice_model_in_use", "Peticiones en curso sobre el modelo", ["model", "device"],
+                     multiprocess_mode="livesum")
+# "sum" conserva el último valor de los workers que terminaron
+MODEL_LOADS = Gauge("myvoice_model_loads", "Cargas del modelo (suma de los workers)", ["model", "device"],
+                    multiprocess_mode="sum")
+MODEL_EVICTIONS = Gauge("myvoice_model_evictions", "Desalojos del modelo (suma de los workers)", ["model", "device"],
+                        multiprocess_mode="sum")
+PROCESS_RSS = Gauge("myvoice_process_rss_bytes", "Memoria residente (suma de los workers)", multiprocess_mode="livesum")
+TTS_BATCH_QUEUE_DEPTH = Gauge("myvoice_tts_batch_queue_depth", "Síntesis encoladas en el planificador en lote",
+                              ["model"], multiprocess_mode="livesum")
+
+# Etapas de la petición en curso para Server-Timing: (etapa, modelo, segundos)
+_request_timings: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def observe_stage(stage: str, model: str, seconds: float, audio_seconds: Optional[float] = None):
+    """
+    Registra la duración de una etapa
+
+    Args:
+        stage: Etapa del pipeline ('decode', 'transcribe', 'translate', 'reference', 'synthesize')
+        model: Modelo que la ejecutó
+        seconds: Duración en segundos
+        audio_seconds: Duración del audio procesado (entrada) o generado (síntesis), para el RTF
+    """
+    model = model or "none"
+    STAGE_SECONDS.labels(stage, model).observe(seconds)
+    if audio_seconds:
+        AUDIO_SECONDS.labels(stage).inc(audio_seconds)
+        REAL_TIME_FACTOR.labels(stage, model).observe(seconds / audio_seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, model, seconds))
+
+
+def record_cache(cache: str, hit: bool):
+    """Cuenta una consulta a una caché ('model', 'reference', 'translation_weights', ...)"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def executor_queued(pool: str):
+    EXECUTOR_QUEUE_DEPTH.labels(pool).inc()
+
+
+def executor_started(pool: str, waited_seconds: float):
+    EXECUTOR_QUEUE_DEPTH.labels(pool).dec()
+    EXECUTOR_WAIT_SECONDS.labels(pool).observe(waited_seconds)
+
+
+def start_request_timing() -> List[tuple]:
+    """
+    Empieza a juntar las etapas de la petición actual. La lista es compartida: los
+    hilos de los pools reciben una copia del contexto y agregan sus etapas a la misma
+    """
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def format_server_timing(timings: List[tuple], total_seconds: float) -> str:
+    """Encabezado Server-Timing: una entrada por etapa (en ms) más el total"""
+    entries = [f'{stage};dur={seconds * 1000:.1f};desc="{model}"' for stage, model, seconds in timings]
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def refresh_service_metrics():
+    """Vuelca el estado del gestor de modelos de este proceso en los gauges"""
+    from core.model_manager import model_manager
+    from core.resources import current_rss_bytes
+    from services.tts_batching import batching_report
+
+    for entry in model_manager.status():
+        labels = (entry["name"], str(entry["device"]))
+        MODEL_RESIDENT.labels(*labels).set(1.0 if entry["state"] == "ready" else 0.0)
+        # Los modelos registrados que nunca se cargaron no tienen contabilidad
+        MODEL_FOOTPRINT.labels(*labels).set(entry.get("footprint_mb", 0) * 1024 ** 2)
+        MODEL_IN_USE.labels(*labels).set(entry.get("in_use", 0))
+        MODEL_LOADS.labels(*labels).set(entry.get("load_count", 0))
+        MODEL_EVICTIONS.labels(*labels).set(entry.get("evict_count", 0))
+    PROCESS_RSS.set(current_rss_bytes())
+    for model_key, report in batching_report().items():
+        TTS_BATCH_QUEUE_DEPTH.labels(model_key).set(report["queued"])
+
+
+def start_metrics_refresher(interval: float):
+    """
+    Actualiza los gauges del gestor cada interval segundos en un hilo. Con varios workers
+    el scrape lo atiende uno solo: los demás tienen que publicar su estado por su cuenta
+    """
+    def refresh_forever():
+        while True:
+            try:
+                refresh_service_metrics()
+            except Exception as e:
+                logger.warning("No se pudieron actualizar las métricas del gestor: %s", e)
+            stop.wait(interval)
+
+    stop = threading.Event()
+    threading.Thread(target=refresh_forever, name="metrics-refresh", daemon=True).start()
+
+
+class _CacheHitRatioCollector:
+    """Proporción de aciertos por caché, calculada al momento del scrape a partir de myvoice_cache_requests"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        counts = {}
+        for family in self.source.collect():
+            if family.name != "myvoice_cache_requests":
+                continue
+            for sample in family.samples:
+                if sample.name.endswith("_total"):
+                    hits, total = counts.get(sample.labels["cache"], (0.0, 0.0))
+                    is_hit = sample.labels["result"] == "hit"
+                    counts[sample.labels["cache"]] = (hits + sample.value * is_hit, total + sample.value)
+        hit_ratio = GaugeMetricFamily("myvoice_cache_hit_ratio", "Aciertos / consultas por caché", labels=["cache"])
+        for cache, (hits, total) in counts.items():
+            hit_ratio.add_metric([cache], hits / total if total else 0.0)
+        yield hit_ratio
+
+
+def render_metrics() -> bytes:
+    """Exposición en formato Prometheus: del proceso o, con varios workers, agregada entre todos"""
+    refresh_service_metrics()
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+
+    from prometheus_client.multiprocess import MultiProcessCollector
+
+    registry = CollectorRegistry()
+    aggregated = MultiProcessCollector(registry)
+    registry.register(_CacheHitRatioCollector(aggregated))
+    return generate_latest(registry)
+
+
+if not MULTIPROCESS:
+    REGISTRY.register(_CacheHitRatioCollector(CACHE_REQUESTS))
@@ -0,0 +1,411 @@
+"""
+Gestor único de modelos de IA.
+
+Reemplaza los singletons a nivel de módulo de cada servicio: cada modelo se registra
+con un nombre y una función de carga, y el gestor garantiza que haya una sola
+instancia por (modelo, dispositivo) aunque lleguen varias peticiones concurrentes
+antes de que termine la primera carga.
+
+También controla la residencia en memoria: con un presupuesto de RAM configurado
+(Settings.model_memory_budget_mb) descarga el modelo inactivo usado hace más tiempo
+(LRU) cuando hace falta lugar, y lo vuelve a cargar cuando se lo vuelve a pedir.
+
+Las recargas (reload) no cortan el servicio: la nueva versión se carga y calienta
+aparte, el handle se reemplaza de forma atómica y la versión anterior se libera
+recién cuando terminan las peticiones que la estaban usando.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.config import settings
+from core.executors import resolve_device
+from core.metrics import record_cache
+from core.resources import current_rss_bytes, module_footprint_bytes, release_memory
+
+logger = logging.getLogger(__name__)
+
+
+class ModelState(str, Enum):
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ModelEntry:
+    """Estado de un modelo concreto (nombre + dispositivo) dentro del gestor"""
+
+    def __init__(self, name: str, device: str, loader: Callable[[str], Any]):
+        self.name = name
+        self.device = device
+        self.loader = loader
+        self.state = ModelState.UNLOADED
+        self.handle = None
+        self.error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        # Serializa las cargas de este modelo sin bloquear a los demás
+        self.lock = threading.Lock()
+
+        # Residencia en memoria
+        self.footprint_bytes = 0
+        self.last_used = 0.0
+        # Peticiones en curso por handle (id del objeto): el actual y los que se están drenando
+        self.leases: Dict[int, int] = {}
+        self.load_count = 0
+        self.evict_count = 0
+        self.resident_seconds = 0.0  # Acumulado de cargas anteriores
+
+        # Recarga en caliente
+        self.generation = 0
+        self.reload_state = "idle"  # idle → loading → warming → draining → idle | failed
+        self.reload_error: Optional[str] = None
+        self.reload_lock = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        """Peticiones en curso sobre el handle actual"""
+        return self.leases.get(id(self.handle), 0) if self.handle is not None else 0
+
+    def residency_seconds(self) -> float:
+        current = time.time() - self.loaded_at if self.state == ModelState.READY and self.loaded_at else 0.0
+        return self.resident_seconds + current
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "device": self.device,
+            "state": self.state.value,
+            "error": self.error,
+            "load_time": round(self.load_time, 2) if self.load_time is not None else None,
+            "loaded_at": self.loaded_at,
+            "footprint_mb": round(self.footprint_bytes / 1024 ** 2, 1),
+            "in_use": self.in_use,
+            "last_used": self.last_used or None,
+            "load_count": self.load_count,
+            "evict_count": self.evict_count,
+            "residency_seconds": round(self.residency_seconds(), 1),
+            "generation": self.generation,
+            "reload_state": self.reload_state,
+            "reload_error": self.reload_error
+        }
+
+
+class ModelManager:
+    """
+    Dueño de todos los handles de modelos. Los servicios registran sus cargadores
+    al importarse y piden el modelo con get() o lease(); la carga es perezosa y con lock.
+    """
+
+    def __init__(self, memory_budget_bytes: int = 0, max_events: int = 200):
+        self._loaders: Dict[str, Tuple[Callable[[str], Any], Optional[str]]] = {}
+        self._entries: Dict[Tuple[str, str], ModelEntry] = {}
+        # Protege el registro y la contabilidad (in_use, last_used, desalojos)
+        self._lock = threading.RLock()
+        # Se notifica cada vez que termina un lease (para drenar handles reemplazados)
+        self._lease_released = threading.Condition(self._lock)
+        self.memory_budget_bytes = memory_budget_bytes
+        self._events = deque(maxlen=max_events)
+
+    def register(self, name: str, loader: Callable[[str], Any], device: Optional[str] = None):
+        """
+        Registra la función de carga de un modelo (no lo carga)
+
+        Args:
+            name: Nombre del modelo ('whisper', 'translation', 'tts_spanish', ...)
+            loader: Función que recibe el dispositivo y devuelve el handle del modelo
+            device: Dispositivo por defecto del modelo ('auto', 'cpu', 'cuda').
+                None usa el configurado en Settings.model_pools
+        """
+        with self._lock:
+            self._loaders[name] = (loader, device)
+
+    def registered_models(self) -> list:
+        with self._lock:
+            return list(self._loaders)
+
+    def _get_entry(self, name: str, device: Optional[str]) -> ModelEntry:
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Modelo no registrado: {name}")
+            loader, default_device = self._loaders[name]
+            device = device or default_device or resolve_device(name)
+            key = (name, device)
+            if key not in self._entries:
+                self._entries[key] = ModelEntry(name, device, loader)
+            return self._entries[key]
+
+    def get(self, name: str, device: Optional[str] = None, force_load: bool = False):
+        """
+        Devuelve el handle del modelo, cargándolo si hace falta.
+        Si varias peticiones llegan a la vez, solo la primera carga y el resto espera.
+
+        Args:
+            name: Nombre registrado del modelo
+            device: Dispositivo (None usa el registrado)
+            force_load: Forzar recarga aunque el modelo ya esté listo
+        """
+        entry = self._get_entry(name, device)
+
+        # Camino rápido sin lock: el modelo ya está listo
+        if entry.state == ModelState.READY and not force_load:
+            entry.last_used = time.time()
+            record_cache("model", True)
+            return entry.handle
+
+        # Recargar un modelo en servicio es un reemplazo en caliente: las peticiones
+        # en curso terminan con la versión anterior
+        if force_load and entry.state == ModelState.READY:
+            return self.reload(name, device)
+
+        with entry.lock:
+            # Otro hilo pudo haberlo cargado mientras esperábamos el lock
+            if entry.state == ModelState.READY:
+                entry.last_used = time.time()
+                record_cache("model", True)
+                return entry.handle
+
+            record_cache("model", False)
+
+            # Si ya conocemos su tamaño (carga anterior), liberamos lugar antes de cargar
+            self._enforce_budget(exclude=entry, incoming_bytes=entry.footprint_bytes)
+
+            entry.state = ModelState.LOADING
+            entry.error = None
+            start_time = time.time()
+            rss_before = current_rss_bytes()
+            try:
+                handle = entry.loader(entry.device)
+            except Exception as e:
+                entry.state = ModelState.FAILED
+                entry.error = str(e)
+                raise
+
+            # Bytes de tensores si es un modelo torch; si no, el crecimiento de RSS
+            footprint = module_footprint_bytes(handle) or max(current_rss_bytes() - rss_before, 0)
+
+            with self._lock:
+                entry.handle = handle
+                entry.footprint_bytes = footprint
+                entry.load_time = time.time() - start_time
+                entry.loaded_at = entry.last_used = time.time()
+                entry.load_count += 1
+                entry.state = ModelState.READY
+                self._record_event("load", entry)
+
+            self._enforce_budget(exclude=entry)
+            return handle
+
+    @contextmanager
+    def lease(self, name: str, device: Optional[str] = None):
+        """
+        Igual que get(), pero marca el modelo como en uso mientras dure el bloque
+        para que no sea desalojado a mitad de una inferencia.
+
+            with model_manager.lease("whisper") as whisper_model:
+                whisper_model.transcribe(...)
+        """
+        entry = self._get_entry(name, device)
+        while True:
+            handle = self.get(name, device)
+            with self._lock:
+                # Puede haber sido desalojado entre get() y este punto: reintentar
+                if entry.state == ModelState.READY and entry.handle is handle:
+                    entry.leases[id(handle)] = entry.leases.get(id(handle), 0) + 1
+                    break
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                remaining = entry.leases[id(handle)] - 1
+                if remaining:
+                    entry.leases[id(handle)] = remaining
+                else:
+                    del entry.leases[id(handle)]
+                entry.last_used = time.time()
+                self._lease_released.notify_all()
+
+    def try_begin_reload(self, name: str, device: Optional[str] = None) -> bool:
+        """
+        Toma el candado de recarga del modelo (False si ya hay una en curso). Quien lo
+        toma lo entrega a reload(..., lock_acquired=True) o lo devuelve con cancel_reload()
+        """
+        return self._get_entry(name, device).reload_lock.acquire(blocking=False)
+
+    def cancel_reload(self, name: str, device: Optional[str] = None):
+        """Devuelve el candado tomado con try_begin_reload() sin recargar"""
+        self._get_entry(name, device).reload_lock.release()
+
+    def reload(self, name: str, device: Optional[str] = None, warmup: Optional[Callable[[Any], None]] = None,
+               drain_timeout: float = 600.0, lock_acquired: bool = False):
+        """
+        Recarga un modelo sin dejar de atender peticiones:
+        1. carga la nueva versión aparte (el handle actual sigue en servicio),
+        2. la calienta con warmup(handle) si se indica,
+        3. reemplaza el handle de forma atómica,
+        4. espera a que terminen las peticiones que usaban la versión anterior y la libera.
+
+        Args:
+            lock_acquired: El candado de recarga ya se tomó con try_begin_reload(); se libera al terminar
+
+        Returns:
+            El nuevo handle
+        """
+        entry = self._get_entry(name, device)
+        if not lock_acquired and not entry.reload_lock.acquire(blocking=False):
+            raise RuntimeError(f"Ya hay una recarga en curso para el modelo {name}")
+
+        try:
+            entry.reload_error = None
+            entry.reload_state = "loading"
+
+            # Si no está en servicio no hay nada que reemplazar: carga normal
+            if entry.state != ModelState.READY:
+                handle = self.get(name, device)
+                if warmup is not None:
+                    entry.reload_state = "warming"
+                    warmup(handle)
+                entry.reload_state = "idle"
+                return handle
+
+            # Durante la recarga conviven dos versiones: se hace lugar para la nueva
+            self._enforce_budget(exclude=entry, incoming_bytes=entry.footprint_bytes)
+
+            start_time = time.time()
+            rss_before = current_rss_bytes()
+            new_handle = entry.loader(entry.device)
+            footprint = module_footprint_bytes(new_handle) or max(current_rss_bytes() - rss_before, 0)
+            load_time = time.time() - start_time
+
+            if warmup is not None:
+                entry.reload_state = "warming"
+                warmup(new_handle)
+
+            with self._lock:
+                old_handle = entry.handle
+                if old_handle is not None and entry.loaded_at:
+                    entry.resident_seconds += time.time() - entry.loaded_at
+                entry.handle = new_handle
+                entry.footprint_bytes = footprint
+                entry.load_time = load_time
+                entry.loaded_at = entry.last_used = time.time()
+                entry.load_count += 1
+                entry.generation += 1
+                entry.state = ModelState.READY
+                entry.error = None
+                self._record_event("reload", entry)
+
+                # Drenar: esperar a que terminen las peticiones sobre la versión anterior
+                entry.reload_state = "draining"
+                if old_handle is not None:
+                    drained = self._lease_released.wait_for(
+                        lambda: entry.leases.get(id(old_handle), 0) == 0, timeout=drain_timeout
+                    )
+                    if not drained:
+                        logger.warning("La versión anterior sigue en uso tras %ss; se libera cuando terminen sus peticiones",
+                                       drain_timeout, extra={"model": name})
+
+            del old_handle
+            release_memory()
+            entry.reload_state = "idle"
+            logger.info("Modelo recargado", extra={"model": name, "generation": entry.generation, "seconds": round(load_time, 2)})
+            return new_handle
+        except Exception as e:
+            entry.reload_state = "failed"
+            entry.reload_error = str(e)
+            logger.error("Error recargando el modelo: %s", e, extra={"model": name})
+            raise
+        finally:
+            entry.reload_lock.release()
+
+    def _resident_bytes(self) -> int:
+        return sum(e.footprint_bytes for e in self._entries.values() if e.state == ModelState.READY)
+
+    def _enforce_budget(self, exclude: ModelEntry, incoming_bytes: int = 0):
+        """Desaloja modelos inactivos (LRU) hasta que lo residente entre en el presupuesto"""
+        if not self.memory_budget_bytes:
+            return
+
+        evicted = False
+        with self._lock:
+            while self._resident_bytes() + incoming_bytes > self.memory_budget_bytes:
+                candidates = [
+                    e for e in self._entries.values()
+                    if e is not exclude and e.state == ModelState.READY and e.in_use == 0
+                ]
+                if not candidates:
+                    logger.warning("Presupuesto de memoria excedido y no hay modelos inactivos para desalojar")
+                    break
+                self._evict(min(candidates, key=lambda e: e.last_used))
+                evicted = True
+
+        if evicted:
+            release_memory()
+
+    def _evict(self, entry: ModelEntry):
+        logger.info("Desalojando modelo inactivo", extra={"model": entry.name, "footprint_mb": round(entry.footprint_bytes / 1024 ** 2)})
+        entry.resident_seconds += time.time() - entry.loaded_at
+        entry.handle = None
+        entry.state = ModelState.UNLOADED
+        entry.evict_count += 1
+        self._record_event("evict", entry)
+
+    def _record_event(self, event: str, entry: ModelEntry):
+        self._events.append({
+            "event": event,
+            "model": entry.name,
+            "device": entry.device,
+            "time": time.time(),
+            "footprint_mb": round(entry.footprint_bytes / 1024 ** 2, 1)
+        })
+
+    def is_reloading(self, name: str, device: Optional[str] = None) -> bool:
+        return self._get_entry(name, device).reload_lock.locked()
+
+    def generation(self, name: str, device: Optional[str] = None) -> int:
+        """Cantidad de recargas en caliente completadas del modelo"""
+        return self._get_entry(name, device).generation
+
+    def is_ready(self, name: str, device: Optional[str] = None) -> bool:
+        return self._get_entry(name, device).state == ModelState.READY
+
+    def unload(self, name: str, device: Optional[str] = None):
+        """Libera el handle del modelo; se volverá a cargar en el próximo get()"""
+        entry = self._get_entry(name, device)
+        with entry.lock, self._lock:
+            if entry.state == ModelState.READY:
+                self._evict(entry)
+        release_memory()
+
+    def status(self) -> list:
+        """Estado de todos los modelos registrados (incluye los aún no cargados)"""
+        with self._lock:
+            entries = list(self._entries.values())
+            loaded_names = {entry.name for entry in entries}
+            pending = [
+                {"name": name, "device": device or resolve_device(name), "state": ModelState.UNLOADED.value}
+                for name, (_, device) in self._loaders.items()
+                if name not in loaded_names
+            ]
+            return [entry.to_dict() for entry in entries] + pending
+
+    def metrics(self) -> dict:
+        """Métricas de residencia: memoria usada vs presupuesto, cargas, desalojos y eventos recientes"""
+        with self._lock:
+            return {
+                "memory_budget_mb": round(self.memory_budget_bytes / 1024 ** 2, 1),
+                "resident_mb": round(self._resident_bytes() / 1024 ** 2, 1),
+                "process_rss_mb": round(current_rss_bytes() / 1024 ** 2, 1),
+                "loads_total": sum(e.load_count for e in self._entries.values()),
+                "evictions_total": sum(e.evict_count for e in self._entries.values()),
+                "models": [entry.to_dict() for entry in self._entries.values()],
+                "events": list(self._events)
+            }
+
+
+model_manager = ModelManager(memory_budget_bytes=settings.model_memory_budget_mb * 1024 ** 2)
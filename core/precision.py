@@ -0,0 +1,110 @@
+"""
+Precisión de inferencia por modelo en CPU: fp32 o bf16 (torch.autocast).
+
+Con bf16 las multiplicaciones de matrices y convoluciones de los módulos calientes
+(encoder/decoder de Whisper y M2M100, transformer de difusión de F5TTS) se ejecutan en
+bfloat16, con la mitad de ancho de banda de memoria, manteniendo los pesos en fp32.
+Las salidas de esos módulos se devuelven en fp32, así el resto del pipeline (softmax
+del decoder, vocoder, conversión a numpy) no cambia.
+
+Solo vale la pena en CPUs con soporte nativo (AVX512-BF16 / AMX en x86, BF16 en
+ARMv8.6+): en el resto se emula y es más lento, así que se vuelve a fp32 automáticamente.
+La precisión se configura por modelo en Settings.model_pools[...].precision.
+"""
+import functools
+import logging
+from functools import lru_cache
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "bf16")
+
+# Flags de /proc/cpuinfo que indican bf16 nativo
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16", "bf16")
+
+
+@lru_cache(maxsize=1)
+def cpu_supports_bf16() -> bool:
+    """True si la CPU tiene instrucciones bf16 nativas (Linux, /proc/cpuinfo)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags = set(line.split(":", 1)[1].split())
+                    return any(flag in flags for flag in BF16_CPU_FLAGS)
+    except OSError:
+        pass
+    return False
+
+
+def resolve_precision(requested: str, device: str, model_name: str = "") -> str:
+    """Precisión efectiva: bf16 solo en CPU con soporte nativo, si no fp32"""
+    if requested not in PRECISIONS:
+        raise ValueError(f"Precisión desconocida: {requested}. Opciones: {list(PRECISIONS)}")
+    if requested == "bf16" and str(device) != "cpu":
+        logger.warning("bf16 solo aplica en CPU, el modelo sigue en fp32", extra={"model": model_name, "device": str(device)})
+        return "fp32"
+    if requested == "bf16" and not cpu_supports_bf16():
+        logger.warning("La CPU no soporta bf16 de forma nativa, el modelo usa fp32", extra={"model": model_name})
+        return "fp32"
+    return requested
+
+
+def _outputs_to_float32(output):
+    import torch
+
+    if isinstance(output, torch.Tensor):
+        return output.float() if output.dtype == torch.bfloat16 else output
+    if isinstance(output, tuple):
+        values = [_outputs_to_float32(item) for item in output]
+        # namedtuple: se reconstruye con sus campos
+        return type(output)(*values) if hasattr(output, "_fields") else type(output)(values)
+    if isinstance(output, list):
+        return [_outputs_to_float32(item) for item in output]
+    if isinstance(output, dict):
+        # Incluye los ModelOutput de transformers (se actualizan en el lugar)
+        for key in list(output.keys()):
+            output[key] = _outputs_to_float32(output[key])
+        return output
+    return output
+
+
+def _wrap_forward_autocast(module, dtype):
+    original_forward = module.forward
+
+    @functools.wraps(original_forward)
+    def forward(*args, **kwargs):
+        import torch
+        with torch.autocast(device_type="cpu", dtype=dtype):
+            output = original_forward(*args, **kwargs)
+        return _outputs_to_float32(output)
+
+    module.forward = forward
+
+
+def apply_precision(model_name: str, root, module_paths: Iterable[str], requested: str, device: str) -> str:
+    """
+    Ejecuta los submódulos indicados de root bajo autocast bf16 si la precisión
+    efectiva lo permite. Se llama desde los cargadores, antes de compilar.
+
+    Returns:
+        La precisión efectiva ('fp32' o 'bf16')
+    """
+    precision = resolve_precision(requested, device, model_name)
+    if precision == "fp32":
+        return precision
+
+    import torch
+    from core.compile import resolve_module_path
+
+    wrapped = []
+    for path in module_paths:
+        parent, attr = resolve_module_path(root, path)
+        module = getattr(parent, attr)
+        if isinstance(module, torch.nn.Module):
+            _wrap_forward_autocast(module, torch.bfloat16)
+            wrapped.append(path)
+
+    logger.info("Módulos en bf16 (autocast)", extra={"model": model_name, "modules": wrapped})
+    return precision
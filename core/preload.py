@@ -1,46 +1,118 @@
 """
 Módulo para precarga de modelos de IA al iniciar la aplicación.
+
+Los modelos se cargan en paralelo en hilos (la lectura de pesos es mayormente E/S y
+la inicialización de torch libera el GIL), siempre a través del gestor de modelos,
+cuyos locks garantizan una sola carga por modelo. Al final se registra una línea de
+tiempo por modelo con duración, bytes leídos y crecimiento de memoria.
 """
+import logging
 import time
-import torch
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import settings
+from core.model_manager import model_manager
+from core.resources import current_rss_bytes, thread_io_counters
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODES = ("parallel", "sequential", "none")
+
+
+def _register_model_services():
+    """Importa los servicios para que registren sus cargadores en el gestor de modelos"""
+    import services.whisper_service  # noqa: F401
+    import services.translation_service  # noqa: F401
+    import services.tts_service  # noqa: F401
+
+
+def _load_with_timeline(name: str, origin: float) -> dict:
+    """Carga un modelo midiendo tiempos, bytes leídos por este hilo y delta de RSS"""
+    io_before = thread_io_counters()
+    rss_before = current_rss_bytes()
+    start = time.time()
+    entry = {"model": name, "start": round(start - origin, 2)}
+
+    try:
+        model_manager.get(name)
+        entry["status"] = "ready"
+        logger.info("Modelo cargado", extra={"model": name})
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = str(e)
+        logger.error("Error al cargar el modelo: %s", e, extra={"model": name})
+
+    end = time.time()
+    io_after = thread_io_counters()
+    entry.update({
+        "end": round(end - origin, 2),
+        "wall_time": round(end - start, 2),
+        # RSS es de todo el proceso: con carga en paralelo incluye a los otros modelos en curso
+        "rss_delta_mb": round((current_rss_bytes() - rss_before) / 1024 ** 2, 1)
+    })
+    if io_before and io_after:
+        entry["disk_read_mb"] = round((io_after["read_bytes"] - io_before["read_bytes"]) / 1024 ** 2, 1)
+        entry["bytes_read_mb"] = round((io_after["rchar"] - io_before["rchar"]) / 1024 ** 2, 1)
+    return entry
+
+
+def _log_timeline(timeline: list):
+    # Un evento por modelo: inicio, fin, duración, bytes leídos y crecimiento de memoria
+    for entry in timeline:
+        logger.info("Línea de tiempo de carga", extra={key: value for key, value in entry.items() if key != "error"})
 
-def preload_all_models():
+
+def preload_all_models(models: list = None, mode: str = None) -> dict:
     """
-    Precarga todos los modelos de IA (whisper, m2m100, f5tts) para evitar
+    Precarga los modelos de IA (whisper, m2m100, f5tts) para evitar
     la carga inicial lenta durante las primeras peticiones.
+
+    Args:
+        models: Nombres registrados a precargar (por defecto Settings.preload_models);
+            "tts" equivale a todos los modelos del registro TTS
+        mode: 'parallel', 'sequential' o 'none' (por defecto Settings.preload_mode)
+
+    Returns:
+        Reporte con la línea de tiempo por modelo y el tiempo total
     """
+    models = settings.preload_models if models is None else models
+    mode = mode or settings.preload_mode
+    if mode not in PRELOAD_MODES:
+        raise ValueError(f"Modo de precarga desconocido: {mode}. Opciones: {list(PRELOAD_MODES)}")
+
+    _register_model_services()
+    if "tts" in models:
+        from services.tts_service import get_tts_model_key
+        tts_keys = [get_tts_model_key(model_type) for model_type in settings.tts_models]
+        models = [name for name in models if name != "tts"] + [key for key in tts_keys if key not in models]
+    if settings.preload_translation_routes and "translation" in models:
+        from services.translation_service import translation_route_model_keys
+        models = list(models) + [key for key in translation_route_model_keys() if key not in models]
+    if mode == "none" or not models:
+        logger.info("Precarga de modelos deshabilitada: se cargarán bajo demanda")
+        return {"mode": mode, "models": [], "timeline": [], "total_time": 0.0}
+
     start_time = time.time()
-    print("Iniciando precarga de modelos...")
-    
-    # Precarga el modelo Whisper
-    print("Precargando modelo Whisper...")
-    try:
-        from services.whisper_service import load_whisper_model
-        whisper_model = load_whisper_model(force_load=True)
-        print(f"✅ Modelo Whisper cargado correctamente")
-    except Exception as e:
-        print(f"❌ Error al cargar el modelo Whisper: {str(e)}")
-    
-    # Precarga el modelo M2M100
-    print("Precargando modelo M2M100...")
-    try:
-        from services.translation_service import get_translation_model
-        m2m_model, m2m_tokenizer, device = get_translation_model(force_load=True)
-        print(f"✅ Modelo M2M100 cargado correctamente en {device}")
-    except Exception as e:
-        print(f"❌ Error al cargar el modelo M2M100: {str(e)}")
-    
-    # Precarga los modelos F5TTS
-    print("Precargando modelos F5TTS...")
-    try:
-        from services.tts_service import preload_all_models
-        preload_all_models()
-        print(f"✅ Modelos F5TTS cargados correctamente")
-    except Exception as e:
-        print(f"❌ Error al cargar los modelos F5TTS: {str(e)}")
-    
+    rss_before = current_rss_bytes()
+    logger.info("Iniciando precarga de modelos", extra={"mode": mode, "models": models})
+
+    if mode == "parallel":
+        with ThreadPoolExecutor(max_workers=settings.preload_max_workers, thread_name_prefix="preload") as executor:
+            futures = [executor.submit(_load_with_timeline, name, start_time) for name in models]
+            timeline = [future.result() for future in futures]
+    else:
+        timeline = [_load_with_timeline(name, start_time) for name in models]
+
     total_time = time.time() - start_time
-    print(f"✅ Precarga de todos los modelos completada en {total_time:.2f} segundos")
-    
-    # Devolver True para indicar que todos los modelos están precargados
-    return True
\ No newline at end of file
+    _log_timeline(timeline)
+    logger.info("Precarga de modelos completada", extra={
+        "seconds": round(total_time, 2), "rss_delta_mb": round((current_rss_bytes() - rss_before) / 1024 ** 2)
+    })
+
+    return {
+        "mode": mode,
+        "models": models,
+        "timeline": timeline,
+        "total_time": round(total_time, 2),
+        "rss_delta_mb": round((current_rss_bytes() - rss_before) / 1024 ** 2, 1)
+    }
@@ -0,0 +1,222 @@
+"""
+Perfilado opcional de una petición puntual.
+
+Con los headers X-Profile: 1 y un X-Admin-Token válido (ver main.py) la petición se
+ejecuta dentro de una sesión de perfilado que guarda en Settings.profile_dir/<id>:
+
+- python.speedscope.json: muestreo periódico de las pilas de Python de todos los
+  hilos (sys._current_frames), una vista por hilo activo. Se abre en speedscope.app.
+- torch-<n>-<pool>.json / .txt: torch.profiler alrededor de cada llamada de la
+  petición a los pools de modelos (run_on_pool), como Chrome trace (chrome://tracing
+  o Perfetto) y la tabla de operadores más costosos.
+- summary.json: resumen con la duración, los archivos y los segmentos de torch.
+
+El id vuelve en el header X-Profile-Id y los archivos se descargan desde
+/admin/profiles/<id>. Sin el header no se crea sesión y el único costo es leer una
+contextvar en run_on_pool.
+
+torch.profiler es uno solo por proceso: si dos llamadas perfiladas coinciden en el
+tiempo (fragmentos de TTS en paralelo, otra petición perfilada) la segunda se ejecuta
+sin torch.profiler y queda contada en torch_skipped. El muestreo de Python ve todos
+los hilos del proceso, así que incluye el trabajo de peticiones concurrentes.
+"""
+import contextvars
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+# torch.profiler no admite dos perfiles activos a la vez en el mismo proceso
+_torch_lock = threading.Lock()
+
+
+def profiling_requested(header_value: Optional[str]) -> bool:
+    return (header_value or "").strip().lower() in ("1", "true", "yes")
+
+
+def current_profile() -> Optional["ProfileSession"]:
+    """Sesión de perfilado de la petición actual (None si no se pidió)"""
+    return _session.get()
+
+
+class _StackSampler:
+    """Muestrea las pilas de Python de todos los hilos cada interval segundos"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.frames: List[dict] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, Tuple[List[List[int]], List[float]]] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _frame(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                samples, weights = self._samples.setdefault(ident, ([], []))
+                samples.append(stack)
+                weights.append(weight)
+            if not self._samples.keys() <= self._thread_names.keys():
+                self._thread_names.update({thread.ident: thread.name for thread in threading.enumerate()})
+
+    def to_speedscope(self, name: str) -> dict:
+        """Formato de archivo de speedscope: un perfil 'sampled' por hilo que no estuvo ocioso"""
+        profiles = []
+        for ident, (samples, weights) in self._samples.items():
+            # Un hilo con la misma pila en todas las muestras estuvo bloqueado todo el tiempo
+            if all(stack == samples[0] for stack in samples):
+                continue
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names.get(ident, f"thread-{ident}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            })
+        # El hilo que atendió la petición (el del event loop) primero
+        profiles.sort(key=lambda profile: profile["name"] != "MainThread")
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "myvoice-ai-service",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": profiles
+        }
+
+
+class ProfileSession:
+    """Perfilado de una petición: muestreo de Python y torch.profiler por llamada a los pools"""
+
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.directory = Path(settings.profile_dir) / self.id
+        self.torch_segments: List[dict] = []
+        self.torch_skipped = 0
+        self._lock = threading.Lock()
+        self._sampler = _StackSampler(max(settings.profile_sample_interval_ms, 0.5) / 1000)
+        self._token = None
+        self._started = 0.0
+
+    def __enter__(self) -> "ProfileSession":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._token = _session.set(self)
+        self._started = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._sampler.stop()
+        _session.reset(self._token)
+        try:
+            self._write(time.perf_counter() - self._started, exc)
+        except Exception as e:
+            logger.error("No se pudo guardar el perfil", extra={"profile_id": self.id, "error": str(e)})
+        return False
+
+    def run(self, pool_name: str, fn: Callable, *args, **kwargs):
+        """Ejecuta una llamada al pool bajo torch.profiler (si está libre) y exporta su traza"""
+        if not settings.profile_torch:
+            return fn(*args, **kwargs)
+        if not _torch_lock.acquire(blocking=False):
+            with self._lock:
+                self.torch_skipped += 1
+            return fn(*args, **kwargs)
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            started = time.perf_counter()
+            with profile(activities=activities, record_shapes=True) as prof:
+                result = fn(*args, **kwargs)
+            seconds = time.perf_counter() - started
+
+            with self._lock:
+                index = len(self.torch_segments)
+                segment = {"pool": pool_name, "seconds": round(seconds, 4), "file": f"torch-{index}-{pool_name}.json"}
+                self.torch_segments.append(segment)
+            prof.export_chrome_trace(str(self.directory / segment["file"]))
+            sort_by = "self_cuda_time_total" if ProfilerActivity.CUDA in activities else "self_cpu_time_total"
+            (self.directory / f"torch-{index}-{pool_name}.txt").write_text(
+                prof.key_averages().table(sort_by=sort_by, row_limit=30), encoding="utf-8"
+            )
+            return result
+        finally:
+            _torch_lock.release()
+
+    def _write(self, seconds: float, exc: Optional[BaseException]):
+        speedscope = self._sampler.to_speedscope(f"{self.label} ({self.id})")
+        (self.directory / "python.speedscope.json").write_text(json.dumps(speedscope), encoding="utf-8")
+
+        summary = {
+            "id": self.id,
+            "label": self.label,
+            "seconds": round(seconds, 4),
+            "error": repr(exc) if exc else None,
+            "sample_interval_ms": round(self._sampler.interval * 1000, 3),
+            "python_threads": [profile["name"] for profile in speedscope["profiles"]],
+            "torch_segments": self.torch_segments,
+            "torch_skipped": self.torch_skipped,
+            "files": sorted(["python.speedscope.json", *(path.name for path in self.directory.glob("torch-*"))])
+        }
+        (self.directory / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        logger.info("Perfil guardado", extra={"profile_id": self.id, "seconds": summary["seconds"],
+                                              "torch_segments": len(self.torch_segments)})
+
+
+def profile_path(profile_id: str, file_name: str = "summary.json") -> Optional[Path]:
+    """Ruta de un archivo de un perfil guardado (None si no existe o el nombre no es válido)"""
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        return None
+    directory = Path(settings.profile_dir) / profile_id
+    path = directory / file_name
+    if path.parent != directory or not path.is_file():
+        return None
+    return path
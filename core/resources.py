@@ -0,0 +1,112 @@
+"""
+Utilidades para medir y liberar recursos del proceso (memoria residente y E/S).
+Usa psutil si está instalado y, si no, lee directamente /proc (Linux).
+"""
+import ctypes
+import gc
+import os
+
+
+def current_rss_bytes() -> int:
+    """Memoria residente (RSS) actual del proceso en bytes"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss es el pico (en KB en Linux), a falta de algo mejor
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def module_footprint_bytes(obj, _depth: int = 0, _seen=None) -> int:
+    """
+    Estima los bytes de tensores de un handle de modelo: módulos torch, tuplas
+    (modelo, tokenizador, ...) u objetos que los contienen como atributos
+    (por ejemplo la instancia F5TTS con ema_model y vocoder).
+    Los pesos empaquetados de los módulos cuantizados (Linear int8 dinámico), que no
+    figuran en parameters() ni en buffers(), se cuentan aparte.
+    Devuelve 0 si no encuentra tensores (ONNX Runtime, CTranslate2, ...).
+    """
+    try:
+        import torch
+    except ImportError:
+        return 0
+
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen or _depth > 3:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, torch.nn.Module):
+        total = 0
+        for tensor in list(obj.parameters()) + list(obj.buffers()):
+            storage_ptr = tensor.untyped_storage().data_ptr()
+            if storage_ptr in _seen:
+                continue
+            _seen.add(storage_ptr)
+            total += tensor.numel() * tensor.element_size()
+        return total + _packed_params_bytes(obj, _seen)
+
+    if isinstance(obj, (tuple, list)):
+        return sum(module_footprint_bytes(item, _depth + 1, _seen) for item in obj)
+
+    if hasattr(obj, "__dict__"):
+        return sum(module_footprint_bytes(value, _depth + 1, _seen) for value in vars(obj).values())
+
+    return 0
+
+
+def _packed_params_bytes(module, _seen) -> int:
+    """Bytes de los pesos empaquetados (_packed_params) de los submódulos cuantizados"""
+    total = 0
+    for submodule in module.modules():
+        weight_bias = getattr(submodule, "_weight_bias", None)
+        if not hasattr(submodule, "_packed_params") or not callable(weight_bias):
+            continue
+        try:
+            tensors = [tensor for tensor in weight_bias() if tensor is not None]
+        except Exception:
+            continue
+        for tensor in tensors:
+            key = ("packed", id(submodule), tensor.data_ptr())
+            if key in _seen:
+                continue
+            _seen.add(key)
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def release_memory():
+    """Recolecta basura y devuelve al sistema operativo la memoria libre del heap"""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def thread_io_counters() -> dict:
+    """
+    Contadores de E/S del hilo actual (Linux, /proc/thread-self/io):
+    read_bytes son los bytes leídos realmente del disco y rchar los leídos por syscalls
+    (incluye los servidos desde la caché de páginas). Vacío si no está disponible.
+    """
+    try:
+        with open("/proc/thread-self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read_bytes": int(counters["read_bytes"]), "rchar": int(counters["rchar"])}
+    except (OSError, KeyError, ValueError):
+        return {}
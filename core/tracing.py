@@ -0,0 +1,128 @@
+"""
+Trazas por petición con OpenTelemetry.
+
+Cada petición HTTP recibe un id (X-Request-ID, el del cliente o uno nuevo) y un span
+raíz; dentro del pipeline se abren spans por etapa (upload, decode, transcribe,
+translate, reference, synthesize) con atributos como segundos de audio, tokens y
+modelo. El contexto viaja en contextvars, así que los spans abiertos en los hilos de
+los pools (run_on_pool copia el contexto) quedan colgados de la petición correcta.
+
+Exportadores (Settings.tracing_exporter):
+- "otlp": OTLP/HTTP hacia un collector local (Settings.tracing_otlp_endpoint)
+- "file": OTLP JSON, una línea por lote (Settings.tracing_file); el receptor
+  otlpjsonfile del collector lo puede leer tal cual
+- "none": sin exportar (los spans son no-op)
+
+La exportación es por lotes en un hilo aparte (BatchSpanProcessor).
+"""
+import contextvars
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Tuple
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from core.config import settings
+
+TRACING_EXPORTERS = ("none", "otlp", "file")
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_tracer = trace.get_tracer("myvoice")
+_configured = False
+
+
+class OTLPJsonFileSpanExporter(SpanExporter):
+    """Escribe cada lote como un ExportTraceServiceRequest en JSON (formato de archivo OTLP)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        from google.protobuf.json_format import MessageToJson
+        from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+
+        line = MessageToJson(encode_spans(spans), indent=None)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing():
+    """Instala el proveedor de trazas con el exportador configurado (una sola vez)"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    exporter_name = settings.tracing_exporter
+    if exporter_name not in TRACING_EXPORTERS:
+        raise ValueError(f"Exportador de trazas desconocido: {exporter_name}. Opciones: {list(TRACING_EXPORTERS)}")
+    if exporter_name == "none":
+        return
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    else:
+        exporter = OTLPJsonFileSpanExporter(settings.tracing_file)
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.tracing_service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def shutdown_tracing():
+    """Exporta los spans pendientes antes de terminar el proceso"""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Fija el id de la petición actual (el recibido del cliente o uno nuevo)"""
+    request_id = incoming or uuid.uuid4().hex
+    _request_id.set(request_id)
+    return request_id
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def current_trace_ids() -> Tuple[Optional[str], Optional[str]]:
+    """trace_id y span_id activos en hexadecimal (None si no hay span grabándose)"""
+    context = trace.get_current_span().get_span_context()
+    if not context.is_valid:
+        return None, None
+    return format(context.trace_id, "032x"), format(context.span_id, "016x")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Abre un span hijo del actual con los atributos indicados (los None se omiten).
+    Devuelve el span para agregar atributos que se conocen al final de la etapa
+    """
+    with _tracer.start_as_current_span(name) as current:
+        request_id = _request_id.get()
+        if request_id:
+            current.set_attribute("request.id", request_id)
+        set_attributes(current, **attributes)
+        yield current
+
+
+def set_attributes(current, **attributes):
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
@@ -0,0 +1,180 @@
+"""
+Calentamiento de modelos y estado de disponibilidad (readiness) del servicio.
+
+Después de la precarga, la primera inferencia real todavía paga costos únicos
+(selección de kernels, crecimiento del allocator, cachés del tokenizador,
+inicialización del vocoder de F5TTS). El calentamiento ejecuta una inferencia
+mínima por cada modelo precargado (Settings.preload_models, TTS incluido) usando
+los clips de audios/, y recién entonces el servicio se declara listo para recibir
+tráfico (/health/ready).
+"""
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from core.compile import save_compile_artifacts
+from core.config import settings
+from core.executors import run_on_pool
+from core.model_manager import ModelState, model_manager
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXTS = {
+    "es": "Hola, esto es una prueba.",
+    "en": "Hello, this is a test."
+}
+
+_startup_lock = threading.Lock()
+_startup_thread = None
+_readiness = {
+    "phase": "starting",  # starting → preloading → warming → ready | failed
+    "warmed_models": {},
+    "started_at": time.time(),
+    "ready_at": None
+}
+
+
+def _warm_whisper(whisper_model):
+    from services.whisper_service import load_audio_clip
+
+    audio = load_audio_clip(settings.warmup_audio_path, settings.warmup_audio_seconds)
+    whisper_model.transcribe(audio)
+
+
+def _make_translation_warmer(name: str):
+    def warm(handle):
+        from services.translation_service import GENERATION_TIERS, generate_translation, get_translation_model_key
+
+        # Los modelos de la tabla de rutas se calientan con un par propio (opus-mt es de un solo par)
+        pairs = [pair for pair, route in settings.translation_routes.items()
+                 if get_translation_model_key(route.model) == name]
+        source_lang, target_lang = pairs[0].split("-") if pairs else ("es", "en")
+        # Cada nivel recorre un camino distinto de generate() (greedy y beam search)
+        for tier in GENERATION_TIERS:
+            generate_translation(handle, WARMUP_TEXTS.get(source_lang, WARMUP_TEXTS["en"]),
+                                 source_lang, target_lang, tier)
+    return warm
+
+
+def _make_tts_warmer(model_type: str):
+    def warm(tts):
+        from services.tts_service import get_model_config
+
+        languages = get_model_config(model_type).languages
+        language = languages[0] if languages else "en"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tts.infer(
+                ref_file=settings.warmup_reference_audio_path,
+                ref_text=settings.warmup_reference_text,
+                gen_text=WARMUP_TEXTS.get(language, WARMUP_TEXTS["en"]),
+                file_wave=str(Path(tmp_dir) / "warmup.wav")
+            )
+    return warm
+
+
+def _get_warmer(name: str):
+    if name == "whisper":
+        return _warm_whisper
+    if name == "translation" or name.startswith("translation_"):
+        return _make_translation_warmer(name)
+    if name.startswith("tts_"):
+        return _make_tts_warmer(name[len("tts_"):])
+    return None
+
+
+def warm_handle(name: str, handle):
+    """
+    Ejecuta la inferencia de calentamiento sobre un handle concreto. Se usa también
+    en las recargas en caliente, antes de poner en servicio la nueva versión.
+    """
+    warmer = _get_warmer(name)
+    if warmer is not None:
+        run_on_pool(name, warmer, handle)
+
+
+def warmup_models(models: list = None) -> dict:
+    """
+    Ejecuta una inferencia sintética mínima por cada modelo ya cargado
+
+    Args:
+        models: Nombres a calentar (por defecto todos los que estén listos en el gestor)
+
+    Returns:
+        Diccionario modelo → {"status", "time"}
+    """
+    if models is None:
+        models = [entry["name"] for entry in model_manager.status() if entry["state"] == ModelState.READY.value]
+
+    results = {}
+    for name in models:
+        warmer = _get_warmer(name)
+        if warmer is None:
+            continue
+        start = time.time()
+        try:
+            with model_manager.lease(name) as handle:
+                # En el ejecutor del modelo, así también se calientan sus hilos
+                run_on_pool(name, warmer, handle)
+            results[name] = {"status": "warm", "time": round(time.time() - start, 2)}
+            logger.info("Modelo calentado", extra={"model": name, "seconds": results[name]["time"]})
+        except Exception as e:
+            results[name] = {"status": "failed", "time": round(time.time() - start, 2), "error": str(e)}
+            logger.warning("Error calentando el modelo: %s", e, extra={"model": name})
+    return results
+
+
+def run_startup_sequence():
+    """Precarga → calentamiento → listo. Pensado para correr en segundo plano mientras el servidor responde /health/live"""
+    from core.preload import preload_all_models
+
+    try:
+        _readiness["phase"] = "preloading"
+        preload_report = preload_all_models()
+
+        _readiness["phase"] = "warming"
+        if settings.warmup_enabled:
+            # Se calienta todo lo precargado (incluidos los TTS), no solo lo que quedó listo:
+            # un modelo que falló al precargar se reintenta acá y si vuelve a fallar
+            # el servicio no se declara listo
+            _readiness["warmed_models"] = warmup_models(preload_report["models"])
+            # Con modo compilado, el calentamiento es el que compila: se guardan los grafos
+            save_compile_artifacts()
+
+        _readiness["phase"] = "ready"
+        _readiness["ready_at"] = time.time()
+        logger.info("Servicio listo para recibir tráfico",
+                    extra={"seconds": round(_readiness["ready_at"] - _readiness["started_at"], 2)})
+    except Exception as e:
+        _readiness["phase"] = "failed"
+        _readiness["error"] = str(e)
+        logger.error("Error en la secuencia de arranque: %s", e)
+
+
+def start_background_startup():
+    """Lanza la secuencia de arranque en un hilo (una sola vez por proceso)"""
+    global _startup_thread
+    with _startup_lock:
+        if _startup_thread is None:
+            _startup_thread = threading.Thread(target=run_startup_sequence, name="model-startup", daemon=True)
+            _startup_thread.start()
+
+
+def readiness_report() -> dict:
+    """
+    Estado de disponibilidad. El servicio está listo cuando terminó el arranque y
+    todos los modelos precargados siguen cargados (o se recargan bajo demanda)
+    """
+    models = model_manager.status()
+    failed = [entry["name"] for entry in models if entry["state"] == ModelState.FAILED.value]
+    failed += [name for name, result in _readiness["warmed_models"].items()
+               if result["status"] == "failed" and name not in failed]
+    return {
+        "ready": _readiness["phase"] == "ready" and not failed,
+        "phase": _readiness["phase"],
+        "failed_models": failed,
+        "warmed_models": _readiness["warmed_models"],
+        "uptime": round(time.time() - _readiness["started_at"], 1),
+        "models": models
+    }
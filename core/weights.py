@@ -0,0 +1,193 @@
+"""
+Carga de pesos desde archivos .safetensors mapeados en memoria (mmap).
+
+Los tensores se crean directamente sobre el mapeo del archivo, así las páginas se
+leen del disco recién cuando se usan y quedan en la caché de páginas del sistema,
+compartidas entre todos los procesos que cargan el mismo archivo (workers, reinicios).
+Los checkpoints pickled (.bin, .pt, .ckpt) se convierten una sola vez a safetensors
+en una caché local.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Optional
+
+import torch
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool
+}
+
+# Claves habituales bajo las que los checkpoints de entrenamiento guardan los pesos
+STATE_DICT_KEYS = ("ema_model_state_dict", "model_state_dict", "state_dict", "model")
+
+
+def load_safetensors_mmap(path) -> Dict[str, torch.Tensor]:
+    """
+    Devuelve los tensores de un .safetensors sin copiarlos a memoria privada.
+    El mapeo es copy-on-write (ACCESS_COPY): si algo escribe en un tensor se copia
+    solo esa página y el archivo nunca se modifica.
+
+    No se guarda ninguna referencia global al mapeo: torch.frombuffer retiene el buffer
+    mientras viva algún tensor creado sobre él, así que al desalojar o recargar el modelo
+    el mapeo se libera junto con sus tensores.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + begin)
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+def _extract_state_dict(checkpoint) -> Dict[str, torch.Tensor]:
+    if isinstance(checkpoint, dict) and all(isinstance(v, torch.Tensor) for v in checkpoint.values()):
+        return checkpoint
+    for key in STATE_DICT_KEYS:
+        if isinstance(checkpoint, dict) and key in checkpoint:
+            return _extract_state_dict(checkpoint[key])
+    raise ValueError("No se encontró un state_dict de tensores en el checkpoint")
+
+
+def ensure_safetensors(checkpoint_path) -> Path:
+    """
+    Devuelve una ruta .safetensors equivalente al checkpoint. Si ya es safetensors la
+    devuelve tal cual; si es pickled lo convierte una sola vez a Settings.safetensors_cache_dir
+    (la clave de caché incluye ruta, tamaño y fecha de modificación del original)
+    """
+    checkpoint_path = Path(checkpoint_path)
+    if checkpoint_path.suffix == ".safetensors":
+        return checkpoint_path
+
+    stat = checkpoint_path.stat()
+    digest = hashlib.sha1(f"{checkpoint_path.resolve()}:{stat.st_size}:{stat.st_mtime}".encode()).hexdigest()[:16]
+    cache_path = Path(settings.safetensors_cache_dir) / f"{checkpoint_path.stem}-{digest}.safetensors"
+    if cache_path.exists():
+        return cache_path
+
+    from safetensors.torch import save_file
+
+    logger.info("Convirtiendo checkpoint a safetensors (solo la primera vez)", extra={"path": str(checkpoint_path)})
+    state_dict = _extract_state_dict(torch.load(checkpoint_path, map_location="cpu", weights_only=True))
+
+    # safetensors no admite tensores que compartan almacenamiento: se clonan los repetidos
+    seen_storages = set()
+    tensors = {}
+    for name, tensor in state_dict.items():
+        storage_ptr = tensor.untyped_storage().data_ptr()
+        if storage_ptr in seen_storages:
+            tensor = tensor.clone()
+        seen_storages.add(storage_ptr)
+        tensors[name] = tensor.contiguous()
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    save_file(tensors, str(tmp_path))
+    tmp_path.replace(cache_path)
+    logger.info("Checkpoint convertido", extra={"path": str(cache_path)})
+    return cache_path
+
+
+def _resolve_hf_weights(model_name: str) -> Optional[Path]:
+    """Ubica el archivo de pesos de un modelo de HuggingFace (local o en la caché del hub)"""
+    local_dir = Path(model_name)
+    candidates = ("model.safetensors", "pytorch_model.bin")
+    if local_dir.is_dir():
+        for filename in candidates:
+            if (local_dir / filename).exists():
+                return local_dir / filename
+        return None
+
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+
+    for filename in candidates:
+        try:
+            return Path(hf_hub_download(model_name, filename))
+        except EntryNotFoundError:
+            continue
+    return None
+
+
+def assign_mmap_weights(module: torch.nn.Module, tensors: Dict[str, torch.Tensor], strip_prefix: str = "") -> int:
+    """
+    Reemplaza los parámetros del módulo por los tensores mapeados cuando coinciden
+    nombre, forma y dtype (los que no coinciden se conservan). Devuelve cuántos se asignaron.
+    """
+    expected = module.state_dict()
+    matched = {}
+    for name, tensor in tensors.items():
+        name = name[len(strip_prefix):] if strip_prefix and name.startswith(strip_prefix) else name
+        current = expected.get(name)
+        if current is not None and current.shape == tensor.shape and current.dtype == tensor.dtype \
+                and current.device.type == "cpu":
+            matched[name] = tensor
+    module.load_state_dict(matched, strict=False, assign=True)
+    return len(matched)
+
+
+def load_pretrained_mmap(model_cls, model_name: str):
+    """
+    Equivalente a model_cls.from_pretrained(model_name) con los pesos mapeados en memoria.
+    La estructura se crea sin inicializar pesos (las páginas vacías no se tocan) y luego
+    los parámetros se reemplazan por tensores sobre el archivo safetensors.
+    """
+    from transformers import AutoConfig
+    from transformers.modeling_utils import no_init_weights
+
+    weights_path = _resolve_hf_weights(model_name)
+    if weights_path is None:
+        logger.warning("No se encontró un archivo de pesos único, usando from_pretrained", extra={"model": model_name})
+        return model_cls.from_pretrained(model_name)
+
+    tensors = load_safetensors_mmap(ensure_safetensors(weights_path))
+
+    config = AutoConfig.from_pretrained(model_name)
+    with no_init_weights():
+        model = model_cls(config)
+
+    # Algunos checkpoints guardan las claves sin el prefijo del modelo base ("model.")
+    expected_keys = set(model.state_dict())
+    prefix = f"{model.base_model_prefix}."
+    direct_matches = sum(key in expected_keys for key in tensors)
+    prefixed_matches = sum(prefix + key in expected_keys for key in tensors)
+    if prefixed_matches > direct_matches:
+        tensors = {prefix + key: tensor for key, tensor in tensors.items()}
+
+    missing, _ = model.load_state_dict(tensors, strict=False, assign=True)
+    # lm_head suele faltar porque está atado a los embeddings
+    model.tie_weights()
+    tied_keys = set(getattr(model, "_tied_weights_keys", None) or [])
+    missing = [key for key in missing if key not in tied_keys]
+    if missing:
+        logger.warning("Pesos faltantes al cargar con mmap", extra={"model": model_name, "missing": missing[:5], "missing_total": len(missing)})
+    return model.eval()
@@ -0,0 +1,47 @@
+"""
+Soporte para el modo multi-worker: los modelos se cargan una vez en el proceso
+maestro y los workers se crean con fork(), compartiendo los pesos en páginas
+copy-on-write. Este módulo mide cuánta memoria propia acumula cada worker desde el fork.
+"""
+import os
+import time
+
+from core.resources import current_rss_bytes
+
+_fork_baseline = {}
+
+
+def _memory_snapshot() -> dict:
+    """RSS, USS (memoria exclusiva del proceso) y PSS (RSS con las páginas compartidas prorrateadas)"""
+    snapshot = {"rss": current_rss_bytes()}
+    try:
+        import psutil
+        info = psutil.Process().memory_full_info()
+        snapshot.update({"uss": info.uss, "pss": getattr(info, "pss", 0), "shared": getattr(info, "shared", 0)})
+    except (ImportError, OSError, AttributeError):
+        pass
+    return snapshot
+
+
+def record_fork_baseline():
+    """Se llama en cada worker recién creado (post_fork) para medir su crecimiento posterior"""
+    _fork_baseline.clear()
+    _fork_baseline.update(_memory_snapshot())
+    _fork_baseline["pid"] = os.getpid()
+    _fork_baseline["forked_at"] = time.time()
+
+
+def worker_memory_report() -> dict:
+    """
+    Memoria del worker actual y crecimiento desde el fork. El crecimiento de USS es
+    lo que este worker dejó de compartir con el maestro (páginas copiadas al escribirse)
+    """
+    current = _memory_snapshot()
+    report = {"pid": os.getpid(), **{f"{key}_mb": round(value / 1024 ** 2, 1) for key, value in current.items()}}
+
+    if _fork_baseline.get("pid") == os.getpid():
+        report["since_fork_seconds"] = round(time.time() - _fork_baseline["forked_at"], 1)
+        for key in ("rss", "uss", "pss"):
+            if key in current and key in _fork_baseline:
+                report[f"{key}_growth_mb"] = round((current[key] - _fork_baseline[key]) / 1024 ** 2, 1)
+    return report
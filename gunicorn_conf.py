@@ -0,0 +1,66 @@
+"""
+Configuración de gunicorn para el modo multi-worker (Settings.workers > 1).
+
+El maestro precarga los modelos antes de hacer fork de los workers uvicorn, así
+todos comparten los pesos en páginas copy-on-write en lugar de tener N copias.
+Uso: gunicorn -c gunicorn_conf.py main:app (boot_loader.py lo hace automáticamente)
+"""
+import gc
+import os
+import shutil
+
+from core.config import settings
+
+# Métricas compartidas entre workers (core/metrics.py): el directorio tiene que fijarse
+# antes de que la aplicación (preload_app) importe prometheus_client, y se vacía en cada
+# arranque para no arrastrar valores de una ejecución anterior
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.metrics_multiproc_dir)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = f"{settings.host}:{settings.port}"
+workers = settings.workers
+worker_class = "uvicorn.workers.UvicornWorker"
+# Importa la aplicación en el maestro antes del fork
+preload_app = True
+# La primera petición a un modelo desalojado puede tardar en recargarlo
+timeout = 600
+
+
+def on_starting(server):
+    import torch
+    from core.preload import preload_all_models
+
+    # El pool OpenMP de torch no es seguro ante fork(): el maestro carga con un solo
+    # hilo para no crearlo y cada worker configura sus hilos después del fork
+    torch.set_num_threads(1)
+    server.log.info("Precargando modelos en el proceso maestro antes del fork...")
+    preload_all_models()
+
+
+def when_ready(server):
+    # Mueve todos los objetos actuales a la generación permanente: el GC de los workers
+    # no los recorre y no ensucia (copia) sus páginas compartidas
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+    from core.log import setup_logging
+    from core.metrics import start_metrics_refresher
+    from core.workers import record_fork_baseline
+
+    # Los hilos de logs y de métricas no sobreviven al fork
+    setup_logging()
+    start_metrics_refresher(settings.metrics_refresh_seconds)
+    torch.set_num_threads(settings.worker_torch_threads)
+    record_fork_baseline()
+    server.log.info(f"Worker {worker.pid} iniciado con {settings.worker_torch_threads} hilos de torch")
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Quita los gauges "live" del worker que terminó
+    multiprocess.mark_process_dead(worker.pid)
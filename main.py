@@ -1,9 +1,25 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from api.tts_route import router as tts_router
 from api.whisper_route import router as whisper_router
 from api.translation_route import router as translation_router
 from api.audio_translation_route import router as translate_audio_router  # Actualizado el nombre del router
+from api.models_route import router as models_router
+from api.health_route import router as health_router
+from api.admin_route import router as admin_router
+from api.metrics_route import router as metrics_router
+from core.admin import ADMIN_TOKEN_HEADER, is_valid_admin_token
+from core.log import setup_logging, shutdown_logging
+from core.metrics import format_server_timing, start_request_timing
+from core.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileSession, profiling_requested
+from core.tracing import REQUEST_ID_HEADER, new_request_id, setup_tracing, shutdown_tracing, span
+from core.warmup import start_background_startup
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+setup_logging()
+setup_tracing()
 
 app = FastAPI(
     title = "MyVoice Ai Service",
@@ -20,6 +36,52 @@ app.include_router(tts_router)
 app.include_router(whisper_router)
 app.include_router(translation_router)
 app.include_router(translate_audio_router)  # Actualizado el nombre del router
+app.include_router(models_router)
+app.include_router(health_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
+
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    # Desglose por etapa (decode, transcribe, translate, reference, synthesize) en cada respuesta
+    timings = start_request_timing()
+    start = time.perf_counter()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = format_server_timing(timings, time.perf_counter() - start)
+    return response
+
+@app.middleware("http")
+async def request_tracing_middleware(request: Request, call_next):
+    # Id de la petición (el del cliente si lo envía) y span raíz del que cuelgan las etapas
+    request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+    with span("http.request", **{"http.method": request.method, "http.target": request.url.path}) as root:
+        response = await call_next(request)
+        root.set_attribute("http.status_code", response.status_code)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    # Perfilado opcional (core/profiling.py): sin el header no se crea ninguna sesión
+    if not profiling_requested(request.headers.get(PROFILE_HEADER)):
+        return await call_next(request)
+    if not is_valid_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"detail": f"{PROFILE_HEADER} requiere un {ADMIN_TOKEN_HEADER} válido"})
+    with ProfileSession(f"{request.method} {request.url.path}") as session:
+        response = await call_next(request)
+    response.headers[PROFILE_ID_HEADER] = session.id
+    return response
+
+@app.on_event("startup")
+async def start_models():
+    # Precarga y calentamiento en segundo plano: /health/live responde de inmediato
+    # y /health/ready recién cuando todos los modelos están calientes
+    start_background_startup()
+
+@app.on_event("shutdown")
+async def flush_telemetry():
+    shutdown_tracing()
+    shutdown_logging()
 
 @app.get("/")
 async def root():
@@ -1,19 +1,36 @@
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
+class ReferenceWindow(BaseModel):
+    """
+    Ventana del audio de referencia usada en la síntesis y cómputo ahorrado por el recorte.
+    """
+    window_start: float = Field(..., description="Inicio de la ventana elegida en segundos")
+    window_end: float = Field(..., description="Fin de la ventana elegida en segundos")
+    original_seconds: float = Field(..., description="Duración del audio de referencia original")
+    reference_seconds: float = Field(..., description="Duración de la referencia usada en la síntesis")
+    saved_seconds: float = Field(..., description="Segundos de referencia que F5TTS ya no procesa")
+    saved_frames_per_step: int = Field(..., description="Frames de mel menos en cada paso del solver")
+    trimmed: bool = Field(..., description="Indica si la referencia se recortó")
+
 class TranslateAudioRequest(BaseModel):
     """
     Solicitud para el proceso unificado de transcripción, traducción y síntesis de voz.
     """
     audio_path: str = Field(..., example="audios/audioStefano.mp3", 
                            description="Ruta al archivo de audio a transcribir")
-    source_lang: str = Field(..., example="es", 
-                            description="Código del idioma de origen (en, es, zh, etc.)")
+    source_lang: Optional[str] = Field(None, example="es", 
+                            description="Código del idioma de origen (en, es, zh, etc.). Si se omite lo detecta Whisper")
     target_lang: str = Field(..., example="en", 
                             description="Código del idioma de destino (en, es, zh, etc.)")
     voice_reference_path: str = Field(..., example="audios/audioStefano.mp3", 
                                     description="Ruta al audio de referencia para la síntesis de voz")
     model: str = Field("F5TTS_v1_Base", example="F5TTS_v1_Base", 
                       description="Modelo TTS a utilizar")
+    translation_tier: Optional[Literal["fast", "quality"]] = Field(None, example="fast",
+                                                                   description="Nivel de generación de la traducción ('fast' o 'quality')")
+    tts_tier: Optional[Literal["draft", "standard", "high"]] = Field(None, example="standard",
+                                                                      description="Nivel de la síntesis de voz ('draft', 'standard' o 'high')")
 
 class TranslateAudioResponse(BaseModel):
     """
@@ -30,12 +47,19 @@ class TranslateAudioResponse(BaseModel):
     translated_text: str = Field(..., description="Texto traducido")
     source_lang: str = Field(..., description="Idioma de origen")
     target_lang: str = Field(..., description="Idioma de destino")
+    source_lang_detected: bool = Field(..., description="Indica si el idioma de origen fue detectado por Whisper")
+    translation_skipped: bool = Field(..., description="Indica si se omitió la traducción por coincidir origen y destino")
     translation_time: float = Field(..., description="Tiempo de traducción en segundos")
+    translation_tier: str = Field(..., description="Nivel de generación utilizado en la traducción")
+    translation_model: Optional[str] = Field(None, description="Checkpoint de traducción utilizado según la ruta del par de idiomas")
     
     # Resultados de la síntesis de voz
     output_audio_path: str = Field(..., description="Ruta del archivo de audio generado con la traducción")
     reference_text: str = Field(..., description="Texto de referencia extraído del audio de referencia")
     tts_time: float = Field(..., description="Tiempo de síntesis de voz en segundos")
+    tts_tier: str = Field(..., description="Nivel de la síntesis de voz utilizado")
+    nfe_step: int = Field(..., description="Pasos del solver de flow matching utilizados en la síntesis")
+    reference_window: Optional[ReferenceWindow] = Field(None, description="Ventana del audio de referencia utilizada")
     
     # Información general
     total_time: float = Field(..., description="Tiempo total del proceso en segundos")
\ No newline at end of file
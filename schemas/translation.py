@@ -1,13 +1,20 @@
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 class TranslationRequest(BaseModel):
     text: str = Field(..., example="Hello, this is a text to translate.", description="Texto a traducir")
-    source_lang: str = Field(..., example="en", description="Código del idioma de origen (en, es, zh, etc.)")
+    source_lang: Optional[str] = Field(None, example="en", description="Código del idioma de origen (en, es, zh, etc.). Si se omite se detecta automáticamente")
     target_lang: str = Field(..., example="es", description="Código del idioma de destino (en, es, zh, etc.)")
+    tier: Optional[Literal["fast", "quality"]] = Field(None, example="fast",
+                                                       description="Nivel de generación: 'fast' (greedy) o 'quality' (beam search). Por defecto el configurado en el servidor")
 
 class TranslationResponse(BaseModel):
     original_text: str = Field(..., description="Texto original enviado para traducción")
     translated_text: str = Field(..., description="Texto traducido")
     source_lang: str = Field(..., description="Idioma de origen")
     target_lang: str = Field(..., description="Idioma de destino")
+    source_lang_detected: bool = Field(..., description="Indica si el idioma de origen fue detectado automáticamente")
+    translation_skipped: bool = Field(..., description="Indica si se omitió la traducción por coincidir origen y destino")
+    tier: str = Field(..., description="Nivel de generación utilizado")
+    model: Optional[str] = Field(None, description="Checkpoint de traducción utilizado según la ruta del par de idiomas")
     response_time: float = Field(..., description="Tiempo de respuesta en segundos")
\ No newline at end of file
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 class TTSRequest(BaseModel):
@@ -5,6 +6,10 @@ class TTSRequest(BaseModel):
     ref_audio_path: str = Field(..., example="audios/audioStefano.mp3")
     ref_text: str = Field(..., example="Texto de referencia")
     gen_text: str = Field(..., example="Texto a sintetizar")
+    language: str = Field("en", example="es", description="Idioma del texto a sintetizar (elige el modelo del registro)")
+    speed: float = Field(0.8, example=0.8, description="Velocidad del habla generada")
+    tier: Optional[Literal["draft", "standard", "high"]] = Field(None, example="standard",
+                                                                  description="Nivel de velocidad/calidad: 'draft' (~8 pasos), 'standard' o 'high'")
 
 class TTSResponse(BaseModel):
     stdout: str
@@ -12,3 +17,6 @@ class TTSResponse(BaseModel):
     returncode: int
     output_files: list[str]
     response_time: float = Field(..., description="Tiempo de respuesta en segundos")
+    tts_tier: str = Field(..., description="Nivel de velocidad/calidad utilizado")
+    nfe_step: int = Field(..., description="Pasos del solver de flow matching utilizados")
+    tts_time: float = Field(..., description="Tiempo de síntesis en segundos")
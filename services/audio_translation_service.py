@@ -1,138 +1,204 @@
+import logging
 import time
 from pathlib import Path
 import uuid
 import os
 import tempfile
 import shutil
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 
-from services.whisper_service import get_whisper_model
-from services.translation_service import get_translation_model
-from services.tts_service import get_tts
+import soundfile as sf
+
+from core.config import settings
+from core.model_manager import model_manager
+from core.executors import run_on_pool
+from core.metrics import observe_stage
+from core.tracing import set_attributes, span
+from services.whisper_service import SAMPLE_RATE, get_whisper_model, load_audio_clip
+from services.translation_service import run_translation
+from services.tts_service import (
+    get_model_config, get_model_name_for_language, get_tts, get_tts_inference_kwargs, get_tts_model_key, synthesize
+)
+from services.reference_audio import prepare_reference
+
+logger = logging.getLogger(__name__)
+
+# Texto de referencia fijo usado por el endpoint con uploads (evita transcribir la referencia)
+PLACEHOLDER_REFERENCE_TEXT = "Mientras mas corto es el audio el modelo es mejor. "
 
 class WhisperRequest:
     """Clase auxiliar para adaptar la solicitud al formato que espera el servicio Whisper"""
     def __init__(self, audio_path: str):
         self.audio_path = audio_path
 
-def process_audio_translation(request) -> Dict[str, Any]:
+def _run_translation_pipeline(
+    audio_path: Path,
+    voice_reference_path: Path,
+    source_lang: Optional[str],
+    target_lang: str,
+    translation_tier: Optional[str] = None,
+    reference_text: Optional[str] = None,
+    tts_tier: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Procesa un flujo completo: transcripción (Whisper) → traducción (M2M100) → síntesis de voz (F5TTS)
-    
+    Ejecuta las tres etapas sobre archivos ya guardados en disco:
+    transcripción (Whisper) → traducción (M2M100) → síntesis de voz (F5TTS)
+
     Args:
-        request: La solicitud con todos los parámetros necesarios
-        
+        audio_path: Audio a transcribir y traducir
+        voice_reference_path: Audio de referencia para la síntesis de voz
+        source_lang: Idioma de origen. Si es None lo detecta Whisper al transcribir
+        target_lang: Idioma de destino
+        translation_tier: Nivel de generación de la traducción ('fast' o 'quality')
+        reference_text: Texto del audio de referencia. Si es None se transcribe con Whisper
+        tts_tier: Nivel de velocidad/calidad de la síntesis ('draft', 'standard' o 'high')
+
     Returns:
-        Un diccionario con todos los resultados del proceso
+        Un diccionario con los resultados de las tres etapas
     """
-    # Iniciar temporizador total
-    total_start_time = time.time()
     result = {}
-    
-    # Verificar existencia de los archivos de audio
-    audio_path = Path(request.audio_path)
-    if not audio_path.exists():
-        return {
-            "error": f"El archivo de audio {request.audio_path} no existe"
-        }
-    
-    voice_reference_path = Path(request.voice_reference_path)
-    if not voice_reference_path.exists():
-        return {
-            "error": f"El archivo de referencia de voz {request.voice_reference_path} no existe"
-        }
-    
-    # Preparar la respuesta con la ruta del audio original
-    result["original_audio_path"] = str(audio_path)
-    result["source_lang"] = request.source_lang
-    result["target_lang"] = request.target_lang
-    
+
     # 1. PASO UNO: TRANSCRIPCIÓN con Whisper
-    print(f"🎙️ Transcribiendo audio: {audio_path}")
+    logger.info("Transcribiendo audio", extra={"path": str(audio_path)})
     transcription_start = time.time()
-    
-    # Crear objeto de solicitud para el servicio Whisper
-    whisper_request = WhisperRequest(str(audio_path))
-    
-    # Obtener modelo cargado (usar la función que evita recargar)
-    whisper_model = get_whisper_model()
-    
-    # Realizar transcripción
-    transcription_result = whisper_model.transcribe(str(audio_path), fp16=False)
+
+    # Realizar transcripción. Si se conoce el idioma se evita la detección de Whisper;
+    # si no, se reutiliza el idioma que Whisper detecta al transcribir
+    transcribe_options = {}
+    if source_lang:
+        transcribe_options["language"] = source_lang
+
+    # Decodificar una sola vez (ffmpeg) para medir la etapa y la duración del audio
+    decode_start = time.time()
+    with span("decode") as current:
+        audio = load_audio_clip(audio_path)
+        audio_seconds = len(audio) / SAMPLE_RATE
+        current.set_attribute("audio.seconds", audio_seconds)
+    observe_stage("decode", "ffmpeg", time.time() - decode_start)
+
+    # Obtener modelo cargado (sin recargar) y marcarlo en uso durante la transcripción
+    whisper_start = time.time()
+    with span("transcribe", model="whisper", **{"audio.seconds": audio_seconds}) as current:
+        with model_manager.lease("whisper") as whisper_model:
+            transcription_result = run_on_pool("whisper", whisper_model.transcribe, audio, **transcribe_options)
+        set_attributes(current, language=transcription_result.get("language"),
+                       **{"text.chars": len(transcription_result["text"])})
+    observe_stage("transcribe", "whisper", time.time() - whisper_start, audio_seconds)
     transcribed_text = transcription_result["text"]
-    
+
+    source_lang_detected = not source_lang
+    if source_lang_detected:
+        source_lang = transcription_result["language"]
+        logger.info("Idioma detectado por Whisper", extra={"source_lang": source_lang})
+
     # Calcular tiempo de transcripción
     transcription_time = time.time() - transcription_start
-    print(f"✅ Transcripción completada en {transcription_time:.2f}s: {transcribed_text[:50]}...")
-    
+    logger.info("Transcripción completada", extra={"seconds": round(transcription_time, 2), "chars": len(transcribed_text)})
+    logger.debug("Texto transcrito: %s", transcribed_text)
+
     # Almacenar resultados de la transcripción
     result["transcribed_text"] = transcribed_text
     result["transcription_time"] = round(transcription_time, 2)
-    
+    result["source_lang"] = source_lang
+    result["source_lang_detected"] = source_lang_detected
+
     # 2. PASO DOS: TRADUCCIÓN con M2M100
-    print(f"🌐 Traduciendo de {request.source_lang} a {request.target_lang}")
+    logger.info("Traduciendo", extra={"source_lang": source_lang, "target_lang": target_lang})
     translation_start = time.time()
-    
-    # Obtener modelo, tokenizador y dispositivo
-    model, tokenizer, device = get_translation_model()
-    
-    # Configurar idioma de origen
-    tokenizer.src_lang = request.source_lang
-    
-    # Codificar texto transcrito
-    encoded_text = tokenizer(transcribed_text, return_tensors="pt").to(device)
-    
-    # Generar traducción
-    generated_tokens = model.generate(
-        **encoded_text, 
-        forced_bos_token_id=tokenizer.get_lang_id(request.target_lang)
-    )
-    
-    # Decodificar traducción
-    translated_text = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
-    
+
+    # Traducir con el nivel de generación solicitado (o el por defecto).
+    # Si origen y destino coinciden no se ejecuta el modelo
+    with span("translate", source_lang=source_lang, target_lang=target_lang) as current:
+        translation = run_translation(transcribed_text, source_lang, target_lang, translation_tier)
+        set_attributes(current, model=translation["model"], tier=translation["tier"],
+                       input_tokens=int(translation["input_tokens"]), output_tokens=int(translation["output_tokens"]))
+    translated_text = translation["translated_text"]
+
     # Calcular tiempo de traducción
     translation_time = time.time() - translation_start
-    print(f"✅ Traducción completada en {translation_time:.2f}s: {translated_text[:50]}...")
-    
+    observe_stage("translate", translation["model"] or "skipped", translation_time)
+    if translation["translation_skipped"]:
+        logger.info("Traducción omitida: el audio ya está en el idioma de destino", extra={"target_lang": target_lang})
+    else:
+        logger.info("Traducción completada", extra={"seconds": round(translation_time, 2), "chars": len(translated_text)})
+        logger.debug("Texto traducido: %s", translated_text)
+
     # Almacenar resultados de la traducción
     result["translated_text"] = translated_text
     result["translation_time"] = round(translation_time, 2)
-    
+    result["translation_tier"] = translation["tier"]
+    result["translation_model"] = translation["model"]
+    result["translation_skipped"] = translation["translation_skipped"]
+
     # 3. PASO TRES: SÍNTESIS DE VOZ con F5TTS
-    print(f"🔊 Generando audio con la traducción")
+    logger.info("Generando audio con la traducción")
     tts_start = time.time()
-    
-    # Primero, transcribir el audio de referencia para obtener un texto de referencia adecuado
-    print(f"📝 Transcribiendo audio de referencia para obtener texto de referencia...")
-    reference_transcription = whisper_model.transcribe(str(voice_reference_path), fp16=False)
-    reference_text = reference_transcription["text"]
-    print(f"✅ Texto de referencia obtenido: {reference_text[:50]}...")
-    
-    # Obtener instancia TTS con el modelo apropiado para el idioma de destino
-    print(f"🎯 Cargando modelo TTS para idioma de destino: {request.target_lang}")
-    tts = get_tts(request.target_lang)
-    
-    # Mensaje informativo sobre el modelo cargado
-    model_name = "F5TTS_Spanish" if request.target_lang == "es" else "F5TTS_Base"
-    print(f"✅ Modelo TTS cargado: {model_name} para idioma {request.target_lang}")
-    
+
+    # Recortar la referencia a la mejor ventana de voz y alinear su texto
+    reference_start = time.time()
+    reference_window = None
+    # Modelo de la etapa en las métricas: "whisper" si se transcribió la referencia, "vad" si no
+    reference_model = "vad"
+    with span("reference") as current:
+        if settings.reference_trim_enabled:
+            try:
+                reference_window = prepare_reference(voice_reference_path, reference_text)
+                voice_reference_path = Path(reference_window["path"])
+                reference_text = reference_window["text"]
+                if reference_window["aligned"] and not reference_window["cached"]:
+                    reference_model = "whisper"
+                set_attributes(current, **{
+                    "reference.original_seconds": reference_window["original_seconds"],
+                    "reference.seconds": reference_window["reference_seconds"],
+                    "reference.cached": reference_window["cached"]
+                })
+            except Exception as e:
+                logger.warning("No se pudo recortar el audio de referencia, se usa completo: %s", e)
+
+        # Transcribir el audio de referencia para obtener un texto de referencia adecuado
+        if reference_text is None:
+            logger.info("Transcribiendo audio de referencia para obtener texto de referencia")
+            with model_manager.lease("whisper") as whisper_model:
+                reference_transcription = run_on_pool("whisper", whisper_model.transcribe, str(voice_reference_path))
+            reference_text = reference_transcription["text"]
+            reference_model = "whisper"
+        set_attributes(current, model=reference_model)
+    observe_stage("reference", reference_model, time.time() - reference_start)
+    logger.debug("Texto de referencia: %s", reference_text)
+
     # Crear directorio único para la salida
     output_dir = Path("translate_audio_outputs") / uuid.uuid4().hex
     output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / "translated_audio.wav"
-    
+
+    # Pasos del solver, guidance y sway sampling según el nivel de la síntesis
+    tts_tier, tts_kwargs = get_tts_inference_kwargs(tts_tier)
+
+    # Mensaje informativo sobre el modelo a usar
+    tts_model_type = get_model_name_for_language(target_lang)
+    logger.info("Modelo TTS seleccionado", extra={"model": get_model_config(tts_model_type).name, "target_lang": target_lang})
+
     # Generar síntesis de voz:
-    # - Usa el texto transcrito del audio de referencia como ref_text
+    # - Usa el texto del audio de referencia como ref_text
     # - Usa el texto traducido como texto a generar (gen_text)
     try:
-        tts.infer(
-            ref_file=str(voice_reference_path),
-            ref_text=reference_text,  # Texto transcrito del audio de referencia
-            gen_text=translated_text,  # Texto traducido para generar
-            file_wave=str(output_file)
-        )
+        # Instancia TTS apropiada para el idioma de destino (en lote si está activado)
+        synthesis_start = time.time()
+        with span("synthesize", model=get_tts_model_key(tts_model_type), tier=tts_tier,
+                  nfe_step=tts_kwargs["nfe_step"], **{"text.chars": len(translated_text)}) as current:
+            synthesize(
+                target_lang,
+                ref_file=str(voice_reference_path),
+                ref_text=reference_text,  # Texto del audio de referencia
+                gen_text=translated_text,  # Texto traducido para generar
+                file_wave=str(output_file),
+                **tts_kwargs
+            )
+            output_seconds = sf.info(str(output_file)).duration
+            current.set_attribute("audio.seconds", output_seconds)
+        observe_stage("synthesize", get_tts_model_key(tts_model_type), time.time() - synthesis_start, output_seconds)
     except Exception as e:
         return {
             "error": f"Error al generar audio: {str(e)}",
@@ -141,340 +207,228 @@ def process_audio_translation(request) -> Dict[str, Any]:
             "transcription_time": round(transcription_time, 2),
             "translation_time": round(translation_time, 2)
         }
-    
+
     # Calcular tiempo de síntesis
     tts_time = time.time() - tts_start
-    print(f"✅ Síntesis de voz completada en {tts_time:.2f}s: {output_file}")
-    
+    logger.info("Síntesis de voz completada", extra={"seconds": round(tts_time, 2), "path": str(output_file)})
+
     # Almacenar resultados de la síntesis
     result["output_audio_path"] = str(output_file)
     result["tts_time"] = round(tts_time, 2)
+    result["tts_tier"] = tts_tier
+    result["nfe_step"] = tts_kwargs["nfe_step"]
     result["reference_text"] = reference_text  # Añadir el texto de referencia a la respuesta
-    
+    if reference_window is not None:
+        result["reference_window"] = {
+            key: reference_window[key] for key in (
+                "window_start", "window_end", "original_seconds", "reference_seconds",
+                "saved_seconds", "saved_frames_per_step", "trimmed"
+            )
+        }
+
+    return result
+
+def process_audio_translation(request) -> Dict[str, Any]:
+    """
+    Procesa un flujo completo: transcripción (Whisper) → traducción (M2M100) → síntesis de voz (F5TTS)
+
+    Args:
+        request: La solicitud con todos los parámetros necesarios
+
+    Returns:
+        Un diccionario con todos los resultados del proceso
+    """
+    # Iniciar temporizador total
+    total_start_time = time.time()
+    result = {}
+
+    # Verificar existencia de los archivos de audio
+    audio_path = Path(request.audio_path)
+    if not audio_path.exists():
+        return {
+            "error": f"El archivo de audio {request.audio_path} no existe"
+        }
+
+    voice_reference_path = Path(request.voice_reference_path)
+    if not voice_reference_path.exists():
+        return {
+            "error": f"El archivo de referencia de voz {request.voice_reference_path} no existe"
+        }
+
+    # Preparar la respuesta con la ruta del audio original
+    result["original_audio_path"] = str(audio_path)
+    result["target_lang"] = request.target_lang
+
+    pipeline_result = _run_translation_pipeline(
+        audio_path,
+        voice_reference_path,
+        request.source_lang,
+        request.target_lang,
+        getattr(request, "translation_tier", None),
+        tts_tier=getattr(request, "tts_tier", None)
+    )
+    if "error" in pipeline_result:
+        return pipeline_result
+    result.update(pipeline_result)
+
     # Calcular tiempo total
     total_time = time.time() - total_start_time
     result["total_time"] = round(total_time, 2)
-    
-    print(f"✅ Proceso de traducción de audio completado en {total_time:.2f}s")
-    
+
+    logger.info("Proceso de traducción de audio completado", extra={"seconds": round(total_time, 2)})
+
     return result
 
 async def process_audio_translation_file(request) -> Dict[str, Any]:
     """
     Procesa un flujo completo: transcripción (Whisper) → traducción (M2M100) → síntesis de voz (F5TTS)
     Recibiendo el archivo de audio como UploadFile
-    
+
     Args:
         request: La solicitud con todos los parámetros necesarios
-        
+
     Returns:
         Un diccionario con todos los resultados del proceso
     """
     # Iniciar temporizador total
     total_start_time = time.time()
     result = {}
-    
+
     # Crear directorio temporal
     with tempfile.TemporaryDirectory() as tmpdirname:
-        print(f"Archivos temporales en: {tmpdirname}")
-        
+        logger.debug("Archivos temporales en: %s", tmpdirname)
+
         # Guardar archivo de audio subido
         audio_path = Path(tmpdirname) / "audio.wav"
-        with audio_path.open("wb") as f:
-            shutil.copyfileobj(request.audio_file, f)
-        
-        # Guardar archivo de referencia de voz subido
         voice_reference_path = Path(tmpdirname) / "reference.wav"
-        with voice_reference_path.open("wb") as f:
-            shutil.copyfileobj(request.voice_reference_file, f)
-        
+        with span("upload") as current:
+            with audio_path.open("wb") as f:
+                shutil.copyfileobj(request.audio_file, f)
+
+            # Guardar archivo de referencia de voz subido
+            with voice_reference_path.open("wb") as f:
+                shutil.copyfileobj(request.voice_reference_file, f)
+            set_attributes(current, **{"upload.bytes": audio_path.stat().st_size + voice_reference_path.stat().st_size})
+
         # Verificar existencia de los archivos de audio
         if not audio_path.exists():
             return {
                 "error": f"El archivo de audio no existe"
             }
-        
+
         if not voice_reference_path.exists():
             return {
                 "error": f"El archivo de referencia de voz no existe"
             }
-        
+
         # Preparar la respuesta con la ruta del audio original
         result["original_audio_path"] = str(audio_path)
-        result["source_lang"] = request.source_lang
         result["target_lang"] = request.target_lang
-        
-        # 1. PASO UNO: TRANSCRIPCIÓN con Whisper
-        print(f"🎙️ Transcribiendo audio: {audio_path}")
-        transcription_start = time.time()
-        
-        # Crear objeto de solicitud para el servicio Whisper
-        whisper_request = WhisperRequest(str(audio_path))
-        
-        # Obtener modelo cargado (usar la función que evita recargar)
-        whisper_model = get_whisper_model()
-        
-        # Realizar transcripción
-        transcription_result = whisper_model.transcribe(str(audio_path), fp16=False)
-        transcribed_text = transcription_result["text"]
-        
-        # Calcular tiempo de transcripción
-        transcription_time = time.time() - transcription_start
-        print(f"✅ Transcripción completada en {transcription_time:.2f}s: {transcribed_text[:50]}...")
-        
-        # Almacenar resultados de la transcripción
-        result["transcribed_text"] = transcribed_text
-        result["transcription_time"] = round(transcription_time, 2)
-        
-        # 2. PASO DOS: TRADUCCIÓN con M2M100
-        print(f"🌐 Traduciendo de {request.source_lang} a {request.target_lang}")
-        translation_start = time.time()
-        
-        # Obtener modelo, tokenizador y dispositivo
-        model, tokenizer, device = get_translation_model()
-        
-        # Configurar idioma de origen
-        tokenizer.src_lang = request.source_lang
-        
-        # Codificar texto transcrito
-        encoded_text = tokenizer(transcribed_text, return_tensors="pt").to(device)
-        
-        # Generar traducción
-        generated_tokens = model.generate(
-            **encoded_text, 
-            forced_bos_token_id=tokenizer.get_lang_id(request.target_lang)
+
+        # El pipeline bloquea (pools de modelos, planificador TTS): corre en el threadpool
+        # para no frenar el event loop y que varias peticiones avancen a la vez
+        pipeline_result = await run_in_threadpool(
+            _run_translation_pipeline,
+            audio_path,
+            voice_reference_path,
+            request.source_lang,
+            request.target_lang,
+            getattr(request, "translation_tier", None),
+            tts_tier=getattr(request, "tts_tier", None)
         )
-        
-        # Decodificar traducción
-        translated_text = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
-        
-        # Calcular tiempo de traducción
-        translation_time = time.time() - translation_start
-        print(f"✅ Traducción completada en {translation_time:.2f}s: {translated_text[:50]}...")
-        
-        # Almacenar resultados de la traducción
-        result["translated_text"] = translated_text
-        result["translation_time"] = round(translation_time, 2)
-        
-        # 3. PASO TRES: SÍNTESIS DE VOZ con F5TTS
-        print(f"🔊 Generando audio con la traducción")
-        tts_start = time.time()
-        
-        # Primero, transcribir el audio de referencia para obtener un texto de referencia adecuado
-        print(f"📝 Transcribiendo audio de referencia para obtener texto de referencia...")
-        reference_transcription = whisper_model.transcribe(str(voice_reference_path), fp16=False)
-        reference_text = reference_transcription["text"]
-        print(f"✅ Texto de referencia obtenido: {reference_text[:50]}...")
-        
-        # Obtener instancia TTS con el modelo apropiado para el idioma de destino
-        print(f"🎯 Cargando modelo TTS para idioma de destino: {request.target_lang}")
-        tts = get_tts(request.target_lang)
-        
-        # Mensaje informativo sobre el modelo cargado
-        model_name = "F5TTS_Spanish" if request.target_lang == "es" else "F5TTS_Base"
-        print(f"✅ Modelo TTS cargado: {model_name} para idioma {request.target_lang}")
-        
-        # Crear directorio único para la salida
-        output_dir = Path("translate_audio_outputs") / uuid.uuid4().hex
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_file = output_dir / "translated_audio.wav"
-        
-        # Generar síntesis de voz:
-        # - Usa el texto transcrito del audio de referencia como ref_text
-        # - Usa el texto traducido como texto a generar (gen_text)
-        try:
-            tts.infer(
-                ref_file=str(voice_reference_path),
-                ref_text=reference_text,  # Texto transcrito del audio de referencia
-                gen_text=translated_text,  # Texto traducido para generar
-                file_wave=str(output_file)
-            )
-        except Exception as e:
-            return {
-                "error": f"Error al generar audio: {str(e)}",
-                "transcribed_text": transcribed_text,
-                "translated_text": translated_text,
-                "transcription_time": round(transcription_time, 2),
-                "translation_time": round(translation_time, 2)
-            }
-        
-        # Calcular tiempo de síntesis
-        tts_time = time.time() - tts_start
-        print(f"✅ Síntesis de voz completada en {tts_time:.2f}s: {output_file}")
-        
-        # Almacenar resultados de la síntesis
-        result["output_audio_path"] = str(output_file)
-        result["tts_time"] = round(tts_time, 2)
-        result["reference_text"] = reference_text  # Añadir el texto de referencia a la respuesta
-        
+        if "error" in pipeline_result:
+            return pipeline_result
+        result.update(pipeline_result)
+
         # Calcular tiempo total
         total_time = time.time() - total_start_time
         result["total_time"] = round(total_time, 2)
-        
-        print(f"✅ Proceso de traducción de audio completado en {total_time:.2f}s")
-        
+
+        logger.info("Proceso de traducción de audio completado", extra={"seconds": round(total_time, 2)})
+
         return result
 
 
 async def process_audio_translation_with_files(
     audio_file: UploadFile,
     voice_reference_file: UploadFile,
-    source_lang: str,
+    source_lang: Optional[str],
     target_lang: str,
-    model: str = "F5TTS_v1_Base"
+    model: str = "F5TTS_v1_Base",
+    translation_tier: Optional[str] = None,
+    tts_tier: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Procesa un flujo completo: transcripción (Whisper) → traducción (M2M100) → síntesis de voz (F5TTS)
     usando archivos directamente recibidos como UploadFile
-    
+
     Args:
         audio_file: Archivo de audio a transcribir y traducir
         voice_reference_file: Archivo de audio de referencia para la síntesis de voz
-        source_lang: Código del idioma de origen
+        source_lang: Código del idioma de origen (None para detectarlo con Whisper)
         target_lang: Código del idioma de destino
         model: Modelo TTS a utilizar
-        
+        translation_tier: Nivel de generación de la traducción ('fast' o 'quality')
+        tts_tier: Nivel de velocidad/calidad de la síntesis ('draft', 'standard' o 'high')
+
     Returns:
         Un diccionario con todos los resultados del proceso
     """
     # Iniciar temporizador total
     total_start_time = time.time()
     result = {}
-    
+
     # Crear archivos temporales para procesar los uploads
     temp_audio_path = None
     temp_voice_ref_path = None
-    
+
     try:
         # Crear directorio temporal
         temp_dir = tempfile.mkdtemp()
-        
+
         # Guardar archivo de audio temporal
         audio_extension = Path(audio_file.filename).suffix if audio_file.filename else '.wav'
         temp_audio_path = Path(temp_dir) / f"audio{audio_extension}"
-        
-        with open(temp_audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio_file.file, buffer)
-        
+
         # Guardar archivo de referencia de voz temporal
         voice_extension = Path(voice_reference_file.filename).suffix if voice_reference_file.filename else '.wav'
         temp_voice_ref_path = Path(temp_dir) / f"voice_ref{voice_extension}"
-        
-        with open(temp_voice_ref_path, "wb") as buffer:
-            shutil.copyfileobj(voice_reference_file.file, buffer)
-        
+
+        with span("upload") as current:
+            with open(temp_audio_path, "wb") as buffer:
+                shutil.copyfileobj(audio_file.file, buffer)
+            with open(temp_voice_ref_path, "wb") as buffer:
+                shutil.copyfileobj(voice_reference_file.file, buffer)
+            set_attributes(current, **{"upload.bytes": temp_audio_path.stat().st_size + temp_voice_ref_path.stat().st_size})
+
         # Preparar la respuesta
         result["original_audio_filename"] = audio_file.filename or "uploaded_audio"
-        result["source_lang"] = source_lang
         result["target_lang"] = target_lang
-        
-        # 1. PASO UNO: TRANSCRIPCIÓN con Whisper
-        print(f"🎙️ Transcribiendo audio: {audio_file.filename}")
-        transcription_start = time.time()
-        
-        # Obtener modelo cargado (usar la función que evita recargar)
-        whisper_model = get_whisper_model()
-        
-        # Realizar transcripción
-        transcription_result = whisper_model.transcribe(str(temp_audio_path), fp16=False)
-        transcribed_text = transcription_result["text"]
-        
-        # Calcular tiempo de transcripción
-        transcription_time = time.time() - transcription_start
-        print(f"✅ Transcripción completada en {transcription_time:.2f}s: {transcribed_text[:50]}...")
-        
-        # Almacenar resultados de la transcripción
-        result["transcribed_text"] = transcribed_text
-        result["transcription_time"] = round(transcription_time, 2)
-        
-        # 2. PASO DOS: TRADUCCIÓN con M2M100
-        print(f"🌐 Traduciendo de {source_lang} a {target_lang}")
-        translation_start = time.time()
-        
-        # Obtener modelo, tokenizador y dispositivo
-        model_instance, tokenizer, device = get_translation_model()
-        
-        # Configurar idioma de origen
-        tokenizer.src_lang = source_lang
-        
-        # Codificar texto transcrito
-        encoded_text = tokenizer(transcribed_text, return_tensors="pt").to(device)
-        
-        # Generar traducción
-        generated_tokens = model_instance.generate(
-            **encoded_text, 
-            forced_bos_token_id=tokenizer.get_lang_id(target_lang)
+
+        # El pipeline bloquea (pools de modelos, planificador TTS): corre en el threadpool
+        # para no frenar el event loop y que varias peticiones avancen a la vez
+        pipeline_result = await run_in_threadpool(
+            _run_translation_pipeline,
+            temp_audio_path,
+            temp_voice_ref_path,
+            source_lang,
+            target_lang,
+            translation_tier,
+            reference_text=PLACEHOLDER_REFERENCE_TEXT,
+            tts_tier=tts_tier
         )
-        
-        # Decodificar traducción
-        translated_text = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
-        
-        # Calcular tiempo de traducción
-        translation_time = time.time() - translation_start
-        print(f"✅ Traducción completada en {translation_time:.2f}s: {translated_text[:50]}...")
-        
-        # Almacenar resultados de la traducción
-        result["translated_text"] = translated_text
-        result["translation_time"] = round(translation_time, 2)
-        
-        # 3. PASO TRES: SÍNTESIS DE VOZ con F5TTS
-        print(f"🔊 Generando audio con la traducción")
-        tts_start = time.time()
-        
-        # Transcribir el audio de referencia para obtener un texto de referencia adecuado
-        print(f"📝 Transcribiendo audio de referencia para obtener texto de referencia...")
-        #reference_transcription = whisper_model.transcribe(str(temp_voice_ref_path), fp16=False)
-        #reference_text = reference_transcription["text"]
-        reference_text = ("Mientras mas corto es el audio el modelo es mejor. ")
-        print(f"✅ Texto de referencia obtenido: {reference_text[:50]}...")
-        
-        # Obtener instancia TTS con el modelo apropiado para el idioma de destino
-        print(f"🎯 Cargando modelo TTS para idioma de destino: {target_lang}")
-        tts = get_tts(target_lang)
-        
-        # Mensaje informativo sobre el modelo cargado
-        model_name = "F5TTS_Spanish" if target_lang == "es" else "F5TTS_Base"
-        print(f"✅ Modelo TTS cargado: {model_name} para idioma {target_lang}")
-        
-        # Crear directorio único para la salida
-        output_dir = Path("translate_audio_outputs") / uuid.uuid4().hex
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_file = output_dir / "translated_audio.wav"
-        
-        # Generar síntesis de voz
-        try:
-            tts.infer(
-                ref_file=str(temp_voice_ref_path),
-                ref_text=reference_text,  # Texto transcrito del audio de referencia
-                gen_text=translated_text,  # Texto traducido para generar
-                file_wave=str(output_file)
-            )
-        except Exception as e:
-            return {
-                "error": f"Error al generar audio: {str(e)}",
-                "transcribed_text": transcribed_text,
-                "translated_text": translated_text,
-                "transcription_time": round(transcription_time, 2),
-                "translation_time": round(translation_time, 2)
-            }
-        
-        # Calcular tiempo de síntesis
-        tts_time = time.time() - tts_start
-        print(f"✅ Síntesis de voz completada en {tts_time:.2f}s: {output_file}")
-        
-        # Almacenar resultados de la síntesis
-        result["output_audio_path"] = str(output_file)
-        result["tts_time"] = round(tts_time, 2)
-        result["reference_text"] = reference_text  # Añadir el texto de referencia a la respuesta
-        
+        if "error" in pipeline_result:
+            return pipeline_result
+        result.update(pipeline_result)
+
         # Calcular tiempo total
         total_time = time.time() - total_start_time
         result["total_time"] = round(total_time, 2)
-        
-        print(f"✅ Proceso de traducción de audio completado en {total_time:.2f}s")
-        
+
+        logger.info("Proceso de traducción de audio completado", extra={"seconds": round(total_time, 2)})
+
         return result
-        
+
     finally:
         # Limpiar archivos temporales
         try:
@@ -485,4 +439,4 @@ async def process_audio_translation_with_files(
             if 'temp_dir' in locals():
                 shutil.rmtree(temp_dir, ignore_errors=True)
         except Exception as e:
-            print(f"⚠️ Error limpiando archivos temporales: {e}")
\ No newline at end of file
+            logger.warning("Error limpiando archivos temporales: %s", e)
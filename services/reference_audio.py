@@ -0,0 +1,250 @@
+"""
+Preparación del audio de referencia para F5TTS.
+
+F5TTS concatena la referencia a la secuencia generada, así que cada segundo de
+referencia se paga en todos los pasos del sampler. Los usuarios suelen subir muestras
+de 30 s o más: acá se elige la mejor ventana de 5–10 s y se recorta.
+
+1. Whisper transcribe la referencia completa con marcas de tiempo por segmento.
+2. Las ventanas candidatas son tramos de segmentos consecutivos que suman entre
+   Settings.reference_min_seconds y Settings.reference_max_seconds.
+3. Cada ventana se puntúa con un VAD por energía (proporción de voz, bordes en
+   silencio y nivel de la voz) y se queda la mejor.
+4. El texto de referencia es el de los segmentos de esa ventana, así queda alineado
+   con el audio recortado.
+
+Si quien llama ya trae el texto de la referencia (el endpoint con uploads usa un texto
+fijo justamente para no transcribir), no se pasa por Whisper: la ventana se elige solo
+por VAD y se conserva el texto recibido (Settings.reference_align_with_text = True
+vuelve a alinear con Whisper). Es un compromiso: el texto deja de corresponder
+exactamente al recorte, a cambio de no sumar una transcripción completa a la petición.
+
+El resultado se cachea por contenido del archivo (la misma voz se reutiliza entre
+peticiones) en una LRU de Settings.reference_cache_max_entries entradas; los recortes
+que salen de la LRU se borran del disco y el directorio se poda por antigüedad al mismo
+límite (cubre los recortes que quedaron de ejecuciones o workers anteriores).
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from core.config import settings
+from core.executors import run_on_pool
+from core.metrics import record_cache
+from core.model_manager import model_manager
+from services.whisper_service import SAMPLE_RATE, load_audio_clip
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.03
+# Frames de mel por segundo de F5TTS (24 kHz, hop 256)
+F5TTS_FRAMES_PER_SECOND = 24000 / 256
+# F5TTS recorta por su cuenta las referencias a ~12 s
+F5TTS_MAX_REFERENCE_SECONDS = 12.0
+BOUNDARY_PADDING_SECONDS = 0.1
+
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def frame_energy_db(audio: np.ndarray) -> np.ndarray:
+    """Energía en dB por frame de 30 ms (vectorizado)"""
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    frames = audio[:len(audio) // frame * frame].reshape(-1, frame)
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def voice_activity(energy_db: np.ndarray) -> np.ndarray:
+    """VAD por energía: voz si supera el piso de ruido + 10 dB (y no está 40 dB debajo del pico)"""
+    if not len(energy_db):
+        return np.zeros(0, dtype=bool)
+    threshold = max(np.percentile(energy_db, 10) + 10, energy_db.max() - 40)
+    return energy_db > threshold
+
+
+def score_window(energy_db: np.ndarray, speech: np.ndarray, start: float, end: float) -> float:
+    """
+    Puntaje de una ventana: mucha voz, bordes en silencio (no corta palabras) y voz
+    con buen nivel respecto del pico del archivo
+    """
+    first = int(start / FRAME_SECONDS)
+    last = max(int(end / FRAME_SECONDS), first + 1)
+    window_speech = speech[first:last]
+    if not len(window_speech):
+        return 0.0
+
+    speech_ratio = window_speech.mean()
+    edge = 3  # ~90 ms en cada borde
+    quiet_edges = (1 - speech[first:first + edge].mean()) + (1 - speech[max(last - edge, 0):last].mean())
+    voiced_energy = energy_db[first:last][window_speech]
+    clarity = 1 - min((energy_db.max() - voiced_energy.mean()) / 40, 1) if len(voiced_energy) else 0.0
+    return float(speech_ratio + 0.25 * quiet_edges + 0.25 * clarity)
+
+
+def candidate_windows(segments: list, min_seconds: float, max_seconds: float):
+    """Tramos de segmentos consecutivos de Whisper cuya duración está entre min y max"""
+    for i, first in enumerate(segments):
+        for j in range(i, len(segments)):
+            duration = segments[j]["end"] - first["start"]
+            if duration > max_seconds:
+                break
+            if duration >= min_seconds:
+                yield first["start"], segments[j]["end"], segments[i:j + 1]
+
+
+def _transcribe(audio) -> dict:
+    with model_manager.lease("whisper") as whisper_model:
+        return run_on_pool("whisper", whisper_model.transcribe, audio)
+
+
+def _best_vad_window(energy_db: np.ndarray, speech: np.ndarray, original_seconds: float, length: float):
+    """Ventana deslizante de largo fijo (pasos de 0,5 s) con mejor puntaje de VAD: (inicio, fin, puntaje)"""
+    starts = np.arange(0, original_seconds - length, 0.5)
+    scores = [score_window(energy_db, speech, s, s + length) for s in starts]
+    start = float(starts[int(np.argmax(scores))]) if len(scores) else 0.0
+    return start, start + length, max(scores) if scores else 0.0
+
+
+def _export_window(source_path: Path, start: float, end: float, output_path: Path):
+    from pydub import AudioSegment
+
+    # Se recorta el archivo original (no el de 16 kHz) para no perder calidad en la clonación
+    AudioSegment.from_file(str(source_path))[int(start * 1000):int(end * 1000)].export(str(output_path), format="wav")
+
+
+def _cache_get(key: tuple) -> Optional[dict]:
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached is None or not Path(cached["path"]).exists():
+        return None
+    if cached["trimmed"]:
+        # La poda del directorio es por antigüedad: un recorte en uso se mantiene al día
+        os.utime(cached["path"])
+    return cached
+
+
+def _cache_put(key: tuple, report: dict):
+    max_entries = max(settings.reference_cache_max_entries, 1)
+    with _cache_lock:
+        _cache[key] = report
+        _cache.move_to_end(key)
+        evicted = [_cache.popitem(last=False)[1] for _ in range(len(_cache) - max_entries)]
+    for entry in evicted:
+        if entry["trimmed"]:
+            Path(entry["path"]).unlink(missing_ok=True)
+
+    if report["trimmed"]:
+        trims = sorted(Path(settings.reference_cache_dir).glob("*.wav"), key=lambda path: path.stat().st_mtime)
+        for path in trims[:-max_entries]:
+            path.unlink(missing_ok=True)
+
+
+def prepare_reference(reference_path, reference_text: Optional[str] = None) -> dict:
+    """
+    Recorta la referencia a la mejor ventana y devuelve el texto alineado
+
+    Args:
+        reference_path: Audio de referencia subido por el usuario
+        reference_text: Texto de la referencia si se conoce. Con texto no se transcribe: el
+            recorte se elige solo por VAD y el texto se conserva (salvo reference_align_with_text)
+
+    Returns:
+        Diccionario con path y text a pasar a F5TTS, la ventana elegida y el cómputo ahorrado
+    """
+    reference_path = Path(reference_path)
+    digest = hashlib.md5(reference_path.read_bytes()).hexdigest()
+    # Un recorte depende solo del contenido; una referencia corta se usa tal cual, así que
+    # su resultado depende también de la ruta y del texto recibido
+    align = reference_text is None or settings.reference_align_with_text
+    trimmed_key = (digest, settings.reference_min_seconds, settings.reference_max_seconds)
+    if not align:
+        # Recorte solo por VAD: el texto devuelto es el recibido
+        trimmed_key += ("vad", reference_text)
+    untrimmed_key = trimmed_key + (str(reference_path), reference_text)
+    cached = _cache_get(trimmed_key) or _cache_get(untrimmed_key)
+    if cached:
+        record_cache("reference", True)
+        return {**cached, "cached": True}
+    record_cache("reference", False)
+
+    audio = load_audio_clip(reference_path)
+    original_seconds = len(audio) / SAMPLE_RATE
+    report = {
+        "path": str(reference_path),
+        "original_seconds": round(original_seconds, 2),
+        "window_start": 0.0,
+        "window_end": round(original_seconds, 2),
+        "trimmed": False,
+        "aligned": False,
+        "cached": False
+    }
+
+    if original_seconds <= settings.reference_max_seconds:
+        # Ya es corta: se usa entera
+        report["text"] = reference_text if reference_text is not None else _transcribe(audio)["text"].strip()
+        report["aligned"] = reference_text is None
+    else:
+        energy_db = frame_energy_db(audio)
+        speech = voice_activity(energy_db)
+        segments = _transcribe(audio).get("segments", []) if align else []
+
+        best = None
+        for start, end, window_segments in candidate_windows(segments, settings.reference_min_seconds,
+                                                             settings.reference_max_seconds):
+            score = score_window(energy_db, speech, start, end)
+            if best is None or score > best[0]:
+                best = (score, start, end, window_segments)
+
+        if best is not None:
+            score, start, end, window_segments = best
+            text = " ".join(segment["text"].strip() for segment in window_segments)
+        else:
+            # Ningún tramo de segmentos entra en el rango (por ejemplo un único segmento muy
+            # largo) o no se alinea: ventana deslizante de largo máximo por VAD
+            start, end, score = _best_vad_window(energy_db, speech, original_seconds, settings.reference_max_seconds)
+            text = None if align else reference_text
+
+        start = max(start - BOUNDARY_PADDING_SECONDS, 0.0)
+        end = min(end + BOUNDARY_PADDING_SECONDS, original_seconds)
+        output_dir = Path(settings.reference_cache_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / f"{digest}_{start:.2f}_{end:.2f}.wav"
+        _export_window(reference_path, start, end, output_path)
+        if text is None:
+            # Alineado pero sin tramo de segmentos que sirva: se transcribe solo el recorte
+            text = _transcribe(str(output_path))["text"].strip()
+
+        report.update({
+            "path": str(output_path),
+            "text": text,
+            "window_start": round(start, 2),
+            "window_end": round(end, 2),
+            "score": round(score, 3),
+            "trimmed": True,
+            "aligned": align
+        })
+
+    # F5TTS ya recortaría a ~12 s por su cuenta: el ahorro se mide contra eso
+    effective_before = min(original_seconds, F5TTS_MAX_REFERENCE_SECONDS)
+    reference_seconds = report["window_end"] - report["window_start"]
+    saved_seconds = max(effective_before - reference_seconds, 0.0)
+    report.update({
+        "reference_seconds": round(reference_seconds, 2),
+        "saved_seconds": round(saved_seconds, 2),
+        "saved_frames_per_step": int(saved_seconds * F5TTS_FRAMES_PER_SECOND)
+    })
+    if report["trimmed"]:
+        logger.info("Referencia recortada", extra={
+            key: report[key] for key in ("window_start", "window_end", "original_seconds", "saved_frames_per_step")
+        })
+
+    _cache_put(trimmed_key if report["trimmed"] else untrimmed_key, report)
+    return report
@@ -1,66 +1,516 @@
+import logging
+import shutil
+import threading
 import time
+from pathlib import Path
+from typing import Optional
+
 import torch
-from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
+from transformers import AutoConfig, AutoTokenizer
+from transformers.modeling_utils import no_init_weights
+from transformers.models.auto.modeling_auto import MODEL_FOR_SEQ_TO_SEQ_CAUSAL_LM_MAPPING
+
+from core.compile import compile_hot_modules
+from core.config import settings
+from core.executors import get_pool_settings, run_on_pool
+from core.metrics import observe_stage, record_cache
+from core.model_manager import model_manager
+from core.precision import apply_precision
+from core.weights import load_pretrained_mmap
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "dynamic_int8")
+TRANSLATION_BACKENDS = ("torch", "onnx")
+GENERATION_TIERS = ("fast", "quality")
+# Módulos que concentran el cómputo (precisión reducida y compilación)
+TRANSLATION_HOT_MODULES = ["model.encoder", "model.decoder"]
+
+# NLLB usa códigos FLORES-200 en lugar de ISO 639-1
+NLLB_LANGUAGE_CODES = {
+    "en": "eng_Latn", "es": "spa_Latn", "zh": "zho_Hans", "fr": "fra_Latn",
+    "de": "deu_Latn", "it": "ita_Latn", "pt": "por_Latn", "ja": "jpn_Jpan"
+}
+
+# El tokenizador es compartido y src_lang es estado mutable: se protege la pareja
+# "configurar idioma + codificar" para que peticiones concurrentes no se mezclen
+_tokenizer_lock = threading.Lock()
+
+
+def _quantized_cache_path(model_name: str) -> Path:
+    """
+    Ruta de los pesos cuantizados en disco. Incluye la versión de torch porque
+    el formato de los pesos empaquetados puede cambiar entre versiones.
+    """
+    safe_name = model_name.replace("/", "--")
+    return Path(settings.translation_cache_dir) / f"{safe_name}-dynamic_int8-tensors-torch{torch.__version__}.pt"
+
+
+def _model_class(model_name: str):
+    """Clase seq2seq concreta del checkpoint (M2M100, MarianMT, NLLB, ...)"""
+    return MODEL_FOR_SEQ_TO_SEQ_CAUSAL_LM_MAPPING[type(AutoConfig.from_pretrained(model_name))]
+
+
+def _quantize_dynamic_int8(model):
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _quantized_linears(model) -> dict:
+    """Capas Linear cuantizadas (pesos empaquetados en _packed_params) por nombre"""
+    return {name: module for name, module in model.named_modules()
+            if hasattr(module, "_packed_params") and callable(getattr(module, "_weight_bias", None))}
+
+
+def _quantized_tensors(model) -> dict:
+    """
+    Pesos del modelo cuantizado como tensores comunes: el state_dict trae los pesos int8
+    empaquetados como tuplas y dtypes, que solo se leen deserializando objetos arbitrarios.
+    Acá cada peso int8 se guarda como enteros + escala y punto cero, así el archivo se
+    lee con torch.load(weights_only=True)
+    """
+    tensors = {key: value for key, value in model.state_dict().items()
+               if isinstance(value, torch.Tensor) and not value.is_quantized}
+    for name, module in _quantized_linears(model).items():
+        weight, bias = module._weight_bias()
+        tensors[f"{name}.qweight.int_repr"] = weight.int_repr()
+        if weight.qscheme() in (torch.per_channel_affine, torch.per_channel_symmetric):
+            tensors[f"{name}.qweight.scales"] = weight.q_per_channel_scales()
+            tensors[f"{name}.qweight.zero_points"] = weight.q_per_channel_zero_points()
+            tensors[f"{name}.qweight.axis"] = torch.tensor(weight.q_per_channel_axis())
+        else:
+            tensors[f"{name}.qweight.scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            tensors[f"{name}.qweight.zero_point"] = torch.tensor(weight.q_zero_point())
+        if bias is not None:
+            tensors[f"{name}.qbias"] = bias
+    return tensors
+
+
+def _load_quantized_tensors(model, tensors: dict):
+    """Rearma el state_dict de las capas cuantizadas a partir de _quantized_tensors() y lo carga"""
+    expected = model.state_dict()
+    state_dict = type(expected)(tensors)
+    for name in _quantized_linears(model):
+        int_repr = state_dict.pop(f"{name}.qweight.int_repr")
+        if f"{name}.qweight.scales" in state_dict:
+            weight = torch._make_per_channel_quantized_tensor(
+                int_repr, state_dict.pop(f"{name}.qweight.scales"), state_dict.pop(f"{name}.qweight.zero_points"),
+                int(state_dict.pop(f"{name}.qweight.axis"))
+            )
+        else:
+            weight = torch._make_per_tensor_quantized_tensor(
+                int_repr, float(state_dict.pop(f"{name}.qweight.scale")), int(state_dict.pop(f"{name}.qweight.zero_point"))
+            )
+        state_dict[f"{name}._packed_params.dtype"] = torch.qint8
+        state_dict[f"{name}._packed_params._packed_params"] = (weight, state_dict.pop(f"{name}.qbias", None))
+    # Las versiones de cada módulo definen cómo se leen sus claves
+    state_dict._metadata = getattr(expected, "_metadata", None)
+    model.load_state_dict(state_dict)
+
+
+def _load_dynamic_int8_model(model_name: str):
+    """
+    Carga el modelo con cuantización dinámica int8 en las capas Linear.
+    La primera vez convierte los pesos fp32 y guarda el resultado en disco;
+    los arranques siguientes construyen la estructura vacía y cargan directamente
+    los pesos cuantizados, sin leer ni convertir los pesos fp32.
+    """
+    cache_path = _quantized_cache_path(model_name)
+
+    record_cache("translation_weights", cache_path.exists())
+    if cache_path.exists():
+        logger.info("Cargando pesos cuantizados int8 desde caché", extra={"path": str(cache_path)})
+        config = AutoConfig.from_pretrained(model_name)
+        with no_init_weights():
+            model = _model_class(model_name)(config)
+        model = _quantize_dynamic_int8(model)
+        _load_quantized_tensors(model, torch.load(cache_path, map_location="cpu", weights_only=True))
+        return model.eval()
+
+    logger.info("Cuantizando modelo de traducción a int8 (solo la primera vez)")
+    model = _model_class(model_name).from_pretrained(model_name).eval()
+    model = _quantize_dynamic_int8(model)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    torch.save(_quantized_tensors(model), tmp_path)
+    tmp_path.replace(cache_path)
+    logger.info("Pesos cuantizados guardados", extra={"path": str(cache_path)})
+    return model
+
+
+def _onnx_export_dir(model_name: str) -> Path:
+    """
+    Directorio del grafo ONNX exportado. Por defecto se guarda junto a la caché
+    de HuggingFace (~/.cache/huggingface/onnx/<modelo>) para reutilizarlo entre arranques.
+    """
+    if settings.translation_onnx_dir:
+        base_dir = Path(settings.translation_onnx_dir)
+    else:
+        from huggingface_hub.constants import HF_HUB_CACHE
+        base_dir = Path(HF_HUB_CACHE).parent / "onnx"
+    return base_dir / model_name.replace("/", "--")
+
+
+def _load_onnx_model(model_name: str, device):
+    """
+    Carga el modelo como encoder + decoder (con past key-values) en ONNX Runtime.
+    La primera vez exporta el grafo desde PyTorch; luego lo lee directamente del disco.
+    El objeto resultante expone el mismo generate() que el modelo de transformers.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError(
+            "El backend 'onnx' requiere optimum con onnxruntime (pip install optimum[onnxruntime])"
+        ) from e
+
+    provider = "CUDAExecutionProvider" if torch.device(device).type == "cuda" else "CPUExecutionProvider"
+    export_dir = _onnx_export_dir(model_name)
+
+    record_cache("translation_weights", (export_dir / "encoder_model.onnx").exists())
+    if (export_dir / "encoder_model.onnx").exists():
+        logger.info("Cargando grafo ONNX desde caché", extra={"path": str(export_dir)})
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True, provider=provider)
+
+    logger.info("Exportando modelo de traducción a ONNX (solo la primera vez)")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True, provider=provider)
+
+    tmp_dir = export_dir.with_name(export_dir.name + ".tmp")
+    model.save_pretrained(tmp_dir)
+    shutil.rmtree(export_dir, ignore_errors=True)  # Restos de una exportación incompleta
+    tmp_dir.replace(export_dir)
+    logger.info("Grafo ONNX guardado", extra={"path": str(export_dir)})
+    return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True, provider=provider)
+
+
+def load_translation_model(model_name: str, device, quantization: str = "none", backend: str = "torch"):
+    """
+    Carga un modelo de traducción seq2seq (M2M100, MarianMT, NLLB) y su tokenizador
+    sin pasar por la caché global
+
+    Args:
+        model_name: Nombre o ruta del checkpoint en HuggingFace
+        device: Dispositivo torch donde ubicar el modelo
+        quantization: 'none' (fp32) o 'dynamic_int8' (solo CPU, backend torch)
+        backend: 'torch' (PyTorch eager) o 'onnx' (ONNX Runtime)
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Modo de cuantización desconocido: {quantization}. Opciones: {list(QUANTIZATION_MODES)}")
+    if backend not in TRANSLATION_BACKENDS:
+        raise ValueError(f"Backend de traducción desconocido: {backend}. Opciones: {list(TRANSLATION_BACKENDS)}")
+
+    if backend == "onnx":
+        if quantization != "none":
+            logger.warning("La cuantización solo aplica al backend torch, se ignora con ONNX", extra={"quantization": quantization})
+        model = _load_onnx_model(model_name, device)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return model, tokenizer
+
+    if quantization == "dynamic_int8" and torch.device(device).type != "cpu":
+        # La cuantización dinámica de PyTorch solo tiene kernels para CPU
+        logger.warning("La cuantización dinámica int8 solo está disponible en CPU, usando fp32", extra={"device": str(device)})
+        quantization = "none"
+
+    if quantization == "dynamic_int8":
+        model = _load_dynamic_int8_model(model_name)
+    elif settings.weights_mmap and torch.device(device).type == "cpu":
+        # Pesos mapeados desde safetensors: carga perezosa y páginas compartidas entre procesos
+        model = load_pretrained_mmap(_model_class(model_name), model_name)
+    else:
+        model = _model_class(model_name).from_pretrained(model_name)
+        model = model.to(device).eval()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return model, tokenizer
+
+
+def _make_translation_loader(model_key: str, model_name: Optional[str] = None):
+    """
+    Crea el cargador registrado en el gestor de modelos. Devuelve (modelo, tokenizador, dispositivo).
+    Sin model_name se usa Settings.translation_model_name, leído al cargar (recargas en caliente)
+    """
+    def load(device: str):
+        if device == "auto":
+            device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        else:
+            device = torch.device(device)
+        checkpoint = model_name or settings.translation_model_name
+        logger.info("Cargando modelo de traducción", extra={
+            "model": checkpoint, "device": str(device), "backend": settings.translation_backend,
+            "quantization": settings.translation_quantization
+        })
+
+        # Cargar modelo y tokenizador
+        model, tokenizer = load_translation_model(
+            checkpoint, device, settings.translation_quantization, settings.translation_backend
+        )
+        if settings.translation_backend == "torch":
+            # generate() llama al decoder una vez por token: es el módulo más caliente
+            apply_precision(model_key, model, TRANSLATION_HOT_MODULES,
+                            get_pool_settings(model_key).precision, device.type)
+            compile_hot_modules(model_key, model, TRANSLATION_HOT_MODULES)
+        return model, tokenizer, device
+    return load
+
+
+def get_translation_model_key(model_name: str) -> str:
+    """
+    Nombre en el gestor de modelos de un checkpoint de traducción: 'translation' para el
+    predeterminado y 'translation_<checkpoint>' para los de la tabla de rutas (comparten el
+    pool 'translation' de Settings.model_pools)
+    """
+    if model_name == settings.translation_model_name:
+        return "translation"
+    return "translation_" + model_name.split("/")[-1].replace("-", "_").replace(".", "_")
+
+
+def resolve_translation_route(source_lang: str, target_lang: str):
+    """
+    Ruta de traducción para un par de idiomas según Settings.translation_routes
+
+    Returns:
+        Tupla (nombre en el gestor de modelos, checkpoint, nivel por defecto de la ruta o None)
+    """
+    route = settings.translation_routes.get(f"{source_lang}-{target_lang}")
+    if route is None:
+        return "translation", settings.translation_model_name, None
+    return _register_route_model(route.model), route.model, route.tier
+
+
+_route_registration_lock = threading.Lock()
+
+
+def _register_route_model(model_name: str) -> str:
+    """
+    Registra en el gestor el checkpoint de una ruta si todavía no lo está (la tabla puede
+    cambiar con una recarga desde /admin) y devuelve su nombre en el gestor
+    """
+    model_key = get_translation_model_key(model_name)
+    with _route_registration_lock:
+        if model_key not in model_manager.registered_models():
+            model_manager.register(model_key, _make_translation_loader(model_key, model_name))
+    return model_key
+
+
+def translation_route_model_keys() -> list:
+    """Nombres en el gestor de los checkpoints de la tabla de rutas (los registra si hace falta)"""
+    keys = []
+    for route in settings.translation_routes.values():
+        model_key = _register_route_model(route.model)
+        if model_key not in keys:
+            keys.append(model_key)
+    return keys
+
+
+model_manager.register("translation", _make_translation_loader("translation"))
+# Solo se registran: se precargan con Settings.preload_translation_routes o se cargan en el primer uso
+translation_route_model_keys()
 
-# Modelo y tokenizador como variables globales para cargarlos solo una vez
-_m2m100_model = None
-_m2m100_tokenizer = None
-_is_preloaded = False  # Nueva bandera para indicar si el modelo fue precargado
 
 def get_translation_model(force_load=False):
-    global _m2m100_model, _m2m100_tokenizer, _is_preloaded
-    
-    # Si el modelo ya está cargado (ya sea por precarga o carga normal),
-    # simplemente lo devolvemos sin recargarlo
-    if (_m2m100_model is not None and _m2m100_tokenizer is not None) and not force_load:
-        return _m2m100_model, _m2m100_tokenizer, torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    
-    # Si llegamos aquí, necesitamos cargar el modelo
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    print(f"Cargando modelo de traducción en dispositivo: {device}")
-    
-    # Cargar modelo y tokenizador
-    _m2m100_model = M2M100ForConditionalGeneration.from_pretrained("facebook/m2m100_418M")
-    _m2m100_model = _m2m100_model.to(device)
-    _m2m100_tokenizer = M2M100Tokenizer.from_pretrained("facebook/m2m100_418M")
-    _is_preloaded = True
-    
-    return _m2m100_model, _m2m100_tokenizer, device
+    # El gestor de modelos devuelve la instancia compartida o la carga una sola vez
+    return model_manager.get("translation", force_load=force_load)
+
+
+def get_generation_kwargs(tier: Optional[str], input_tokens: int):
+    """
+    Parámetros de generate() para el nivel de latencia indicado
+
+    Args:
+        tier: 'fast' (greedy) o 'quality' (beam search). None usa el nivel por defecto de Settings
+        input_tokens: Cantidad de tokens de la entrada, para acotar la longitud de la salida
+
+    Returns:
+        Tupla (nivel efectivo, kwargs para generate())
+    """
+    tier = tier or settings.translation_default_tier
+    if tier not in GENERATION_TIERS:
+        raise ValueError(f"Nivel de generación desconocido: {tier}. Opciones: {list(GENERATION_TIERS)}")
+
+    num_beams = settings.translation_quality_num_beams if tier == "quality" else settings.translation_fast_num_beams
+
+    # La salida se limita proporcionalmente a la entrada para cortar generaciones degeneradas
+    max_new_tokens = int(input_tokens * settings.translation_max_length_ratio) + settings.translation_max_length_offset
+
+    generation_kwargs = {
+        "num_beams": num_beams,
+        "do_sample": False,
+        "max_new_tokens": max_new_tokens
+    }
+    if num_beams > 1:
+        generation_kwargs["early_stopping"] = True
+
+    return tier, generation_kwargs
+
+
+class UnsupportedLanguageError(ValueError):
+    """Código de idioma que el modelo de la ruta no soporta (los endpoints responden 400)"""
+
+
+_language_identifiers = {}
+_language_identifiers_lock = threading.Lock()
+
+
+def _language_identifier(languages: tuple):
+    """Identificador de langid propio (set_languages del módulo es global) restringido a languages"""
+    from langid.langid import LanguageIdentifier, model
+
+    with _language_identifiers_lock:
+        if languages not in _language_identifiers:
+            identifier = LanguageIdentifier.from_modelstring(model)
+            if languages:
+                identifier.set_languages(list(languages))
+            _language_identifiers[languages] = identifier
+        return _language_identifiers[languages]
+
+
+def detect_language(text: str) -> str:
+    """
+    Detecta el idioma de un texto con langid (modelo liviano, sin GPU ni descargas),
+    eligiendo solo entre Settings.translation_detect_languages
+
+    Returns:
+        Código ISO 639-1 del idioma detectado (en, es, zh, etc.)
+    """
+    try:
+        import langid  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "La detección automática de idioma requiere el paquete langid (pip install langid)"
+        ) from e
+
+    language, _ = _language_identifier(tuple(settings.translation_detect_languages)).classify(text)
+    return language
+
+
+def _prepare_languages(tokenizer, source_lang: str, target_lang: str) -> dict:
+    """
+    Configura el idioma de origen en el tokenizador y devuelve los kwargs de generate()
+    que fijan el idioma de destino, según la familia del modelo. Lanza
+    UnsupportedLanguageError si el modelo no conoce alguno de los dos idiomas
+    """
+    if hasattr(tokenizer, "get_lang_id"):
+        # M2M100: códigos ISO y token de idioma forzado al inicio de la salida
+        for language in (source_lang, target_lang):
+            try:
+                tokenizer.get_lang_id(language)
+            except KeyError:
+                raise UnsupportedLanguageError(f"Idioma no soportado por el modelo de traducción: {language}")
+        tokenizer.src_lang = source_lang
+        return {"forced_bos_token_id": tokenizer.get_lang_id(target_lang)}
+    if "Nllb" in type(tokenizer).__name__:
+        codes = [NLLB_LANGUAGE_CODES.get(language, language) for language in (source_lang, target_lang)]
+        for language, code in zip((source_lang, target_lang), codes):
+            if tokenizer.convert_tokens_to_ids(code) == tokenizer.unk_token_id:
+                raise UnsupportedLanguageError(f"Idioma no soportado por el modelo de traducción: {language}")
+        tokenizer.src_lang = codes[0]
+        return {"forced_bos_token_id": tokenizer.convert_tokens_to_ids(codes[1])}
+    # Modelos de un solo par (MarianMT / opus-mt): el par va implícito en el checkpoint
+    return {}
+
+
+def generate_translation(handle, text: str, source_lang: str, target_lang: str, tier: Optional[str] = None) -> dict:
+    """
+    Ejecuta generate() sobre un handle concreto (modelo, tokenizador, dispositivo).
+    Se usa directamente para calentar un modelo recién cargado antes de ponerlo en servicio.
+
+    Returns:
+        Diccionario con translated_text, tier, input_tokens y output_tokens
+    """
+    model, tokenizer, device = handle
+
+    # Configurar idioma de origen y codificar texto
+    with _tokenizer_lock:
+        language_kwargs = _prepare_languages(tokenizer, source_lang, target_lang)
+        encoded_text = tokenizer(text, return_tensors="pt").to(device)
+
+    input_tokens = encoded_text["input_ids"].shape[-1]
+    tier, generation_kwargs = get_generation_kwargs(tier, input_tokens)
+
+    # Generar traducción
+    with torch.inference_mode():
+        generated_tokens = model.generate(
+            **encoded_text,
+            **language_kwargs,
+            **generation_kwargs
+        )
+
+    # Decodificar traducción
+    translated_text = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
+
+    return {
+        "translated_text": translated_text,
+        "tier": tier,
+        "input_tokens": input_tokens,
+        "output_tokens": generated_tokens.shape[-1]
+    }
+
+
+def run_translation(text: str, source_lang: Optional[str], target_lang: str, tier: Optional[str] = None) -> dict:
+    """
+    Traduce un texto con el modelo de la ruta del par de idiomas (Settings.translation_routes)
+    aplicando el nivel de generación indicado.
+    Si no se indica source_lang se detecta a partir del texto; si coincide con
+    target_lang no se ejecuta el modelo y se devuelve el texto original.
+
+    Returns:
+        Diccionario con translated_text, source_lang, source_lang_detected,
+        translation_skipped, tier, model, input_tokens y output_tokens
+    """
+    source_lang_detected = not source_lang
+    if source_lang_detected:
+        source_lang = detect_language(text)
+
+    if source_lang == target_lang:
+        return {
+            "translated_text": text,
+            "source_lang": source_lang,
+            "source_lang_detected": source_lang_detected,
+            "translation_skipped": True,
+            "tier": "skipped",
+            "model": None,
+            "input_tokens": 0,
+            "output_tokens": 0
+        }
+
+    # Modelo y nivel según la tabla de rutas (el nivel pedido tiene prioridad)
+    model_key, model_name, route_tier = resolve_translation_route(source_lang, target_lang)
+    with model_manager.lease(model_key) as handle:
+        # En el ejecutor del modelo (hilos y afinidad de CPU propios)
+        translation = run_on_pool(model_key, generate_translation, handle, text, source_lang, target_lang,
+                                  tier or route_tier)
+
+    translation.update({
+        "model": model_name,
+        "source_lang": source_lang,
+        "source_lang_detected": source_lang_detected,
+        "translation_skipped": False
+    })
+    return translation
 
 def translate_text(request) -> dict:
     start_time = time.time()
-    
-    # Obtener texto y lenguajes
+
+    # Obtener texto y lenguajes (source_lang es opcional y se detecta si falta)
     text = request.text
-    source_lang = request.source_lang
     target_lang = request.target_lang
-    
-    # Obtener modelo, tokenizador y dispositivo, sin forzar recarga
-    model, tokenizer, device = get_translation_model()
-    
-    # Configurar idioma de origen
-    tokenizer.src_lang = source_lang
-    
-    # Codificar texto
-    encoded_text = tokenizer(text, return_tensors="pt").to(device)
-    
-    # Generar traducción
-    generated_tokens = model.generate(
-        **encoded_text, 
-        forced_bos_token_id=tokenizer.get_lang_id(target_lang)
-    )
-    
-    # Decodificar traducción
-    translated_text = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
-    
+
+    translation_start = time.time()
+    translation = run_translation(text, request.source_lang, target_lang, request.tier)
+    observe_stage("translate", translation["model"] or "skipped", time.time() - translation_start)
+
     # Calcular tiempo de respuesta
     response_time = round(time.time() - start_time, 2)
-    
+
     # Preparar respuesta
     return {
         "original_text": text,
-        "translated_text": translated_text,
-        "source_lang": source_lang,
+        "translated_text": translation["translated_text"],
+        "source_lang": translation["source_lang"],
         "target_lang": target_lang,
+        "source_lang_detected": translation["source_lang_detected"],
+        "translation_skipped": translation["translation_skipped"],
+        "tier": translation["tier"],
+        "model": translation["model"],
         "response_time": response_time
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,290 @@
+"""
+Planificador de síntesis F5TTS en lote para peticiones concurrentes.
+
+F5TTS.infer() sintetiza una frase por llamada (batch 1). Con el planificador activado
+(Settings.tts_batching_enabled) las peticiones para el mismo modelo se encolan, se
+agrupan por parámetros de inferencia y duración objetivo parecida, y cada grupo pasa
+por el sampler del DiT (CFM.sample) y el vocoder como un único lote: cada elemento
+lleva su propio audio de referencia (lens) y su propia duración, y al final la salida
+se separa por elemento.
+
+Los trabajos que F5TTS partiría en varios fragmentos (textos largos), los que piden
+opciones de infer() que el lote no implementa (seed, remove_silence, fix_duration, ...)
+y los lotes de un solo elemento usan F5TTS.infer() tal cual. Si la síntesis en lote
+falla, el grupo se reintenta elemento por elemento.
+
+Cada trabajo guarda el contexto (contextvars) de la petición que lo encoló: su
+preprocesamiento y su infer() individual corren en ese contexto, así las trazas y el
+perfilado siguen colgando de la petición aunque se ejecuten en el hilo del planificador.
+"""
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from core.config import settings
+from core.executors import run_on_pool
+from core.model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+# Constantes de preprocesamiento de F5TTS (f5_tts.infer.utils_infer)
+TARGET_SAMPLE_RATE = 24000
+HOP_LENGTH = 256
+TARGET_RMS = 0.1
+
+
+class TTSJob:
+    """
+    Una síntesis pendiente: parámetros de infer() y el Future donde se entrega el resultado.
+    El resto de los parámetros de infer() se guardan en options y se reenvían tal cual
+    """
+
+    def __init__(self, ref_file: str, ref_text: str, gen_text: str, file_wave: Optional[str], speed: float = 1.0,
+                 nfe_step: int = 32, cfg_strength: float = 2.0, sway_sampling_coef: float = -1.0, **options):
+        self.ref_file = ref_file
+        self.ref_text = ref_text
+        self.gen_text = gen_text
+        self.file_wave = file_wave
+        self.speed = speed
+        self.nfe_step = nfe_step
+        self.cfg_strength = cfg_strength
+        self.sway_sampling_coef = sway_sampling_coef
+        self.options = options
+        self.future = Future()
+        self.enqueued_at = time.time()
+        self.context = contextvars.copy_context()
+
+        # Completados en _prepare()
+        self.audio = None
+        self.rms = None
+        self.ref_frames = 0
+        self.duration = 0
+        self.batchable = False
+
+    @property
+    def params_key(self) -> tuple:
+        """Solo se agrupan trabajos con los mismos parámetros del sampler"""
+        return self.nfe_step, self.cfg_strength, self.sway_sampling_coef
+
+    def infer_kwargs(self) -> dict:
+        return {
+            "ref_file": self.ref_file,
+            "ref_text": self.ref_text,
+            "gen_text": self.gen_text,
+            "file_wave": self.file_wave,
+            "speed": self.speed,
+            "nfe_step": self.nfe_step,
+            "cfg_strength": self.cfg_strength,
+            "sway_sampling_coef": self.sway_sampling_coef,
+            **self.options
+        }
+
+
+def _prepare(job: TTSJob):
+    """
+    Repite el preprocesamiento de F5TTS.infer(): recorte y texto de la referencia,
+    mono, normalización RMS, remuestreo a 24 kHz y duración objetivo en frames de mel
+    """
+    import torch
+    import torchaudio
+    from f5_tts.infer.utils_infer import preprocess_ref_audio_text
+
+    if job.options:
+        # El lote no implementa las demás opciones de infer(): se sintetiza por separado
+        return
+
+    ref_file, ref_text = preprocess_ref_audio_text(job.ref_file, job.ref_text, show_info=lambda *args: None)
+    audio, sample_rate = torchaudio.load(ref_file)
+
+    # F5TTS parte en fragmentos los textos que no entran en ~22 s de audio: esos van por infer()
+    ref_seconds = audio.shape[-1] / sample_rate
+    max_chars = int(len(ref_text.encode("utf-8")) / ref_seconds * (22 - ref_seconds) * job.speed)
+    if len(job.gen_text.encode("utf-8")) > max_chars:
+        return
+
+    if audio.shape[0] > 1:
+        audio = torch.mean(audio, dim=0, keepdim=True)
+    job.rms = torch.sqrt(torch.mean(torch.square(audio)))
+    if job.rms < TARGET_RMS:
+        audio = audio * TARGET_RMS / job.rms
+    if sample_rate != TARGET_SAMPLE_RATE:
+        audio = torchaudio.transforms.Resample(sample_rate, TARGET_SAMPLE_RATE)(audio)
+
+    if len(ref_text[-1].encode("utf-8")) == 1:
+        ref_text = ref_text + " "
+    job.ref_text = ref_text
+    job.audio = audio[0]
+    job.ref_frames = job.audio.shape[-1] // HOP_LENGTH
+
+    speed = 0.3 if len(job.gen_text.encode("utf-8")) < 10 else job.speed
+    ref_text_len = len(ref_text.encode("utf-8"))
+    gen_text_len = len(job.gen_text.encode("utf-8"))
+    job.duration = job.ref_frames + int(job.ref_frames / ref_text_len * gen_text_len / speed)
+    job.batchable = True
+
+
+def _synthesize_batch(tts, jobs: List[TTSJob]):
+    """Un lote por el sampler del DiT y el vocoder; cada elemento escribe su propio archivo"""
+    import torch
+    from f5_tts.infer.utils_infer import convert_char_to_pinyin
+
+    device = tts.device
+    max_samples = max(job.audio.shape[-1] for job in jobs)
+    cond = torch.stack([
+        torch.nn.functional.pad(job.audio, (0, max_samples - job.audio.shape[-1])) for job in jobs
+    ]).to(device)
+    lens = torch.tensor([job.ref_frames for job in jobs], device=device, dtype=torch.long)
+    duration = torch.tensor([job.duration for job in jobs], device=device, dtype=torch.long)
+    text = convert_char_to_pinyin([job.ref_text + job.gen_text for job in jobs])
+    nfe_step, cfg_strength, sway_sampling_coef = jobs[0].params_key
+
+    with torch.inference_mode():
+        generated, _ = tts.ema_model.sample(
+            cond=cond,
+            text=text,
+            duration=duration,
+            lens=lens,
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef
+        )
+        generated = generated.to(torch.float32)
+
+        # Se descarta el tramo de la referencia y se rellena hasta el más largo del lote
+        mels = [generated[i, job.ref_frames:job.duration, :] for i, job in enumerate(jobs)]
+        max_frames = max(mel.shape[0] for mel in mels)
+        padded = torch.stack([torch.nn.functional.pad(mel, (0, 0, 0, max_frames - mel.shape[0])) for mel in mels])
+        padded = padded.permute(0, 2, 1)
+        if tts.mel_spec_type == "vocos":
+            waves = tts.vocoder.decode(padded)
+        else:
+            waves = tts.vocoder(padded)
+
+    for i, (job, mel) in enumerate(zip(jobs, mels)):
+        wave = waves[i].reshape(-1)[:mel.shape[0] * HOP_LENGTH]
+        if job.rms < TARGET_RMS:
+            wave = wave * job.rms / TARGET_RMS
+        wave = wave.cpu().numpy()
+        if job.file_wave is not None:
+            tts.export_wav(wave, job.file_wave)
+        job.future.set_result((wave, TARGET_SAMPLE_RATE, mel.cpu().numpy()))
+
+
+def group_jobs(jobs: List[TTSJob], max_batch_size: int, duration_ratio: float) -> List[List[TTSJob]]:
+    """
+    Agrupa trabajos con los mismos parámetros del sampler y duración objetivo parecida
+    (la más larga del grupo no supera duration_ratio veces la más corta), porque todo
+    el lote se calcula hasta la duración del elemento más largo
+    """
+    groups = []
+    ordered = sorted(jobs, key=lambda job: (job.params_key, job.duration))
+    for job in ordered:
+        current = groups[-1] if groups else None
+        if (current and len(current) < max_batch_size and current[0].params_key == job.params_key
+                and job.duration <= current[0].duration * duration_ratio):
+            current.append(job)
+        else:
+            groups.append([job])
+    return groups
+
+
+class TTSBatchScheduler:
+    """Cola y planificador de un modelo F5TTS (un hilo por modelo)"""
+
+    def __init__(self, model_key: str, max_batch_size: int, max_wait_ms: int, duration_ratio: float):
+        self.model_key = model_key
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.duration_ratio = duration_ratio
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"tts-batch-{model_key}", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.batched_jobs = 0
+
+    def submit(self, job: TTSJob) -> Future:
+        self._queue.put(job)
+        return job.future
+
+    def _collect(self) -> List[TTSJob]:
+        """Espera el primer trabajo y junta los que lleguen durante max_wait (hasta llenar el lote)"""
+        jobs = [self._queue.get()]
+        deadline = time.time() + self.max_wait
+        while len(jobs) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            try:
+                with model_manager.lease(self.model_key) as tts:
+                    run_on_pool(self.model_key, self._process, tts, jobs)
+            except Exception as e:
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+    def _process(self, tts, jobs: List[TTSJob]):
+        for job in jobs:
+            try:
+                job.context.run(_prepare, job)
+            except Exception as e:
+                job.future.set_exception(e)
+
+        pending = [job for job in jobs if not job.future.done()]
+        singles = [job for job in pending if not job.batchable]
+        for group in group_jobs([job for job in pending if job.batchable], self.max_batch_size, self.duration_ratio):
+            if len(group) == 1:
+                singles.extend(group)
+                continue
+            try:
+                _synthesize_batch(tts, group)
+                self.batches += 1
+                self.batched_jobs += len(group)
+                logger.info("Lote TTS", extra={"model": self.model_key, "batch_size": len(group)})
+            except Exception as e:
+                logger.warning("Falló la síntesis en lote, se reintenta una por una: %s", e, extra={"batch_size": len(group)})
+                singles.extend(job for job in group if not job.future.done())
+
+        for job in singles:
+            try:
+                job.future.set_result(job.context.run(tts.infer, **job.infer_kwargs()))
+            except Exception as e:
+                job.future.set_exception(e)
+
+
+_schedulers: Dict[str, TTSBatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_key: str) -> TTSBatchScheduler:
+    with _schedulers_lock:
+        if model_key not in _schedulers:
+            _schedulers[model_key] = TTSBatchScheduler(
+                model_key,
+                max_batch_size=settings.tts_batch_max_size,
+                max_wait_ms=settings.tts_batch_max_wait_ms,
+                duration_ratio=settings.tts_batch_duration_ratio
+            )
+        return _schedulers[model_key]
+
+
+def batching_report() -> dict:
+    """Lotes ejecutados por modelo (para /models/metrics)"""
+    with _schedulers_lock:
+        return {
+            model_key: {"batches": scheduler.batches, "batched_jobs": scheduler.batched_jobs,
+                        "queued": scheduler._queue.qsize()}
+            for model_key, scheduler in _schedulers.items()
+        }
@@ -0,0 +1,207 @@
+"""
+Síntesis de textos largos por fragmentos.
+
+El costo de F5TTS crece mucho con la duración de la salida (la atención del DiT es
+cuadrática en la cantidad de frames), así que un párrafo largo se parte en fragmentos
+de duración objetivo (Settings.tts_chunk_target_seconds), cortando en límites de
+oración y, si hace falta, de cláusula o de palabra. Los fragmentos se sintetizan en
+paralelo a través del ejecutor TTS (y del planificador en lote si está activado) y se
+unen con un crossfade vectorizado en NumPy.
+
+La salida se escribe al archivo a medida que llegan los fragmentos, en orden: en
+memoria solo viven los fragmentos en curso (Settings.tts_chunk_max_parallel) y la cola
+del último, así que el pico de memoria no depende del largo del texto.
+"""
+import contextvars
+import logging
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;…。！？；])\s+")
+CLAUSE_BOUNDARY = re.compile(r"(?<=[,:，、：])\s+")
+
+# F5TTS recorta el audio de referencia a ~12 s antes de usarlo
+MAX_REFERENCE_SECONDS = 12.0
+# Velocidad de habla típica (bytes UTF-8 por segundo) cuando no hay texto de referencia
+DEFAULT_BYTES_PER_SECOND = 15.0
+
+
+def _byte_len(text: str) -> int:
+    # F5TTS estima la duración por bytes UTF-8 del texto
+    return len(text.encode("utf-8"))
+
+
+def _split_words(text: str, max_bytes: int) -> List[str]:
+    pieces, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and _byte_len(candidate) > max_bytes:
+            pieces.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text: str, max_bytes: int) -> List[str]:
+    """
+    Parte el texto en fragmentos de hasta max_bytes, priorizando los límites de oración,
+    luego los de cláusula y por último los de palabra. Las piezas cortas contiguas se
+    vuelven a juntar mientras entren en el límite.
+    """
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        if _byte_len(sentence) <= max_bytes:
+            pieces.append(sentence)
+            continue
+        for clause in CLAUSE_BOUNDARY.split(sentence):
+            if _byte_len(clause) <= max_bytes:
+                pieces.append(clause)
+            else:
+                pieces.extend(_split_words(clause, max_bytes))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current} {piece}".strip()
+        if current and _byte_len(candidate) > max_bytes:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def max_chunk_bytes(ref_file: str, ref_text: str, target_seconds: float, speed: float = 1.0) -> int:
+    """
+    Bytes de texto que entran en target_seconds, según la velocidad de habla de la referencia.
+    La duración se obtiene con pydub, el mismo decodificador que usa F5TTS, así que acepta
+    cualquier formato de referencia que acepte infer(). Sin ref_text (F5TTS transcribe la
+    referencia por su cuenta) se usa una velocidad de habla típica
+    """
+    from pydub import AudioSegment
+
+    ref_seconds = min(AudioSegment.from_file(ref_file).duration_seconds, MAX_REFERENCE_SECONDS)
+    if ref_text and ref_text.strip() and ref_seconds:
+        bytes_per_second = _byte_len(ref_text) / ref_seconds
+    else:
+        bytes_per_second = DEFAULT_BYTES_PER_SECOND
+    return max(int(bytes_per_second * target_seconds * speed), 1)
+
+
+def crossfade(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """Mezcla lineal de la cola de un fragmento con el inicio del siguiente (mismo largo)"""
+    fade_in = np.linspace(0.0, 1.0, len(head), dtype=np.float32)
+    return tail * (1.0 - fade_in) + head * fade_in
+
+
+class _StitchedWriter:
+    """Escribe fragmentos en orden con crossfade, reteniendo solo la cola del último"""
+
+    def __init__(self, file_wave: str, crossfade_seconds: float):
+        self.file_wave = file_wave
+        self.crossfade_seconds = crossfade_seconds
+        self.output = None
+        self.tail = None
+        self.fade_samples = 0
+        self.sample_rate = None
+        self.total_samples = 0
+
+    def write(self, wave: np.ndarray, sample_rate: int):
+        import soundfile as sf
+
+        if self.output is None:
+            self.sample_rate = sample_rate
+            self.fade_samples = int(self.crossfade_seconds * sample_rate)
+            self.output = sf.SoundFile(self.file_wave, "w", samplerate=sample_rate, channels=1)
+
+        wave = np.asarray(wave, dtype=np.float32).reshape(-1)
+        if self.tail is not None:
+            overlap = min(len(self.tail), len(wave))
+            self._emit(self.tail[:len(self.tail) - overlap])
+            self._emit(crossfade(self.tail[len(self.tail) - overlap:], wave[:overlap]))
+            wave = wave[overlap:]
+
+        keep = min(self.fade_samples, len(wave))
+        self._emit(wave[:len(wave) - keep])
+        self.tail = wave[len(wave) - keep:] if keep else None
+
+    def _emit(self, samples: np.ndarray):
+        if len(samples):
+            self.output.write(samples)
+            self.total_samples += len(samples)
+
+    def close(self):
+        if self.output is not None:
+            if self.tail is not None:
+                self._emit(self.tail)
+            self.output.close()
+
+
+def synthesize_chunked(synthesize_chunk: Callable, ref_file: str, ref_text: str, gen_text: str, file_wave: str,
+                       speed: float = 1.0, target_seconds: float = 8.0, max_parallel: int = 2,
+                       crossfade_seconds: float = 0.05, **infer_kwargs):
+    """
+    Sintetiza gen_text por fragmentos y escribe el resultado unido en file_wave
+
+    Args:
+        synthesize_chunk: Función que sintetiza un fragmento con los parámetros de F5TTS.infer()
+            y devuelve (wav, sample_rate, spec)
+        target_seconds: Duración objetivo de cada fragmento
+        max_parallel: Fragmentos en curso a la vez (acota la memoria)
+        crossfade_seconds: Duración del crossfade entre fragmentos
+        infer_kwargs: Resto de parámetros de infer() (nfe_step, cfg_strength, ...)
+
+    Returns:
+        Tupla (None, sample_rate, None) para mantener la forma de F5TTS.infer(): el audio
+        completo no se retiene en memoria, queda en file_wave
+    """
+    try:
+        chunks = split_text(gen_text, max_chunk_bytes(ref_file, ref_text, target_seconds, speed))
+    except Exception as e:
+        # Sin estimación de la velocidad de habla se sintetiza en una sola llamada
+        logger.warning("No se pudo estimar la duración de la referencia, se sintetiza sin fragmentar: %s", e)
+        chunks = [gen_text]
+    if len(chunks) <= 1:
+        return synthesize_chunk(ref_file=ref_file, ref_text=ref_text, gen_text=gen_text, file_wave=file_wave,
+                                speed=speed, **infer_kwargs)
+
+    logger.info("Texto largo dividido en fragmentos", extra={"chunks": len(chunks), "target_seconds": target_seconds})
+
+    def synthesize(chunk: str):
+        # Cada fragmento corre en el contexto de la petición (trazas, perfilado)
+        wav, sample_rate, _ = synthesize_chunk(ref_file=ref_file, ref_text=ref_text, gen_text=chunk,
+                                               file_wave=None, speed=speed, **infer_kwargs)
+        return wav, sample_rate
+
+    writer = _StitchedWriter(file_wave, crossfade_seconds)
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_parallel, 1), thread_name_prefix="tts-chunk") as executor:
+            remaining = iter(chunks)
+            in_flight = deque()
+            for chunk in remaining:
+                in_flight.append(executor.submit(contextvars.copy_context().run, synthesize, chunk))
+                if len(in_flight) >= max_parallel:
+                    break
+            while in_flight:
+                wav, sample_rate = in_flight.popleft().result()
+                # Se encola el siguiente antes de escribir para no dejar el ejecutor ocioso
+                next_chunk = next(remaining, None)
+                if next_chunk is not None:
+                    in_flight.append(executor.submit(contextvars.copy_context().run, synthesize, next_chunk))
+                if wav is not None:
+                    writer.write(wav, sample_rate)
+                del wav
+    finally:
+        writer.close()
+
+    return None, writer.sample_rate, None
@@ -1,93 +1,241 @@
+import logging
+import threading
 import uuid
 import time
 from pathlib import Path
 import io
 from contextlib import redirect_stdout, redirect_stderr
+from typing import Optional
 
+import soundfile as sf
 from f5_tts.api import F5TTS
+from core.compile import compile_hot_modules
 from core.config import settings
+from core.executors import get_pool_settings, run_on_pool
+from core.metrics import observe_stage
+from core.model_manager import model_manager
+from core.precision import apply_precision
+from core.profiling import current_profile
+from core.weights import assign_mmap_weights, ensure_safetensors, load_safetensors_mmap
+from services.tts_batching import TTSJob, get_scheduler
+from services.tts_chunking import synthesize_chunked
 
-# Diccionario para mantener múltiples instancias de modelos
-_f5tts_instances = {}
-_is_preloaded = False
-
-# Configuración de modelos simplificada
-MODEL_CONFIGS = {
-    "spanish": {
-        "name": "F5TTS_Spanish",
-        "language_code": "es"
-    },
-    "base": {
-        "name": "F5TTS_Base", 
-        "language_code": "en"
+logger = logging.getLogger(__name__)
+
+# Módulos que concentran el cómputo (precisión reducida y compilación)
+TTS_HOT_MODULES = ["ema_model.transformer"]
+
+# Niveles de velocidad/calidad: el costo de la síntesis es proporcional a los pasos (NFE)
+TTS_TIERS = ("draft", "standard", "high")
+
+
+def get_tts_inference_kwargs(tier: Optional[str] = None):
+    """
+    Parámetros de F5TTS.infer() para el nivel indicado
+
+    Args:
+        tier: 'draft', 'standard' o 'high'. None usa el nivel por defecto de Settings
+
+    Returns:
+        Tupla (nivel efectivo, kwargs para infer())
+    """
+    tier = tier or settings.tts_default_tier
+    if tier not in TTS_TIERS:
+        raise ValueError(f"Nivel de TTS desconocido: {tier}. Opciones: {list(TTS_TIERS)}")
+
+    tier_settings = settings.tts_tiers[tier]
+    return tier, {
+        "nfe_step": tier_settings.nfe_step,
+        "cfg_strength": tier_settings.cfg_strength,
+        "sway_sampling_coef": tier_settings.sway_sampling_coef
     }
-}
+
+def get_model_config(model_type: str):
+    """Entrada del registro de modelos F5TTS (Settings.tts_models) para una clave"""
+    return settings.tts_models[model_type]
+
 
 def get_model_name_for_language(target_lang: str) -> str:
     """
-    Determina qué modelo usar basado en el idioma de destino
+    Determina qué modelo usar basado en el idioma de destino: el primero del registro
+    que declara el idioma, o Settings.tts_default_model
+    """
+    for model_type, config in settings.tts_models.items():
+        if target_lang in config.languages:
+            return model_type
+    return settings.tts_default_model
+
+# Checkpoints que F5TTS usa cuando el registro no indica ckpt_file (repositorio SWivid/F5-TTS)
+DEFAULT_CHECKPOINT_REPO = "SWivid/F5-TTS"
+DEFAULT_CHECKPOINTS = {
+    "F5TTS_v1_Base": "F5TTS_v1_Base/model_1250000.safetensors",
+    "F5TTS_Base": "F5TTS_Base/model_1200000.safetensors",
+    "F5TTS_Spanish": "F5TTS_Spanish/model_spanish.safetensors"
+}
+
+
+def resolve_default_checkpoint(config) -> Optional[str]:
+    """
+    Ruta local del checkpoint predeterminado de una entrada del registro sin ckpt_file,
+    para que la carga con mmap también se aplique con la configuración de fábrica.
+    Se busca primero en la caché del hub y si no está se descarga. None si no se conoce
+    el checkpoint del modelo o no se pudo obtener (F5TTS resuelve el suyo)
     """
-    if target_lang == "es":
-        return "spanish"
-    else:  # en, zh, u otros
-        return "base"
+    filename = DEFAULT_CHECKPOINTS.get(config.model) or DEFAULT_CHECKPOINTS.get(config.name)
+    if filename is None:
+        return None
+    from huggingface_hub import hf_hub_download
+
+    for local_files_only in (True, False):
+        try:
+            return hf_hub_download(DEFAULT_CHECKPOINT_REPO, filename, local_files_only=local_files_only)
+        except Exception as e:
+            error = e
+    logger.warning("No se encontró el checkpoint predeterminado: %s", error, extra={"model": config.name, "file": filename})
+    return None
+
+
+def _make_tts_loader(model_type: str):
+    """Crea el cargador de F5TTS para una entrada del registro de modelos"""
+    def load(device: str):
+        # El registro se lee al cargar (no al importar) para que una recarga en caliente
+        # tome los valores actualizados
+        config = get_model_config(model_type)
+        logger.info("Inicializando modelo F5TTS", extra={"model": config.name})
+        init_kwargs = {}
+        if config.model:
+            init_kwargs['model'] = config.model
+        ckpt_file = config.ckpt_file
+        if not ckpt_file and settings.weights_mmap:
+            ckpt_file = resolve_default_checkpoint(config)
+        if ckpt_file:
+            # Los checkpoints pickled se convierten una vez a safetensors si se usa mmap
+            ckpt_file = ensure_safetensors(ckpt_file) if settings.weights_mmap else ckpt_file
+            init_kwargs['ckpt_file'] = str(ckpt_file)
+        if config.vocab_file:
+            init_kwargs['vocab_file'] = config.vocab_file
+        if config.vocoder_local_path:
+            init_kwargs['vocoder_local_path'] = config.vocoder_local_path
+        if device != "auto":
+            init_kwargs['device'] = device
+        try:
+            # Crear nueva instancia con el idioma principal del modelo
+            instance = F5TTS(language=config.languages[0] if config.languages else "en", **init_kwargs)
+        except Exception as e:
+            logger.error("Error cargando modelo: %s", e, extra={"model": config.name})
+            raise e
+
+        if settings.weights_mmap and ckpt_file:
+            # F5TTS lee el checkpoint completo a memoria privada: se reemplazan sus
+            # parámetros por tensores mapeados (compartidos vía caché de páginas). El pico
+            # de RSS y el tiempo de carga no bajan, solo la memoria privada en régimen
+            assigned = assign_mmap_weights(instance.ema_model, load_safetensors_mmap(ckpt_file), strip_prefix="ema_model.")
+            logger.info("Tensores mapeados desde el checkpoint", extra={"model": config.name, "tensors": assigned, "path": str(ckpt_file)})
+        # El transformer de difusión se evalúa en cada paso del ODE solver
+        model_key = get_tts_model_key(model_type)
+        apply_precision(model_key, instance, TTS_HOT_MODULES, get_pool_settings(model_key).precision,
+                        getattr(instance, "device", device))
+        compile_hot_modules(model_key, instance, TTS_HOT_MODULES)
+        logger.info("Modelo cargado", extra={"model": config.name})
+        return instance
+    return load
+
+
+_registration_lock = threading.Lock()
+
+
+def get_tts_model_key(model_type: str) -> str:
+    """
+    Nombre con el que se registra cada modelo F5TTS en el gestor de modelos. Si la clave
+    todavía no está registrada (entrada nueva del registro tras una recarga desde /admin)
+    se registra en el momento
+    """
+    model_key = f"tts_{model_type}"
+    with _registration_lock:
+        if model_key not in model_manager.registered_models():
+            if model_type not in settings.tts_models:
+                raise KeyError(f"Modelo TTS fuera del registro: {model_type}. Opciones: {list(settings.tts_models)}")
+            model_manager.register(model_key, _make_tts_loader(model_type))
+    return model_key
+
+
+# Solo se registran: cada modelo se carga en su primer uso (o si está en Settings.preload_models)
+for _model_type in settings.tts_models:
+    get_tts_model_key(_model_type)
+
 
 def get_tts(target_lang: str = "en", force_load=False):
     """
-    Obtiene la instancia de F5TTS para el idioma especificado
+    Obtiene la instancia de F5TTS para el idioma especificado.
+    El gestor de modelos garantiza una única instancia por modelo aunque
+    lleguen varias peticiones concurrentes.
     
     Args:
         target_lang: Idioma de destino ('es', 'en', 'zh', etc.)
         force_load: Forzar recarga del modelo
     """
-    global _f5tts_instances, _is_preloaded
-    
     model_type = get_model_name_for_language(target_lang)
-    
-    print(f"🔍 get_tts llamado con target_lang='{target_lang}', model_type='{model_type}', force_load={force_load}")
-    print(f"📋 Instancias en caché: {list(_f5tts_instances.keys())}")
-    
-    # Si la instancia ya existe y no se fuerza recarga, devolverla
-    if model_type in _f5tts_instances and not force_load:
-        print(f"♻️ Usando modelo F5TTS en caché: {MODEL_CONFIGS[model_type]['name']} para idioma: {target_lang}")
-        print(f"🔗 Instancia: {id(_f5tts_instances[model_type])}")
-        return _f5tts_instances[model_type]
-    
-    print(f"🔄 Inicializando NUEVO modelo F5TTS: {MODEL_CONFIGS[model_type]['name']} para idioma: {target_lang}")
-    
-    try:
-        # Crear nueva instancia con el parámetro de idioma
-        new_instance = F5TTS(language=MODEL_CONFIGS[model_type]['language_code'])
-        _f5tts_instances[model_type] = new_instance
-        
-        _is_preloaded = True
-        print(f"✅ Modelo {MODEL_CONFIGS[model_type]['name']} cargado correctamente para idioma: {target_lang}")
-        print(f"🔗 Nueva instancia: {id(new_instance)}")
-        print(f"📋 Instancias después de carga: {list(_f5tts_instances.keys())}")
-        return new_instance
-        
-    except Exception as e:
-        print(f"❌ Error cargando modelo {MODEL_CONFIGS[model_type]['name']}: {str(e)}")
-        raise e
+    logger.debug("get_tts", extra={"target_lang": target_lang, "model_type": model_type, "force_load": force_load})
+    return model_manager.get(get_tts_model_key(model_type), force_load=force_load)
+
+def tts_lease(target_lang: str = "en"):
+    """
+    Context manager que entrega la instancia de F5TTS del idioma y la marca en uso
+    para que el gestor de modelos no la desaloje durante la síntesis
+    """
+    model_type = get_model_name_for_language(target_lang)
+    return model_manager.lease(get_tts_model_key(model_type))
+
+
+def synthesize(target_lang: str, **infer_kwargs):
+    """
+    Sintetiza con el modelo F5TTS del idioma. Con Settings.tts_chunking_enabled los
+    textos largos se parten en fragmentos que se sintetizan en paralelo y se unen con
+    crossfade (services/tts_chunking.py).
+
+    Args:
+        target_lang: Idioma de destino (selecciona el modelo)
+        infer_kwargs: Parámetros de F5TTS.infer() (ref_file, ref_text, gen_text, file_wave, speed, nfe_step, ...)
+    """
+    if settings.tts_chunking_enabled and infer_kwargs.get("file_wave"):
+        return synthesize_chunked(
+            lambda **chunk_kwargs: synthesize_utterance(target_lang, **chunk_kwargs),
+            target_seconds=settings.tts_chunk_target_seconds,
+            max_parallel=settings.tts_chunk_max_parallel,
+            crossfade_seconds=settings.tts_chunk_crossfade_seconds,
+            **infer_kwargs
+        )
+    return synthesize_utterance(target_lang, **infer_kwargs)
+
 
-# Función para precargar ambos modelos
+def synthesize_utterance(target_lang: str, **infer_kwargs):
+    """
+    Una llamada a F5TTS.infer() con el modelo del idioma. Con Settings.tts_batching_enabled
+    la petición se encola y puede ejecutarse en lote junto con otras concurrentes; si no,
+    se ejecuta directamente en el ejecutor del modelo. Una petición perfilada no se
+    agrupa, para que su traza de torch contenga solo su propia síntesis.
+    """
+    model_key = get_tts_model_key(get_model_name_for_language(target_lang))
+    if settings.tts_batching_enabled and current_profile() is None:
+        return get_scheduler(model_key).submit(TTSJob(**infer_kwargs)).result()
+    with model_manager.lease(model_key) as tts:
+        return run_on_pool(model_key, tts.infer, **infer_kwargs)
+
+# Función para precargar todos los modelos del registro
 def preload_all_models():
     """
-    Precarga todos los modelos F5TTS disponibles
+    Precarga todos los modelos F5TTS del registro
     """
-    print("Precargando todos los modelos F5TTS...")
+    logger.info("Precargando todos los modelos F5TTS")
     
     try:
-        # Cargar modelo para español
-        get_tts("es")
-        
-        # Cargar modelo para inglés/chino
-        get_tts("en")
+        for model_type in settings.tts_models:
+            model_manager.get(get_tts_model_key(model_type))
         
-        print("✅ Todos los modelos F5TTS cargados correctamente")
+        logger.info("Todos los modelos F5TTS cargados")
         
     except Exception as e:
-        print(f"❌ Error precargando modelos: {str(e)}")
+        logger.error("Error precargando modelos: %s", e)
         raise e
 
 # Mantenemos get_f5tts_instance para compatibilidad (usa inglés por defecto)
@@ -104,9 +252,6 @@ def generate_tts(request, target_lang: str = "en") -> dict:
     """
     start_time = time.time()
     
-    # Obtener la instancia correcta según el idioma
-    api = get_tts(target_lang)
-    
     #Directorio para los archivos de salida
     output_dir = Path("tts_outputs") / uuid.uuid4().hex
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -116,24 +261,33 @@ def generate_tts(request, target_lang: str = "en") -> dict:
     stderr_capture = io.StringIO()
     
     returncode = 0
+    tts_time = 0.0
+    
+    # Nivel de velocidad/calidad (pasos del solver, guidance y sway sampling)
+    tier, tier_kwargs = get_tts_inference_kwargs(getattr(request, "tier", None))
     
     try:
         with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            # Llamar a la API 
-            api.infer(
+            # Sintetizar con el modelo del idioma (en lote si está activado)
+            tts_start = time.time()
+            synthesize(
+                target_lang,
                 ref_file=request.ref_audio_path,  
                 ref_text=request.ref_text,         
                 gen_text=request.gen_text,
-                speed=0.8,        
-                file_wave=str(output_file)        
+                speed=getattr(request, "speed", 0.8),        
+                file_wave=str(output_file),
+                **tier_kwargs
             )
+            tts_time = time.time() - tts_start
             
         model_type = get_model_name_for_language(target_lang)
-        print(f"TTS generado con modelo: {MODEL_CONFIGS[model_type]['name']}")
-        print(f"Idioma destino: {target_lang}")
-        print(f"Archivo de referencia: {request.ref_audio_path}")
-        print(f"Texto de referencia: {request.ref_text}")
-        print(f"Texto a generar: {request.gen_text}")
+        observe_stage("synthesize", get_tts_model_key(model_type), tts_time, sf.info(str(output_file)).duration)
+        logger.info("TTS generado", extra={
+            "model": get_model_config(model_type).name, "target_lang": target_lang,
+            "ref_audio_path": request.ref_audio_path, "seconds": round(tts_time, 2)
+        })
+        logger.debug("Texto de referencia: %s | Texto a generar: %s", request.ref_text, request.gen_text)
         
     except Exception as e:
         stderr_capture.write(f"Error en F5TTS API: {str(e)}\n")
@@ -152,8 +306,11 @@ def generate_tts(request, target_lang: str = "en") -> dict:
         "returncode": returncode,
         "output_files": files,
         "response_time": response_time,
+        "tts_tier": tier,
+        "nfe_step": tier_kwargs["nfe_step"],
+        "tts_time": round(tts_time, 2),
         "from_cache": False,
-        "model_used": MODEL_CONFIGS[get_model_name_for_language(target_lang)]['name'],
+        "model_used": get_model_config(get_model_name_for_language(target_lang)).name,
         "target_language": target_lang
     }
     
@@ -164,22 +321,22 @@ def setup_initial_models():
     Función auxiliar para verificar que los modelos estén disponibles.
     Ya no es necesario hacer backups, solo verificar que existan los archivos.
     """
-    print("🔧 Verificando disponibilidad de modelos F5TTS...")
+    logger.info("Verificando disponibilidad de modelos F5TTS")
     
     try:
-        # Intentar cargar ambos modelos para verificar que están disponibles
-        print("Verificando modelo inglés...")
-        get_tts("en")
-        
-        print("Verificando modelo español...")
-        get_tts("es")
+        # Intentar cargar cada modelo del registro para verificar que está disponible
+        for model_type, config in settings.tts_models.items():
+            logger.info("Verificando modelo", extra={"model": config.name, "languages": config.languages})
+            model_manager.get(get_tts_model_key(model_type))
         
-        print("✅ Configuración verificada! Ambos modelos están disponibles")
+        logger.info("Configuración verificada: todos los modelos están disponibles")
         return True
         
     except Exception as e:
-        print(f"❌ Error en la configuración: {str(e)}")
-        print("Asegúrate de que ambos modelos estén en las siguientes ubicaciones:")
-        print("- Inglés: ~/.cache/huggingface/hub/models--SWivid--F5-TTS/snapshots/.../F5TTS_Base/model_1200000.safetensors")
-        print("- Español: ~/.cache/huggingface/hub/models--SWivid--F5-TTS/snapshots/.../F5TTS_Spanish/model_spanish.safetensors")
+        logger.error(
+            "Error en la configuración: %s. Revisa los checkpoints de %s. Ubicaciones predeterminadas: "
+            "~/.cache/huggingface/hub/models--SWivid--F5-TTS/snapshots/.../F5TTS_Base/model_1200000.safetensors (inglés), "
+            "~/.cache/huggingface/hub/models--SWivid--F5-TTS/snapshots/.../F5TTS_Spanish/model_spanish.safetensors (español)",
+            e, settings.tts_registry_file
+        )
         return False
\ No newline at end of file
@@ -1,30 +1,173 @@
+import logging
 import time
-import whisper
+from abc import ABC, abstractmethod
 from pathlib import Path
 
-_whisper_model = None
-_is_preloaded = False  # Nueva bandera para indicar si el modelo fue precargado
+from core.compile import compile_hot_modules
+from core.config import settings
+from core.executors import get_pool_settings, run_on_pool
+from core.metrics import observe_stage
+from core.model_manager import model_manager
+from core.precision import apply_precision
 
-def load_whisper_model(force_load=False):
-    global _whisper_model, _is_preloaded
-    
-    # Si el modelo ya está cargado y no se fuerza la recarga, solo lo devolvemos
-    if _whisper_model is not None and not force_load:
-        return _whisper_model
-    
-    device = "cuda"
+logger = logging.getLogger(__name__)
+
+
+class WhisperBackend(ABC):
+    """
+    Interfaz común para los motores de reconocimiento de voz (ASR).
+
+    Todas las implementaciones devuelven el mismo formato que openai-whisper:
+    {"text": str, "language": str, "segments": [{"id", "start", "end", "text"}]}
+    """
+    name = "base"
+
+    def __init__(self, model_size: str, device: str):
+        self.model_size = model_size
+        self.device = device
+
+    @abstractmethod
+    def transcribe(self, audio_path, **options) -> dict:
+        """audio_path puede ser una ruta o un array float32 a 16 kHz (ver load_audio_clip)"""
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """Motor original basado en openai-whisper (PyTorch, float32 en CPU)"""
+    name = "openai"
+
+    def __init__(self, model_size: str, device: str):
+        import whisper
+
+        super().__init__(model_size, device)
+        self.model = whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio_path, **options) -> dict:
+        # fp16 solo en GPU; en CPU la precisión reducida es bf16 (Settings.model_pools["whisper"].precision)
+        options.setdefault("fp16", str(self.device).startswith("cuda"))
+        return self.model.transcribe(audio_path, **options)
+
+
+class CTranslate2WhisperBackend(WhisperBackend):
+    """
+    Motor basado en faster-whisper (CTranslate2) con pesos cuantizados (int8 por defecto).
+    Mucho más rápido y liviano en CPU que openai-whisper.
+    """
+    name = "ctranslate2"
+
+    def __init__(self, model_size: str, device: str, compute_type: str = "int8"):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "El backend 'ctranslate2' requiere el paquete faster-whisper (pip install faster-whisper)"
+            ) from e
+
+        super().__init__(model_size, device)
+        self.compute_type = compute_type
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+
+    def transcribe(self, audio_path, **options) -> dict:
+        # fp16 es propio de openai-whisper; en CTranslate2 la precisión la define compute_type
+        options.pop("fp16", None)
+        options.setdefault("beam_size", 5)
+
+        segments, info = self.model.transcribe(audio_path, **options)
+        segments = [
+            {"id": segment.id, "start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in segments
+        ]
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": info.language,
+            "segments": segments
+        }
+
+
+SAMPLE_RATE = 16000
+
+
+def load_audio_clip(audio_path: str, max_seconds: float = None):
+    """
+    Decodifica un archivo de audio a float32 mono a 16 kHz (formato de entrada de Whisper),
+    opcionalmente recortado a los primeros max_seconds. Los backends aceptan el array
+    directamente en lugar de la ruta.
+    """
     try:
-        _whisper_model = whisper.load_model("turbo", device=device)
-        print(f"Modelo Whisper cargado en GPU con {device}")
-    except Exception as e:
-        # Si falla con cuda, intentar con CPU
-        print(f"Error al cargar en GPU: {str(e)}")
-        device = "cpu"
-        print("Cargando en CPU")
-        _whisper_model = whisper.load_model("turbo", device=device)
-    
-    _is_preloaded = True
-    return _whisper_model
+        from whisper.audio import load_audio
+    except ImportError:
+        from faster_whisper.audio import decode_audio as load_audio
+
+    audio = load_audio(str(audio_path))
+    if max_seconds:
+        audio = audio[:int(max_seconds * SAMPLE_RATE)]
+    return audio
+
+
+WHISPER_BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    CTranslate2WhisperBackend.name: CTranslate2WhisperBackend
+}
+
+
+def create_whisper_backend(backend: str, model_size: str, device: str, compute_type: str = "int8") -> WhisperBackend:
+    """
+    Crea una instancia del motor ASR indicado
+
+    Args:
+        backend: Nombre del motor ('openai' o 'ctranslate2')
+        model_size: Tamaño del modelo Whisper ('turbo', 'small', etc.)
+        device: Dispositivo ('cuda' o 'cpu')
+        compute_type: Tipo de cómputo de CTranslate2 (ignorado por openai-whisper)
+    """
+    if backend not in WHISPER_BACKENDS:
+        raise ValueError(f"Backend de Whisper desconocido: {backend}. Opciones: {list(WHISPER_BACKENDS)}")
+
+    if backend == CTranslate2WhisperBackend.name:
+        return CTranslate2WhisperBackend(model_size, device, compute_type=compute_type)
+    return WHISPER_BACKENDS[backend](model_size, device)
+
+
+# Módulos que concentran el cómputo (precisión reducida y compilación)
+WHISPER_HOT_MODULES = ["model.encoder", "model.decoder"]
+
+
+def _load_whisper(device: str) -> WhisperBackend:
+    """Cargador registrado en el gestor de modelos ('auto' intenta GPU y luego CPU)"""
+    backend = settings.whisper_backend
+    model_size = settings.whisper_model_size
+    compute_type = settings.whisper_compute_type
+
+    if device != "auto":
+        logger.info("Cargando Whisper", extra={"backend": backend, "device": device})
+        whisper_model = create_whisper_backend(backend, model_size, device, compute_type)
+    else:
+        device = "cuda"
+        try:
+            whisper_model = create_whisper_backend(backend, model_size, device, compute_type)
+            logger.info("Modelo Whisper cargado en GPU", extra={"backend": backend, "device": device})
+        except ValueError:
+            raise
+        except Exception as e:
+            # Si falla con cuda, intentar con CPU
+            logger.warning("Error al cargar Whisper en GPU: %s", e)
+            device = "cpu"
+            logger.info("Cargando Whisper", extra={"backend": backend, "device": device})
+            whisper_model = create_whisper_backend(backend, model_size, device, compute_type)
+
+    if isinstance(whisper_model, OpenAIWhisperBackend):
+        # CTranslate2 ya ejecuta un grafo nativo con su propio compute_type: solo aplica al backend PyTorch
+        apply_precision("whisper", whisper_model, WHISPER_HOT_MODULES, get_pool_settings("whisper").precision, device)
+        compile_hot_modules("whisper", whisper_model, WHISPER_HOT_MODULES)
+    return whisper_model
+
+
+model_manager.register("whisper", _load_whisper)
+
+
+def load_whisper_model(force_load=False):
+    # El gestor de modelos devuelve la instancia compartida o la carga una sola vez
+    return model_manager.get("whisper", force_load=force_load)
 
 # Mantenemos get_whisper_model para compatibilidad
 def get_whisper_model():
@@ -32,7 +175,7 @@ def get_whisper_model():
 
 def transcribe_audio(request) -> dict:
     start_time = time.time()
-    
+
     # Verificar existencia del archivo
     audio_path = Path(request.audio_path)
     if not audio_path.exists():
@@ -41,17 +184,22 @@ def transcribe_audio(request) -> dict:
             "error": f"El archivo {request.audio_path} no existe",
             "response_time": round(time.time() - start_time, 2)
         }
-    
-    # Cargar el modelo (no se recargará si ya está cargado)
-    model = get_whisper_model()
-    
-    # Transcripcion
-    result = model.transcribe(str(audio_path), fp16=False)
-    
+
+    decode_start = time.time()
+    audio = load_audio_clip(audio_path)
+    observe_stage("decode", "ffmpeg", time.time() - decode_start)
+
+    # Cargar el modelo (no se recargará si ya está cargado) y marcarlo en uso
+    whisper_start = time.time()
+    with model_manager.lease("whisper") as model:
+        # Transcripcion
+        result = run_on_pool("whisper", model.transcribe, audio)
+    observe_stage("transcribe", "whisper", time.time() - whisper_start, len(audio) / SAMPLE_RATE)
+
     # Tiempo de respuesta
     response_time = round(time.time() - start_time, 2)
-    
+
     return {
         "text": result["text"],
         "response_time": response_time
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,32 @@
+import contextvars
+import threading
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from core.executors import pool_name_for, run_on_pool
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_pool_name_for_uses_prefix():
+    assert pool_name_for("whisper") == "whisper"
+    assert pool_name_for("tts_spanish") == "tts"
+
+
+def test_run_on_pool_propagates_context():
+    request_id.set("abc")
+    assert run_on_pool("translation", request_id.get) == "abc"
+
+
+def test_different_pools_run_concurrently():
+    # Si los pools se turnaran, la barrera de dos hilos vencería por timeout
+    barrier = threading.Barrier(2, timeout=5)
+    threads = [threading.Thread(target=run_on_pool, args=(name, barrier.wait)) for name in ("whisper", "translation")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from core import model_manager as model_manager_module
+from core.model_manager import ModelManager, ModelState
+
+MB = 1024 ** 2
+
+
+class FakeModel:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+
+@pytest.fixture(autouse=True)
+def footprint_from_fake_size(monkeypatch):
+    # Tamaño determinista en lugar de contar tensores o medir RSS
+    monkeypatch.setattr(model_manager_module, "module_footprint_bytes", lambda handle: handle.size)
+
+
+def counting_loader(name: str, size: int = MB, delay: float = 0.0):
+    calls = []
+
+    def load(device):
+        calls.append(device)
+        time.sleep(delay)
+        return FakeModel(name, size)
+
+    load.calls = calls
+    return load
+
+
+def test_concurrent_gets_load_once():
+    manager = ModelManager()
+    loader = counting_loader("a", delay=0.1)
+    manager.register("a", loader, device="cpu")
+
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(manager.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loader.calls) == 1
+    assert all(handle is handles[0] for handle in handles)
+    assert manager.is_ready("a")
+
+
+def test_unregistered_model_raises():
+    with pytest.raises(KeyError):
+        ModelManager().get("missing")
+
+
+def test_failed_load_is_reported_and_retried():
+    manager = ModelManager()
+    attempts = []
+
+    def flaky(device):
+        attempts.append(device)
+        if len(attempts) == 1:
+            raise RuntimeError("sin pesos")
+        return FakeModel("a", MB)
+
+    manager.register("a", flaky, device="cpu")
+    with pytest.raises(RuntimeError):
+        manager.get("a")
+    assert manager.status()[0]["state"] == ModelState.FAILED.value
+
+    assert manager.get("a").name == "a"
+    assert len(attempts) == 2
+
+
+def test_lease_marks_the_model_in_use():
+    manager = ModelManager()
+    manager.register("a", counting_loader("a"), device="cpu")
+    with manager.lease("a") as handle:
+        assert handle.name == "a"
+        assert manager.status()[0]["in_use"] == 1
+    assert manager.status()[0]["in_use"] == 0
+
+
+def test_least_recently_used_idle_model_is_evicted():
+    manager = ModelManager(memory_budget_bytes=2 * MB)
+    for name in ("a", "b", "c"):
+        manager.register(name, counting_loader(name), device="cpu")
+
+    manager.get("a")
+    manager.get("b")
+    manager.get("a")  # "b" queda como el menos usado
+    manager.get("c")
+
+    assert manager.is_ready("a") and manager.is_ready("c")
+    assert not manager.is_ready("b")
+    assert manager.metrics()["evictions_total"] == 1
+
+
+def test_leased_model_is_not_evicted():
+    manager = ModelManager(memory_budget_bytes=2 * MB)
+    for name in ("a", "b", "c"):
+        manager.register(name, counting_loader(name), device="cpu")
+
+    with manager.lease("a"):
+        manager.get("b")
+        manager.get("c")
+        assert manager.is_ready("a")
+        assert not manager.is_ready("b")
+
+
+def test_evicted_model_reloads_on_next_get():
+    manager = ModelManager(memory_budget_bytes=MB)
+    loader = counting_loader("a")
+    manager.register("a", loader, device="cpu")
+    manager.register("b", counting_loader("b"), device="cpu")
+
+    manager.get("a")
+    manager.get("b")
+    assert not manager.is_ready("a")
+
+    manager.get("a")
+    assert len(loader.calls) == 2
+
+
+def test_reload_swaps_handle_and_drains_the_old_one():
+    manager = ModelManager()
+    versions = iter(range(10))
+    manager.register("a", lambda device: FakeModel(f"v{next(versions)}", MB), device="cpu")
+    entry_status = lambda: manager.status()[0]
+
+    old_lease = manager.lease("a")
+    old_handle = old_lease.__enter__()
+    reloaded = []
+    thread = threading.Thread(target=lambda: reloaded.append(manager.reload("a")))
+    thread.start()
+
+    # Con la versión anterior en uso la recarga pone en servicio la nueva y queda drenando
+    deadline = time.time() + 5
+    while entry_status()["reload_state"] != "draining" and time.time() < deadline:
+        time.sleep(0.01)
+    assert entry_status()["reload_state"] == "draining"
+    assert manager.get("a").name == "v1"
+    assert thread.is_alive()
+
+    old_lease.__exit__(None, None, None)
+    thread.join(timeout=5)
+
+    assert old_handle.name == "v0"
+    assert reloaded[0].name == "v1"
+    assert entry_status()["reload_state"] == "idle"
+    assert manager.generation("a") == 1
+
+
+def test_concurrent_reload_is_rejected():
+    manager = ModelManager()
+    manager.register("a", counting_loader("a"), device="cpu")
+    manager.get("a")
+
+    assert manager.try_begin_reload("a")
+    with pytest.raises(RuntimeError):
+        manager.reload("a")
+    manager.cancel_reload("a")
+    assert not manager.is_reloading("a")
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from core.config import settings
+from core.profiling import profile_path
+
+PROFILE_ID = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    directory = tmp_path / PROFILE_ID
+    directory.mkdir()
+    (directory / "summary.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "secret.txt").write_text("fuera del perfil", encoding="utf-8")
+    return directory
+
+
+def test_existing_file_is_found(profile_dir):
+    assert profile_path(PROFILE_ID) == profile_dir / "summary.json"
+
+
+@pytest.mark.parametrize("profile_id", ["../etc", "0123", PROFILE_ID.upper(), PROFILE_ID + "/.."])
+def test_invalid_profile_ids_are_rejected(profile_dir, profile_id):
+    assert profile_path(profile_id) is None
+
+
+@pytest.mark.parametrize("file_name", ["../secret.txt", "/etc/passwd", "missing.json", ".."])
+def test_files_outside_the_profile_are_rejected(profile_dir, file_name):
+    assert profile_path(PROFILE_ID, file_name) is None
@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from core.config import settings
+from services import reference_audio
+from services.reference_audio import candidate_windows, prepare_reference, voice_activity
+from services.whisper_service import SAMPLE_RATE
+
+
+def _speech_with_silence(seconds: float, voiced: list) -> np.ndarray:
+    """Ruido bajo con tramos (inicio, fin) de seno fuerte que hacen de voz"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    for start, end in voiced:
+        t = np.arange(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE))
+        audio[t] = 0.5 * np.sin(2 * np.pi * 220 * t / SAMPLE_RATE)
+    return audio
+
+
+def test_candidate_windows_respect_duration_bounds():
+    segments = [{"start": float(i), "end": float(i + 1), "text": str(i)} for i in range(12)]
+    windows = list(candidate_windows(segments, 5.0, 10.0))
+    assert windows
+    assert all(5.0 <= end - start <= 10.0 for start, end, _ in windows)
+
+
+def test_voice_activity_marks_loud_frames():
+    energy_db = np.array([-80.0] * 10 + [-10.0] * 10)
+    speech = voice_activity(energy_db)
+    assert not speech[:10].any()
+    assert speech[10:].all()
+
+
+@pytest.fixture
+def long_reference(tmp_path, monkeypatch):
+    path = tmp_path / "reference.wav"
+    path.write_bytes(b"contenido de prueba")
+    audio = _speech_with_silence(30.0, [(12.0, 20.0)])
+    monkeypatch.setattr(reference_audio, "load_audio_clip", lambda reference_path: audio)
+    monkeypatch.setattr(reference_audio, "_export_window", lambda source, start, end, output: None)
+    monkeypatch.setattr(settings, "reference_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(reference_audio, "_cache", type(reference_audio._cache)())
+    return path
+
+
+def test_known_text_trims_by_vad_without_whisper(long_reference, monkeypatch):
+    def fail(audio):
+        raise AssertionError("no se debe transcribir con texto conocido")
+
+    monkeypatch.setattr(reference_audio, "_transcribe", fail)
+    monkeypatch.setattr(settings, "reference_align_with_text", False)
+
+    report = prepare_reference(long_reference, "texto conocido")
+
+    assert report["trimmed"] and not report["aligned"]
+    assert report["text"] == "texto conocido"
+    assert report["reference_seconds"] <= settings.reference_max_seconds + 2 * reference_audio.BOUNDARY_PADDING_SECONDS
+    # La ventana elegida cae sobre el tramo con voz
+    assert report["window_start"] < 20.0 and report["window_end"] > 12.0
+
+
+def test_unknown_text_aligns_with_whisper_segments(long_reference, monkeypatch):
+    segments = [{"start": 12.0, "end": 16.0, "text": " hola"}, {"start": 16.0, "end": 19.5, "text": " mundo"}]
+    monkeypatch.setattr(reference_audio, "_transcribe", lambda audio: {"segments": segments, "text": ""})
+
+    report = prepare_reference(long_reference)
+
+    assert report["aligned"]
+    assert report["text"] == "hola mundo"
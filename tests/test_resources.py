@@ -0,0 +1,18 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from core.resources import module_footprint_bytes
+
+
+def test_footprint_counts_parameters_once():
+    linear = torch.nn.Linear(10, 10)
+    # El mismo módulo dos veces (pesos compartidos) se cuenta una sola vez
+    assert module_footprint_bytes((linear, linear)) == (10 * 10 + 10) * 4
+
+
+def test_footprint_includes_packed_int8_weights():
+    model = torch.quantization.quantize_dynamic(torch.nn.Sequential(torch.nn.Linear(64, 32)), {torch.nn.Linear},
+                                                dtype=torch.qint8)
+    # Pesos int8 (1 byte) y bias fp32 empaquetados fuera de parameters()/buffers()
+    assert module_footprint_bytes(model) >= 64 * 32 + 32 * 4
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("transformers")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import translation_route
+from services.translation_service import UnsupportedLanguageError
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(translation_route.router)
+    return TestClient(app)
+
+
+def test_unsupported_language_is_a_client_error(client, monkeypatch):
+    def translate(payload):
+        raise UnsupportedLanguageError("Idioma no soportado por el modelo de traducción: la")
+
+    monkeypatch.setattr(translation_route, "translate_text", translate)
+    response = client.post("/translate/", json={"text": "Gallia est omnis divisa", "target_lang": "es"})
+
+    assert response.status_code == 400
+    assert "la" in response.json()["detail"]
+
+
+def test_unexpected_errors_are_server_errors(client, monkeypatch):
+    def translate(payload):
+        raise RuntimeError("fallo interno")
+
+    monkeypatch.setattr(translation_route, "translate_text", translate)
+    response = client.post("/translate/", json={"text": "hola", "target_lang": "en"})
+
+    assert response.status_code == 500
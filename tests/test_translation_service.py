@@ -0,0 +1,101 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("transformers")
+
+from core.config import TranslationRouteSettings, settings
+from core.model_manager import model_manager
+from services.translation_service import (
+    UnsupportedLanguageError, _load_quantized_tensors, _prepare_languages, _quantize_dynamic_int8,
+    _quantized_tensors, detect_language, get_generation_kwargs, resolve_translation_route
+)
+
+
+def test_main_pair_uses_default_model_without_routes(monkeypatch):
+    monkeypatch.setattr(settings, "translation_routes", {})
+    assert resolve_translation_route("es", "en") == ("translation", settings.translation_model_name, None)
+
+
+def test_configured_route_is_registered_lazily(monkeypatch):
+    monkeypatch.setattr(settings, "translation_routes", {
+        "es-en": TranslationRouteSettings(model="Helsinki-NLP/opus-mt-es-en", tier="fast")
+    })
+    model_key, model_name, tier = resolve_translation_route("es", "en")
+
+    assert model_key == "translation_opus_mt_es_en"
+    assert model_name == "Helsinki-NLP/opus-mt-es-en"
+    assert tier == "fast"
+    assert model_key in model_manager.registered_models()
+
+
+def test_quantized_weights_round_trip_with_weights_only(tmp_path):
+    torch.manual_seed(0)
+    source = _quantize_dynamic_int8(torch.nn.Sequential(torch.nn.Linear(8, 4), torch.nn.ReLU(), torch.nn.Linear(4, 2)))
+    path = tmp_path / "weights.pt"
+    torch.save(_quantized_tensors(source), path)
+
+    target = _quantize_dynamic_int8(torch.nn.Sequential(torch.nn.Linear(8, 4), torch.nn.ReLU(), torch.nn.Linear(4, 2)))
+    _load_quantized_tensors(target, torch.load(path, weights_only=True))
+
+    inputs = torch.randn(3, 8)
+    assert torch.equal(source(inputs), target(inputs))
+
+
+def test_fast_tier_is_greedy():
+    tier, kwargs = get_generation_kwargs("fast", input_tokens=10)
+    assert tier == "fast"
+    assert kwargs["num_beams"] == settings.translation_fast_num_beams
+    assert kwargs["do_sample"] is False
+
+
+def test_quality_tier_uses_beam_search():
+    _, kwargs = get_generation_kwargs("quality", input_tokens=10)
+    assert kwargs["num_beams"] == settings.translation_quality_num_beams
+
+
+def test_output_length_scales_with_input(monkeypatch):
+    monkeypatch.setattr(settings, "translation_max_length_ratio", 2.0)
+    monkeypatch.setattr(settings, "translation_max_length_offset", 10)
+    _, kwargs = get_generation_kwargs("fast", input_tokens=20)
+    assert kwargs["max_new_tokens"] == 50
+
+
+def test_default_tier_comes_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "translation_default_tier", "quality")
+    assert get_generation_kwargs(None, input_tokens=5)[0] == "quality"
+
+
+def test_unknown_tier_is_rejected():
+    with pytest.raises(ValueError):
+        get_generation_kwargs("turbo", input_tokens=5)
+
+
+class _M2M100LikeTokenizer:
+    """Tokenizador mínimo con la interfaz de M2M100 (get_lang_id y src_lang)"""
+    src_lang = None
+
+    def get_lang_id(self, language: str) -> int:
+        return {"es": 1, "en": 2}[language]
+
+
+def test_prepare_languages_sets_source_and_forced_target():
+    tokenizer = _M2M100LikeTokenizer()
+    assert _prepare_languages(tokenizer, "es", "en") == {"forced_bos_token_id": 2}
+    assert tokenizer.src_lang == "es"
+
+
+def test_prepare_languages_rejects_unsupported_codes():
+    tokenizer = _M2M100LikeTokenizer()
+    with pytest.raises(UnsupportedLanguageError):
+        _prepare_languages(tokenizer, "la", "en")
+    # El estado del tokenizador compartido no se toca si el par no es válido
+    assert tokenizer.src_lang is None
+
+
+def test_detect_language_only_returns_configured_candidates(monkeypatch):
+    pytest.importorskip("langid")
+    monkeypatch.setattr(settings, "translation_detect_languages", ["es", "en"])
+    # Latín: sin restricción langid suele devolver "la"
+    assert detect_language("Gallia est omnis divisa in partes tres") in ("es", "en")
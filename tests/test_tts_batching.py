@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from core.model_manager import model_manager
+from services import tts_batching
+from services.tts_batching import TTSBatchScheduler, TTSJob, group_jobs
+
+
+def _job(duration: int, nfe_step: int = 32) -> TTSJob:
+    job = TTSJob("ref.wav", "referencia.", "texto", None, nfe_step=nfe_step)
+    job.duration = duration
+    return job
+
+
+def test_group_jobs_respects_max_batch_size():
+    groups = group_jobs([_job(100) for _ in range(5)], max_batch_size=2, duration_ratio=2.0)
+    assert [len(group) for group in groups] == [2, 2, 1]
+
+
+def test_group_jobs_splits_by_duration_ratio():
+    groups = group_jobs([_job(100), _job(150), _job(400)], max_batch_size=8, duration_ratio=2.0)
+    assert [[job.duration for job in group] for group in groups] == [[100, 150], [400]]
+
+
+def test_group_jobs_never_mixes_sampler_params():
+    groups = group_jobs([_job(100, nfe_step=16), _job(100, nfe_step=32)], max_batch_size=8, duration_ratio=2.0)
+    assert len(groups) == 2
+    assert all(len({job.params_key for job in group}) == 1 for group in groups)
+
+
+class _FakeTTS:
+    def __init__(self):
+        self.single_calls = 0
+
+    def infer(self, **kwargs):
+        self.single_calls += 1
+        return "single", 24000, None
+
+
+def _fake_prepare(job: TTSJob):
+    if job.options:
+        return
+    job.duration = 100
+    job.batchable = True
+
+
+def _fake_synthesize_batch(tts, jobs):
+    for job in jobs:
+        job.future.set_result(("batched", 24000, None))
+
+
+@pytest.fixture
+def fake_tts(request, monkeypatch):
+    """Modelo falso registrado con un nombre propio del test (el gestor es global)"""
+    tts = _FakeTTS()
+    tts.model_key = f"tts_test_{request.node.name}"
+    model_manager.register(tts.model_key, lambda device: tts, device="cpu")
+    monkeypatch.setattr(tts_batching, "_prepare", _fake_prepare)
+    monkeypatch.setattr(tts_batching, "_synthesize_batch", _fake_synthesize_batch)
+    return tts
+
+
+def _submit_concurrently(scheduler: TTSBatchScheduler, jobs):
+    results = [None] * len(jobs)
+    barrier = threading.Barrier(len(jobs))
+
+    def submit(index: int):
+        barrier.wait()
+        results[index] = scheduler.submit(jobs[index]).result(timeout=10)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(jobs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_jobs_are_batched(fake_tts):
+    scheduler = TTSBatchScheduler(fake_tts.model_key, max_batch_size=4, max_wait_ms=500, duration_ratio=2.0)
+    results = _submit_concurrently(scheduler, [TTSJob("ref.wav", "r.", f"texto {i}", None) for i in range(4)])
+
+    assert scheduler.batches > 0
+    assert scheduler.batched_jobs >= 2
+    assert all(result[0] in ("batched", "single") for result in results)
+
+
+def test_jobs_with_extra_options_use_infer(fake_tts):
+    scheduler = TTSBatchScheduler(fake_tts.model_key, max_batch_size=4, max_wait_ms=200, duration_ratio=2.0)
+    results = _submit_concurrently(scheduler, [TTSJob("ref.wav", "r.", "texto", None, seed=i) for i in range(2)])
+
+    assert [result[0] for result in results] == ["single", "single"]
+    assert scheduler.batches == 0
+    assert fake_tts.single_calls == 2
@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from services.tts_chunking import _StitchedWriter, crossfade, split_text
+
+
+def test_split_text_prefers_sentence_boundaries():
+    text = "Primera oración corta. Segunda oración corta. Tercera oración corta."
+    assert split_text(text, max_bytes=30) == ["Primera oración corta.", "Segunda oración corta.",
+                                              "Tercera oración corta."]
+
+
+def test_split_text_merges_short_pieces():
+    assert split_text("Hola. Chau. Bien.", max_bytes=100) == ["Hola. Chau. Bien."]
+
+
+def test_split_text_respects_the_byte_limit():
+    text = "una frase larga, con varias cláusulas, y muchas palabras " * 5
+    chunks = split_text(text, max_bytes=40)
+    assert all(len(chunk.encode("utf-8")) <= 40 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_crossfade_goes_from_tail_to_head():
+    mixed = crossfade(np.ones(5, dtype=np.float32), np.zeros(5, dtype=np.float32))
+    assert mixed[0] == pytest.approx(1.0)
+    assert mixed[-1] == pytest.approx(0.0)
+    assert np.all(np.diff(mixed) <= 0)
+
+
+def test_stitched_writer_overlaps_chunks(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    path = tmp_path / "out.wav"
+    sample_rate = 1000
+    writer = _StitchedWriter(str(path), crossfade_seconds=0.01)  # 10 muestras
+    writer.write(np.ones(100, dtype=np.float32), sample_rate)
+    writer.write(np.ones(100, dtype=np.float32), sample_rate)
+    writer.close()
+
+    audio, written_rate = sf.read(str(path), dtype="float32")
+    assert written_rate == sample_rate
+    # Cada unión se superpone una vez: 100 + 100 - 10
+    assert len(audio) == writer.total_samples == 190
+    assert np.allclose(audio, 1.0, atol=1e-3)
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from core import preload, warmup
+from core.config import settings
+from core.model_manager import model_manager
+
+
+@pytest.fixture
+def startup(monkeypatch):
+    """Arranque con modelos falsos: la precarga no carga nada y cada warmer anota el modelo"""
+    warmed = []
+    monkeypatch.setattr(warmup, "_readiness", {"phase": "starting", "warmed_models": {}, "started_at": 0.0,
+                                               "ready_at": None})
+    monkeypatch.setattr(warmup, "save_compile_artifacts", lambda: None)
+    monkeypatch.setattr(warmup, "_get_warmer", lambda name: lambda handle: warmed.append((name, handle)))
+    monkeypatch.setattr(settings, "warmup_enabled", True)
+    return warmed
+
+
+def test_startup_warms_preloaded_models_that_are_not_loaded_yet(startup, monkeypatch):
+    model_manager.register("tts_warmup_lazy", lambda device: "handle", device="cpu")
+    monkeypatch.setattr(preload, "preload_all_models", lambda: {"models": ["tts_warmup_lazy"], "timeline": []})
+
+    warmup.run_startup_sequence()
+
+    assert startup == [("tts_warmup_lazy", "handle")]
+    assert warmup._readiness["warmed_models"]["tts_warmup_lazy"]["status"] == "warm"
+    assert warmup._readiness["phase"] == "ready"
+
+
+def test_readiness_stays_closed_when_a_preloaded_model_cannot_warm(startup, monkeypatch):
+    def broken_loader(device):
+        raise RuntimeError("sin checkpoint")
+
+    model_manager.register("tts_warmup_broken", broken_loader, device="cpu")
+    monkeypatch.setattr(preload, "preload_all_models", lambda: {"models": ["tts_warmup_broken"], "timeline": []})
+
+    warmup.run_startup_sequence()
+
+    report = warmup.readiness_report()
+    assert not report["ready"]
+    assert "tts_warmup_broken" in report["failed_models"]
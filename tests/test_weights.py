@@ -0,0 +1,57 @@
+import gc
+import json
+import struct
+import weakref
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+torch = pytest.importorskip("torch")
+
+from core import weights
+from core.weights import load_safetensors_mmap
+
+
+def _write_safetensors(path, tensors):
+    header, data = {}, b""
+    for name, tensor in tensors.items():
+        raw = tensor.contiguous().numpy().tobytes()
+        header[name] = {"dtype": "F32", "shape": list(tensor.shape), "data_offsets": [len(data), len(data) + len(raw)]}
+        data += raw
+    encoded = json.dumps(header).encode()
+    path.write_bytes(struct.pack("<Q", len(encoded)) + encoded + data)
+
+
+def test_load_safetensors_mmap_round_trip(tmp_path):
+    expected = {"a": torch.arange(6, dtype=torch.float32).reshape(2, 3), "b": torch.ones(4)}
+    path = tmp_path / "model.safetensors"
+    _write_safetensors(path, expected)
+
+    tensors = load_safetensors_mmap(path)
+    assert torch.equal(tensors["a"], expected["a"])
+    assert torch.equal(tensors["b"], expected["b"])
+
+    # Copy-on-write: escribir en un tensor no modifica el archivo
+    tensors["b"].add_(1)
+    assert torch.equal(load_safetensors_mmap(path)["b"], expected["b"])
+
+
+def test_mapping_is_released_with_its_tensors(tmp_path, monkeypatch):
+    path = tmp_path / "model.safetensors"
+    _write_safetensors(path, {"a": torch.zeros(8)})
+
+    buffers = []
+    real_mmap = weights.mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        buffer = real_mmap(*args, **kwargs)
+        buffers.append(weakref.ref(buffer))
+        return buffer
+
+    monkeypatch.setattr(weights.mmap, "mmap", tracking_mmap)
+    tensors = load_safetensors_mmap(path)
+    assert buffers[0]() is not None
+
+    del tensors
+    gc.collect()
+    assert buffers[0]() is None
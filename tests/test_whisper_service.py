@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("prometheus_client")
+
+from services.whisper_service import WhisperBackend, create_whisper_backend
+
+
+def test_backend_without_transcribe_cannot_be_created():
+    class Incomplete(WhisperBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete("small", "cpu")
+
+
+def test_backend_with_transcribe_can_be_created():
+    class Echo(WhisperBackend):
+        name = "echo"
+
+        def transcribe(self, audio_path, **options) -> dict:
+            return {"text": str(audio_path), "language": "es", "segments": []}
+
+    assert Echo("small", "cpu").transcribe("clip.wav")["text"] == "clip.wav"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_whisper_backend("vosk", "small", "cpu")